@@ -1,111 +1,227 @@
+import argparse
 import sqlite3
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
-import os
+
+from database import ConnectionManager, DB_PATH
+from change_bus import ChangeBus
+from executor import QueryExecutor
+from instrumentation import QueryStats, StartupTimer, load_query_settings
+from ui_watchdog import MainloopWatchdog, load_watchdog_settings
+from migrations import migrate
+from orphans import OrphanSweeper, load_sweep_settings, log_report
+from snapshot import load_snapshot, save_snapshot
+from repositories import (Animal, Consultation, Medicament, Ordonnance, Proprietaire, Repositories,
+                          ValidationError, Veterinaire, veterinaire_label)
+from widgets import FilterBar, ProgressDialog, SearchCombobox, TreeviewSync, VirtualTreeview
+
+# Nombre maximal de résultats de la recherche plein texte des consultations
+SEARCH_RESULTS = 200
+
+# Parcours des lignes orphelines (si activé dans clinique.ini) : premier passage après
+# le démarrage, avec une pause entre deux tranches pour laisser passer les requêtes des vues (ms)
+ORPHAN_SWEEP_DELAY = 60 * 1000
+ORPHAN_SWEEP_PAUSE = 50
 
 class ClinicVeterinaireApp:
-    def __init__(self, root):
+    def __init__(self, root, profile_startup=False):
+        # profile_startup : afficher la durée des étapes du démarrage
         self.root = root
+        self.startup = StartupTimer()
+        self.profile_startup = profile_startup
         self.root.title("Gestion de Clinique Vétérinaire")
         self.root.geometry("1000x600")
 
-        # Vérifier si la base de données existe, sinon la créer
-        if not os.path.exists('clinique_veterinaire.db'):
-            self.creer_base_de_donnees()
+        # Statistiques des requêtes et journal des requêtes lentes
+        self.query_stats = QueryStats(**load_query_settings())
+
+        # Connexion unique partagée par tous les onglets
+        self.db = ConnectionManager(DB_PATH, stats=self.query_stats)
+        print(self.db.describe())
+        self.startup.mark("connexion et profil de stockage")
+
+        # Créer la base de données si elle n'existe pas, sinon appliquer les migrations en attente
+        self.creer_base_de_donnees()
+        self.startup.mark("migrations")
+
+        # Bus des modifications : chaque écriture des dépôts relance les vues des tables modifiées
+        self.changes = ChangeBus(self.root, self.db.cascades())
+
+        # Couche d'accès aux données (toutes les requêtes SQL de l'application)
+        self.repos = Repositories(self.db, cache=True, on_change=self.changes.publish)
+
+        # Barre d'état (affiche les chargements en cours)
+        self.status_bar = ttk.Label(self.root, text="", anchor="w")
+        self.status_bar.pack(side=tk.BOTTOM, fill="x", padx=10)
+
+        # Exécuteur des requêtes de lecture (hors du thread de Tk)
+        self.executor = QueryExecutor(self.root, self.db, on_busy=self.show_loading,
+                                      on_error=self.show_query_error)
 
-        # Créer l'interface
+        # Surveillance de la boucle Tk (optionnelle, menu caché Ctrl+Maj+D)
+        self.watchdog = None
+        watchdog_settings = load_watchdog_settings()
+        if watchdog_settings is not None:
+            self.watchdog = MainloopWatchdog(self.root, **watchdog_settings)
+            self.watchdog.start()
+            self.watchdog.install_debug_menu()
+
+        self.startup.mark("exécuteur et surveillance")
+
+        # Première page de chaque onglet enregistrée à la dernière fermeture
+        self.snapshot = load_snapshot(DB_PATH)
+        self.startup.mark("instantané")
+
+        # Créer l'interface (les données d'un onglet sont chargées à sa première ouverture)
         self.create_widgets()
 
+        # Fermer proprement les connexions à la fermeture de la fenêtre
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Charger l'onglet affiché une fois la fenêtre dessinée
+        self.root.after_idle(self.on_window_shown)
+
+        # Supprimer régulièrement les lignes orphelines, en arrière-plan (optionnel)
+        self.sweep_settings = load_sweep_settings()
+        if self.sweep_settings is not None:
+            self.root.after(ORPHAN_SWEEP_DELAY, self.start_orphan_sweep)
+
+    def on_window_shown(self):
+        # Première boucle Tk : la fenêtre est affichée, charger l'onglet courant
+        self.startup.mark("affichage de la fenêtre")
+        self.on_tab_changed()
+        self.startup.mark("premier onglet (instantané ou requête soumise)")
+        if self.profile_startup:
+            self.root.after(self.executor.poll_interval, self._wait_first_tab)
+
+    def _wait_first_tab(self):
+        # Attendre l'affichage des données du premier onglet puis afficher les durées
+        if not self.executor.is_idle():
+            self.root.after(self.executor.poll_interval, self._wait_first_tab)
+            return
+        self.startup.mark("données du premier onglet")
+        print(self.startup.format())
+
+    def on_tab_changed(self, event=None):
+        # Charger les données de l'onglet sélectionné s'il est ouvert pour la première fois
+        self.load_tab(self.notebook.select())
+
+    def load_tab(self, tab):
+        # Charger les données d'un onglet (nom Tk du cadre de l'onglet) et les
+        # listes de recherche qu'il utilise; sans effet s'il est déjà chargé
+        tab = str(tab)
+        if tab in self.loaded_tabs or tab not in self.tab_loaders:
+            return
+        self.loaded_tabs.add(tab)
+        refresh, *lookups = self.tab_loaders[tab]
+        if not self.show_snapshot(tab):
+            refresh()
+        for load in lookups:
+            load()
+
+    def is_loaded(self, tab):
+        # Vérifier que les données d'un onglet ont été chargées
+        return str(tab) in self.loaded_tabs
+
+    def show_snapshot(self, tab):
+        # Afficher la première page enregistrée à la dernière fermeture, puis vérifier
+        # en arrière-plan que ses tables n'ont pas changé depuis (sinon relire l'onglet).
+        # Retourne False si l'instantané ne contient pas l'onglet.
+        name, view, repository = self.tab_views[tab]
+        entry = self.snapshot.pop(name, None)
+        if entry is None:
+            return False
+        view.preload(entry['lignes'])
+        self.executor.submit(f"revalidate_{name}", lambda: self.db.table_versions(repository.row_tables),
+                             lambda versions: self.on_revalidated(tab, entry['versions'], versions))
+        return True
+
+    def on_revalidated(self, tab, instantane, versions):
+        # Relire l'onglet si une de ses tables a été modifiée depuis l'instantané
+        if versions != instantane:
+            self.tab_loaders[tab][0]()
+
+    def snapshot_tabs(self):
+        # Première page de chaque onglet (non filtrée) avec les versions de ses tables,
+        # lues avant les lignes : une modification concurrente rend l'instantané
+        # périmé plutôt que faussement à jour
+        onglets = {}
+        for name, view, repository in self.tab_views.values():
+            versions = self.db.table_versions(repository.row_tables)
+            onglets[name] = {'versions': versions, 'lignes': repository.page_rows(None, view.page_size)}
+        return onglets
+
+    def start_orphan_sweep(self):
+        # Lancer un parcours des lignes orphelines (une tranche par requête du thread de travail)
+        self.sweep_orphans(OrphanSweeper(self.db))
+
+    def sweep_orphans(self, sweeper):
+        # Traiter la tranche suivante du parcours. Une erreur est retournée au lieu
+        # d'être levée : elle est journalisée et le passage suivant reste planifié.
+        def step():
+            try:
+                return sweeper.step()
+            except Exception as e:
+                return e
+
+        self.executor.submit("sweep_orphans", step, lambda reste: self.on_orphans_swept(sweeper, reste))
+
+    def on_orphans_swept(self, sweeper, reste):
+        # Enchaîner les tranches; à la fin (ou après une erreur), planifier le passage
+        # suivant, signaler les tables nettoyées (les vues sont relues) et journaliser le rapport
+        erreur = reste if isinstance(reste, Exception) else None
+        if erreur is None and reste:
+            self.root.after(ORPHAN_SWEEP_PAUSE, lambda: self.sweep_orphans(sweeper))
+            return
+        self.root.after(self.sweep_settings['interval_ms'], self.start_orphan_sweep)
+        for table, count in sweeper.report.items():
+            if count:
+                self.changes.publish(table, deleted=True)
+        log_report(self.sweep_settings['log_path'], sweeper.report, erreur)
+
+    def on_close(self):
+        # Arrêter l'exécuteur, enregistrer l'instantané de démarrage, fermer les
+        # connexions puis la fenêtre
+        self.executor.stop()
+        self.changes.stop()
+        try:
+            onglets = self.snapshot_tabs()
+        except sqlite3.Error as e:
+            onglets = None
+            print(f"Instantané de démarrage non enregistré: {e}")
+        self.db.close_all()
+        if onglets is not None:
+            # Enregistré après la fermeture des connexions (empreinte du fichier de la base)
+            try:
+                save_snapshot(DB_PATH, onglets)
+            except OSError as e:
+                print(f"Instantané de démarrage non enregistré: {e}")
+
+        # Écrire les statistiques des requêtes et le résumé de la surveillance dans les journaux
+        self.query_stats.log_summary()
+        self.query_stats.close()
+        if self.watchdog is not None:
+            self.watchdog.stop()
+            self.watchdog.dump()
+        self.root.destroy()
+
+    def show_loading(self, etiquettes):
+        # Afficher l'état de chargement dans la barre d'état
+        if etiquettes:
+            self.status_bar.config(text=f"Chargement en cours... ({', '.join(etiquettes)})")
+            self.root.config(cursor="watch")
+        else:
+            self.status_bar.config(text="")
+            self.root.config(cursor="")
+
+    def show_query_error(self, etiquette, erreur):
+        # Afficher une erreur survenue dans le thread de travail
+        messagebox.showerror("Erreur", f"Une erreur est survenue ({etiquette}): {str(erreur)}")
+
     def creer_base_de_donnees(self):
-        # Connexion à la base de données (la crée si elle n'existe pas)
-        conn = sqlite3.connect('clinique_veterinaire.db')
-        cursor = conn.cursor()
-
-        # Supprimer les tables si elles existent
-        cursor.execute('DROP TABLE IF EXISTS Ordonnance')
-        cursor.execute('DROP TABLE IF EXISTS Medicament')
-        cursor.execute('DROP TABLE IF EXISTS Consultation')
-        cursor.execute('DROP TABLE IF EXISTS Veterinaire')
-        cursor.execute('DROP TABLE IF EXISTS Animal')
-        cursor.execute('DROP TABLE IF EXISTS Proprietaire')
-
-        # Créer les tables
-        cursor.execute('''
-        CREATE TABLE Proprietaire (
-            id_proprietaire INTEGER PRIMARY KEY AUTOINCREMENT,
-            nom TEXT NOT NULL,
-            prenom TEXT NOT NULL,
-            telephone TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            adresse TEXT
-        )
-        ''')
-
-        cursor.execute('''
-        CREATE TABLE Animal (
-            id_animal INTEGER PRIMARY KEY AUTOINCREMENT,
-            nom TEXT NOT NULL,
-            espece TEXT NOT NULL,
-            race TEXT,
-            age INTEGER CHECK (age >= 0),
-            poids REAL,
-            id_proprietaire INTEGER,
-            FOREIGN KEY (id_proprietaire) REFERENCES Proprietaire (id_proprietaire) ON DELETE CASCADE
-        )
-        ''')
-
-        cursor.execute('''
-        CREATE TABLE Veterinaire (
-            id_veterinaire INTEGER PRIMARY KEY AUTOINCREMENT,
-            nom TEXT NOT NULL,
-            specialisation TEXT,
-            telephone TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE NOT NULL
-        )
-        ''')
-
-        cursor.execute('''
-        CREATE TABLE Consultation (
-            id_consultation INTEGER PRIMARY KEY AUTOINCREMENT,
-            date TEXT NOT NULL,
-            diagnostic TEXT NOT NULL,
-            traitement TEXT,
-            id_animal INTEGER NOT NULL,
-            id_veterinaire INTEGER NOT NULL,
-            FOREIGN KEY (id_animal) REFERENCES Animal (id_animal),
-            FOREIGN KEY (id_veterinaire) REFERENCES Veterinaire (id_veterinaire)
-        )
-        ''')
-
-        cursor.execute('''
-        CREATE TABLE Medicament (
-            id_medicament INTEGER PRIMARY KEY AUTOINCREMENT,
-            nom TEXT NOT NULL,
-            description TEXT,
-            posologie TEXT
-        )
-        ''')
-
-        cursor.execute('''
-        CREATE TABLE Ordonnance (
-            id_consultation INTEGER,
-            id_medicament INTEGER,
-            quantite INTEGER CHECK (quantite > 0),
-            PRIMARY KEY (id_consultation, id_medicament),
-            FOREIGN KEY (id_consultation) REFERENCES Consultation (id_consultation) ON DELETE CASCADE,
-            FOREIGN KEY (id_medicament) REFERENCES Medicament (id_medicament) ON DELETE CASCADE
-        )
-        ''')
-
-        # Création d'un index
-        cursor.execute('CREATE INDEX idx_consultation_veterinaire ON Consultation(id_veterinaire)')
-
-        # Valider les changements
-        conn.commit()
-        conn.close()
-
-        print("Base de données créée avec succès!")
+        # Créer la base de données ou mettre à niveau son schéma (migrations versionnées)
+        migrate(self.db.connection())
 
     def create_widgets(self):
         # Créer le notebook (onglets)
@@ -128,13 +244,59 @@ class ClinicVeterinaireApp:
         self.notebook.add(self.tab_medicaments, text="Médicaments")
         self.notebook.add(self.tab_ordonnances, text="Ordonnances")
 
-        # Configurer les onglets
+        # Configurer les onglets (widgets seulement : aucune requête)
         self.setup_proprietaires_tab()
+        self.startup.mark("onglet Propriétaires")
         self.setup_animaux_tab()
+        self.startup.mark("onglet Animaux")
         self.setup_veterinaires_tab()
+        self.startup.mark("onglet Vétérinaires")
         self.setup_consultations_tab()
+        self.startup.mark("onglet Consultations")
         self.setup_medicaments_tab()
+        self.startup.mark("onglet Médicaments")
         self.setup_ordonnances_tab()
+        self.startup.mark("onglet Ordonnances")
+
+        # Chargement différé : tableau de l'onglet et listes de recherche de son formulaire
+        self.tab_loaders = {
+            str(self.tab_proprietaires): (self.refresh_proprietaires,),
+            str(self.tab_animaux): (self.refresh_animaux, self.update_proprietaires_combobox),
+            str(self.tab_veterinaires): (self.refresh_veterinaires, self.update_remplacant_combobox),
+            str(self.tab_consultations): (self.refresh_consultations, self.update_animaux_combobox,
+                                          self.update_veterinaires_combobox),
+            str(self.tab_medicaments): (self.refresh_medicaments,),
+            str(self.tab_ordonnances): (self.refresh_ordonnances, self.update_consultations_combobox,
+                                        self.update_medicaments_combobox),
+        }
+        self.loaded_tabs = set()
+
+        # Tableau de chaque onglet (instantané de démarrage)
+        self.tab_views = {
+            str(self.tab_proprietaires): ('proprietaires', self.proprietaires_view, self.repos.proprietaires),
+            str(self.tab_animaux): ('animaux', self.animaux_view, self.repos.animaux),
+            str(self.tab_veterinaires): ('veterinaires', self.veterinaires_view, self.repos.veterinaires),
+            str(self.tab_consultations): ('consultations', self.consultations_view, self.repos.consultations),
+            str(self.tab_medicaments): ('medicaments', self.medicaments_view, self.repos.medicaments),
+            str(self.tab_ordonnances): ('ordonnances', self.ordonnances_view, self.repos.ordonnances),
+        }
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        self.subscribe_views()
+
+    def subscribe_views(self):
+        # Abonner chaque tableau aux tables qu'il affiche (jointures comprises) et chaque
+        # liste de recherche à la table de ses entités : après une rafale d'écritures,
+        # chaque vue concernée est relue une seule fois (onglets déjà chargés seulement)
+        for tab, (name, view, repository) in self.tab_views.items():
+            refresh = self.tab_loaders[tab][0]
+            self.changes.subscribe(repository.row_tables, lambda modifications, refresh=refresh: refresh())
+        for tables, update in ((('Proprietaire',), self.update_proprietaires_combobox),
+                               (('Animal',), self.update_animaux_combobox),
+                               (('Veterinaire',), self.update_veterinaires_combobox),
+                               (('Veterinaire',), self.update_remplacant_combobox),
+                               (('Consultation', 'Animal'), self.update_consultations_combobox),
+                               (('Medicament',), self.update_medicaments_combobox)):
+            self.changes.subscribe(tables, lambda modifications, update=update: update())
 
     def setup_proprietaires_tab(self):
         # Frame pour les entrées
@@ -179,6 +341,13 @@ class ClinicVeterinaireApp:
         frame_table = ttk.LabelFrame(self.tab_proprietaires, text="Liste des propriétaires")
         frame_table.pack(fill="both", expand=True, padx=10, pady=10)
 
+        # Filtre par préfixe, sans accents ni casse (index de la colonne choisie)
+        self.proprietaires_filter = FilterBar(frame_table, list(self.repos.proprietaires.filters),
+                                       lambda champ, texte: self.apply_filter(self.proprietaires_view,
+                                                                              self.repos.proprietaires,
+                                                                              champ, texte))
+        self.proprietaires_filter.pack(fill="x", pady=(0, 5))
+
         # Tableau avec scrollbar
         scroll = ttk.Scrollbar(frame_table)
         scroll.pack(side=tk.RIGHT, fill=tk.Y)
@@ -209,8 +378,13 @@ class ClinicVeterinaireApp:
         # Bind pour la sélection d'une ligne
         self.proprietaires_table.bind("<ButtonRelease-1>", self.select_proprietaire)
 
-        # Charger les données
-        self.refresh_proprietaires()
+        # Liste virtuelle : les propriétaires sont chargés page par page (tri: ID, ou colonne du filtre)
+        self.proprietaires_view = VirtualTreeview(self.proprietaires_table, scroll,
+                                                  self.repos.proprietaires.page_rows,
+                                                  key=lambda p: p[0],
+                                                  values=lambda p: p[:6],
+                                                  submit=self.executor.submit,
+                                                  tag="refresh_proprietaires")
 
     def setup_animaux_tab(self):
         # Frame pour les entrées
@@ -240,10 +414,11 @@ class ClinicVeterinaireApp:
 
         ttk.Label(frame_inputs, text="Propriétaire:").grid(row=2, column=2, sticky="w", padx=5, pady=5)
 
-        # Combobox pour sélectionner le propriétaire
-        self.ani_proprietaire = ttk.Combobox(frame_inputs, width=28)
+        # Combobox de recherche pour sélectionner le propriétaire
+        self.ani_proprietaire = SearchCombobox(frame_inputs, self.repos.proprietaires.search,
+                                               submit=self.executor.submit,
+                                               tag="update_proprietaires_combobox", width=28)
         self.ani_proprietaire.grid(row=2, column=3, padx=5, pady=5)
-        self.update_proprietaires_combobox()
 
         # Variable pour stocker l'ID de l'animal sélectionné
         self.current_ani_id = None
@@ -262,6 +437,13 @@ class ClinicVeterinaireApp:
         frame_table = ttk.LabelFrame(self.tab_animaux, text="Liste des animaux")
         frame_table.pack(fill="both", expand=True, padx=10, pady=10)
 
+        # Filtre par préfixe, sans accents ni casse (index de la colonne choisie)
+        self.animaux_filter = FilterBar(frame_table, list(self.repos.animaux.filters),
+                                       lambda champ, texte: self.apply_filter(self.animaux_view,
+                                                                              self.repos.animaux,
+                                                                              champ, texte))
+        self.animaux_filter.pack(fill="x", pady=(0, 5))
+
         # Tableau avec scrollbar
         scroll = ttk.Scrollbar(frame_table)
         scroll.pack(side=tk.RIGHT, fill=tk.Y)
@@ -294,8 +476,14 @@ class ClinicVeterinaireApp:
         # Bind pour la sélection d'une ligne
         self.animaux_table.bind("<ButtonRelease-1>", self.select_animal)
 
-        # Charger les données
-        self.refresh_animaux()
+        # Liste virtuelle : les animaux sont chargés page par page (tri: ID, ou colonne du filtre).
+        # L'ID du propriétaire est chargé avec la ligne mais n'est pas affiché.
+        self.animaux_view = VirtualTreeview(self.animaux_table, scroll,
+                                            self.repos.animaux.page_rows,
+                                            key=lambda a: a[0],
+                                            values=lambda a: a[:7],
+                                            submit=self.executor.submit,
+                                            tag="refresh_animaux")
 
     def setup_veterinaires_tab(self):
         # Frame pour les entrées
@@ -319,8 +507,19 @@ class ClinicVeterinaireApp:
         self.vet_email = ttk.Entry(frame_inputs, width=30)
         self.vet_email.grid(row=1, column=3, padx=5, pady=5)
 
+        # Départ d'un vétérinaire : ses consultations sont réaffectées au remplaçant
+        ttk.Label(frame_inputs, text="Remplaçant:").grid(row=2, column=0, sticky="w", padx=5, pady=5)
+        self.vet_remplacant = SearchCombobox(frame_inputs, self.repos.veterinaires.search,
+                                             submit=self.executor.submit,
+                                             tag="update_remplacant_combobox", width=28)
+        self.vet_remplacant.grid(row=2, column=1, padx=5, pady=5)
+        ttk.Button(frame_inputs, text="Réaffecter et retirer",
+                   command=self.retire_veterinaire).grid(row=2, column=2, sticky="w", padx=5, pady=5)
+
         # Variable pour stocker l'ID du vétérinaire sélectionné
         self.current_vet_id = None
+        # Fenêtre de progression de la réaffectation en cours (une seule à la fois)
+        self.reassign_dialog = None
 
         # Boutons
         frame_buttons = ttk.Frame(self.tab_veterinaires)
@@ -336,6 +535,13 @@ class ClinicVeterinaireApp:
         frame_table = ttk.LabelFrame(self.tab_veterinaires, text="Liste des vétérinaires")
         frame_table.pack(fill="both", expand=True, padx=10, pady=10)
 
+        # Filtre par préfixe, sans accents ni casse (index de la colonne choisie)
+        self.veterinaires_filter = FilterBar(frame_table, list(self.repos.veterinaires.filters),
+                                       lambda champ, texte: self.apply_filter(self.veterinaires_view,
+                                                                              self.repos.veterinaires,
+                                                                              champ, texte))
+        self.veterinaires_filter.pack(fill="x", pady=(0, 5))
+
         # Tableau avec scrollbar
         scroll = ttk.Scrollbar(frame_table)
         scroll.pack(side=tk.RIGHT, fill=tk.Y)
@@ -364,8 +570,13 @@ class ClinicVeterinaireApp:
         # Bind pour la sélection d'une ligne
         self.veterinaires_table.bind("<ButtonRelease-1>", self.select_veterinaire)
 
-        # Charger les données
-        self.refresh_veterinaires()
+        # Liste virtuelle : les vétérinaires sont chargés page par page (tri: ID, ou colonne du filtre)
+        self.veterinaires_view = VirtualTreeview(self.veterinaires_table, scroll,
+                                                 self.repos.veterinaires.page_rows,
+                                                 key=lambda v: v[0],
+                                                 values=lambda v: v[:5],
+                                                 submit=self.executor.submit,
+                                                 tag="refresh_veterinaires")
 
     def setup_consultations_tab(self):
         # Frame pour les entrées
@@ -380,16 +591,18 @@ class ClinicVeterinaireApp:
         self.cons_date.insert(0, datetime.now().strftime("%Y-%m-%d"))
 
         ttk.Label(frame_inputs, text="Animal:").grid(row=0, column=2, sticky="w", padx=5, pady=5)
-        # Combobox pour sélectionner l'animal
-        self.cons_animal = ttk.Combobox(frame_inputs, width=28)
+        # Combobox de recherche pour sélectionner l'animal
+        self.cons_animal = SearchCombobox(frame_inputs, self.repos.animaux.search,
+                                          submit=self.executor.submit,
+                                          tag="update_animaux_combobox", width=28)
         self.cons_animal.grid(row=0, column=3, padx=5, pady=5)
-        self.update_animaux_combobox()
 
         ttk.Label(frame_inputs, text="Vétérinaire:").grid(row=1, column=0, sticky="w", padx=5, pady=5)
-        # Combobox pour sélectionner le vétérinaire
-        self.cons_veterinaire = ttk.Combobox(frame_inputs, width=28)
+        # Combobox de recherche pour sélectionner le vétérinaire
+        self.cons_veterinaire = SearchCombobox(frame_inputs, self.repos.veterinaires.search,
+                                               submit=self.executor.submit,
+                                               tag="update_veterinaires_combobox", width=28)
         self.cons_veterinaire.grid(row=1, column=1, padx=5, pady=5)
-        self.update_veterinaires_combobox()
 
         ttk.Label(frame_inputs, text="Diagnostic:").grid(row=2, column=0, sticky="w", padx=5, pady=5)
         self.cons_diagnostic = tk.Text(frame_inputs, width=50, height=4)
@@ -416,11 +629,48 @@ class ClinicVeterinaireApp:
         frame_table = ttk.LabelFrame(self.tab_consultations, text="Liste des consultations")
         frame_table.pack(fill="both", expand=True, padx=10, pady=10)
 
+        # Recherche plein texte dans les diagnostics et traitements
+        frame_search = ttk.Frame(frame_table)
+        frame_search.pack(fill="x", pady=(0, 5))
+        ttk.Label(frame_search, text="Rechercher (diagnostic, traitement):").pack(side=tk.LEFT, padx=5)
+        self.cons_search = ttk.Entry(frame_search, width=40)
+        self.cons_search.pack(side=tk.LEFT, padx=5)
+        self.cons_search.bind("<Return>", lambda event: self.search_consultations())
+        ttk.Button(frame_search, text="Rechercher", command=self.search_consultations).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_search, text="Effacer la recherche",
+                   command=self.clear_consultation_search).pack(side=tk.LEFT, padx=5)
+        self.cons_search_status = ttk.Label(frame_search, text="")
+        self.cons_search_status.pack(side=tk.LEFT, padx=5)
+
+        # Résultats de la recherche (affichés à la place de la liste, par pertinence)
+        self.cons_results_frame = ttk.Frame(frame_table)
+        results_scroll = ttk.Scrollbar(self.cons_results_frame)
+        results_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.cons_results_table = ttk.Treeview(self.cons_results_frame, yscrollcommand=results_scroll.set,
+                                               columns=("ID", "Date", "Animal", "Vétérinaire", "Diagnostic", "Traitement"),
+                                               show="headings")
+        self.cons_results_table.pack(fill="both", expand=True)
+        results_scroll.config(command=self.cons_results_table.yview)
+        for column, width in (("ID", 50), ("Date", 100), ("Animal", 150), ("Vétérinaire", 150),
+                              ("Diagnostic", 250), ("Traitement", 250)):
+            self.cons_results_table.heading(column, text=column)
+            self.cons_results_table.column(column, width=width)
+        self.cons_results_table.bind("<ButtonRelease-1>", self.select_consultation)
+
+        # Lignes complètes des résultats; les mots trouvés sont encadrés par « »
+        self.cons_results_view = TreeviewSync(self.cons_results_table,
+                                              values=lambda c: (*c[:4], c[9], c[10] or ""))
+        self.cons_search_active = False
+
+        # Liste des consultations
+        self.cons_list_frame = ttk.Frame(frame_table)
+        self.cons_list_frame.pack(fill="both", expand=True)
+
         # Tableau avec scrollbar
-        scroll = ttk.Scrollbar(frame_table)
+        scroll = ttk.Scrollbar(self.cons_list_frame)
         scroll.pack(side=tk.RIGHT, fill=tk.Y)
 
-        self.consultations_table = ttk.Treeview(frame_table, yscrollcommand=scroll.set,
+        self.consultations_table = ttk.Treeview(self.cons_list_frame, yscrollcommand=scroll.set,
                                                columns=("ID", "Date", "Animal", "Vétérinaire", "Diagnostic", "Traitement"),
                                                show="headings")
         self.consultations_table.pack(fill="both", expand=True)
@@ -446,8 +696,14 @@ class ClinicVeterinaireApp:
         # Bind pour la sélection d'une ligne
         self.consultations_table.bind("<ButtonRelease-1>", self.select_consultation)
 
-        # Charger les données
-        self.refresh_consultations()
+        # Liste virtuelle : les consultations sont chargées page par page (tri: date, ID).
+        # Les IDs de l'animal et du vétérinaire sont chargés avec la ligne mais ne sont pas affichés.
+        self.consultations_view = VirtualTreeview(self.consultations_table, scroll,
+                                                  self.repos.consultations.page_rows,
+                                                  key=lambda c: (c[1], c[0]),
+                                                  values=lambda c: c[:6],
+                                                  submit=self.executor.submit,
+                                                  tag="refresh_consultations")
 
     def setup_medicaments_tab(self):
         # Frame pour les entrées
@@ -484,6 +740,13 @@ class ClinicVeterinaireApp:
         frame_table = ttk.LabelFrame(self.tab_medicaments, text="Liste des médicaments")
         frame_table.pack(fill="both", expand=True, padx=10, pady=10)
 
+        # Filtre par préfixe, sans accents ni casse (index de la colonne choisie)
+        self.medicaments_filter = FilterBar(frame_table, list(self.repos.medicaments.filters),
+                                       lambda champ, texte: self.apply_filter(self.medicaments_view,
+                                                                              self.repos.medicaments,
+                                                                              champ, texte))
+        self.medicaments_filter.pack(fill="x", pady=(0, 5))
+
         # Tableau avec scrollbar
         scroll = ttk.Scrollbar(frame_table)
         scroll.pack(side=tk.RIGHT, fill=tk.Y)
@@ -510,8 +773,13 @@ class ClinicVeterinaireApp:
         # Bind pour la sélection d'une ligne
         self.medicaments_table.bind("<ButtonRelease-1>", self.select_medicament)
 
-        # Charger les données
-        self.refresh_medicaments()
+        # Liste virtuelle : les médicaments sont chargés page par page (tri: ID, ou colonne du filtre)
+        self.medicaments_view = VirtualTreeview(self.medicaments_table, scroll,
+                                                self.repos.medicaments.page_rows,
+                                                key=lambda m: m[0],
+                                                values=lambda m: m[:4],
+                                                submit=self.executor.submit,
+                                                tag="refresh_medicaments")
 
     def setup_ordonnances_tab(self):
         # Frame pour les entrées
@@ -520,20 +788,44 @@ class ClinicVeterinaireApp:
 
         # Champs de saisie
         ttk.Label(frame_inputs, text="Consultation:").grid(row=0, column=0, sticky="w", padx=5, pady=5)
-        # Combobox pour sélectionner la consultation
-        self.ord_consultation = ttk.Combobox(frame_inputs, width=28)
+        # Combobox de recherche pour sélectionner la consultation
+        self.ord_consultation = SearchCombobox(frame_inputs, self.repos.consultations.search,
+                                               submit=self.executor.submit,
+                                               tag="update_consultations_combobox", width=28)
         self.ord_consultation.grid(row=0, column=1, padx=5, pady=5)
-        self.update_consultations_combobox()
 
         ttk.Label(frame_inputs, text="Médicament:").grid(row=0, column=2, sticky="w", padx=5, pady=5)
-        # Combobox pour sélectionner le médicament
-        self.ord_medicament = ttk.Combobox(frame_inputs, width=28)
+        # Combobox de recherche pour sélectionner le médicament
+        self.ord_medicament = SearchCombobox(frame_inputs, self.repos.medicaments.search,
+                                             submit=self.executor.submit,
+                                             tag="update_medicaments_combobox", width=28)
         self.ord_medicament.grid(row=0, column=3, padx=5, pady=5)
-        self.update_medicaments_combobox()
 
         ttk.Label(frame_inputs, text="Quantité:").grid(row=1, column=0, sticky="w", padx=5, pady=5)
         self.ord_quantite = ttk.Entry(frame_inputs, width=30)
         self.ord_quantite.grid(row=1, column=1, padx=5, pady=5)
+        ttk.Button(frame_inputs, text="Ajouter à l'ordonnance",
+                   command=self.add_ordonnance_line).grid(row=1, column=3, sticky="w", padx=5, pady=5)
+
+        # Lignes de l'ordonnance en préparation : plusieurs médicaments pour la
+        # consultation choisie, enregistrés ensemble par "Enregistrer l'ordonnance"
+        self.ord_lignes_table = ttk.Treeview(frame_inputs, columns=("Médicament", "Quantité"),
+                                             show="headings", height=4)
+        self.ord_lignes_table.heading("Médicament", text="Médicament")
+        self.ord_lignes_table.heading("Quantité", text="Quantité")
+        self.ord_lignes_table.column("Médicament", width=300)
+        self.ord_lignes_table.column("Quantité", width=100)
+        self.ord_lignes_table.grid(row=2, column=0, columnspan=4, sticky="we", padx=5, pady=5)
+
+        frame_lignes = ttk.Frame(frame_inputs)
+        frame_lignes.grid(row=3, column=0, columnspan=4, sticky="w")
+        ttk.Button(frame_lignes, text="Retirer la ligne",
+                   command=self.remove_ordonnance_line).pack(side=tk.LEFT, padx=5, pady=5)
+        ttk.Button(frame_lignes, text="Enregistrer l'ordonnance",
+                   command=self.save_ordonnance).pack(side=tk.LEFT, padx=5, pady=5)
+
+        # Quantité de chaque médicament des lignes en préparation {id_medicament: quantité}
+        self.ord_lignes = {}
 
         # Variables pour stocker la consultation et le médicament sélectionnés
         self.current_ord_cons_id = None
@@ -581,71 +873,54 @@ class ClinicVeterinaireApp:
         # Bind pour la sélection d'une ligne
         self.ordonnances_table.bind("<ButtonRelease-1>", self.select_ordonnance)
 
-        # Charger les données
-        self.refresh_ordonnances()
+        # Liste virtuelle : les ordonnances sont chargées page par page
+        # (tri: date, ID consultation, ID médicament; l'ID du médicament et l'espèce ne sont pas affichés)
+        self.ordonnances_view = VirtualTreeview(self.ordonnances_table, scroll,
+                                                self.repos.ordonnances.page_rows,
+                                                key=lambda o: (o[1], o[0], o[5]),
+                                                iid=lambda o: f"{o[0]}-{o[5]}",
+                                                values=lambda o: o[:5],
+                                                submit=self.executor.submit,
+                                                tag="refresh_ordonnances")
+
+    def apply_filter(self, view, repository, champ, texte):
+        # Filtrer un tableau par préfixe (pagination sur l'index de la colonne du filtre),
+        # ou revenir à la liste complète quand le texte est vide
+        if texte:
+            view.set_source(lambda apres, limite: repository.filter_rows(champ, texte, apres, limite),
+                            key=lambda row: (row[-1], row[0]))
+        else:
+            view.set_source(repository.page_rows, key=lambda row: row[0])
 
     # Méthodes pour les propriétaires
     def refresh_proprietaires(self):
-        # Effacer le tableau
-        for i in self.proprietaires_table.get_children():
-            self.proprietaires_table.delete(i)
-
-        # Charger les données
-        conn = sqlite3.connect('clinique_veterinaire.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM Proprietaire")
-        proprietaires = cursor.fetchall()
-        conn.close()
-
-        # Remplir le tableau
-        for proprietaire in proprietaires:
-            self.proprietaires_table.insert("", "end", values=proprietaire)
+        # Onglet jamais ouvert : ses données seront chargées à sa première ouverture
+        if not self.is_loaded(self.tab_proprietaires):
+            return
+        # Relire les lignes chargées (avec le filtre en cours) et n'appliquer que les différences
+        self.proprietaires_view.refresh()
 
     def add_proprietaire(self):
         # Récupérer les valeurs
-        nom = self.prop_nom.get()
-        prenom = self.prop_prenom.get()
-        telephone = self.prop_telephone.get()
-        email = self.prop_email.get()
-        adresse = self.prop_adresse.get()
+        proprietaire = Proprietaire(nom=self.prop_nom.get(), prenom=self.prop_prenom.get(),
+                                    telephone=self.prop_telephone.get(), email=self.prop_email.get(),
+                                    adresse=self.prop_adresse.get())
 
-        # Vérifier que les champs obligatoires sont remplis
-        if not nom or not prenom or not telephone or not email:
-            messagebox.showerror("Erreur", "Veuillez remplir tous les champs obligatoires")
-            return
-
-        # Enregistrer dans la base de données
+        # Enregistrer dans la base de données (les champs obligatoires sont vérifiés par le dépôt)
         try:
-            conn = sqlite3.connect('clinique_veterinaire.db')
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO Proprietaire (nom, prenom, telephone, email, adresse)
-                VALUES (?, ?, ?, ?, ?)
-            """, (nom, prenom, telephone, email, adresse))
-
-            # Utilisation d'instruction TCL pour valider la transaction
-            conn.commit()
-            conn.close()
+            self.repos.proprietaires.create(proprietaire)
 
             messagebox.showinfo("Succès", "Propriétaire ajouté avec succès")
 
             # Effacer les champs
             self.clear_proprietaire_fields()
 
-            # Rafraîchir le tableau
-            self.refresh_proprietaires()
-
-            # Mettre à jour les combobox
-            self.update_proprietaires_combobox()
-
+        except ValidationError as e:
+            messagebox.showerror("Erreur", str(e))
         except sqlite3.IntegrityError:
             # Gestion des erreurs d'intégrité (téléphone ou email déjà existant)
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", "Le téléphone ou l'email existe déjà")
         except Exception as e:
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", f"Une erreur est survenue: {str(e)}")
 
     def update_proprietaire(self):
@@ -655,50 +930,25 @@ class ClinicVeterinaireApp:
             return
 
         # Récupérer les valeurs
-        nom = self.prop_nom.get()
-        prenom = self.prop_prenom.get()
-        telephone = self.prop_telephone.get()
-        email = self.prop_email.get()
-        adresse = self.prop_adresse.get()
-
-        # Vérifier que les champs obligatoires sont remplis
-        if not nom or not prenom or not telephone or not email:
-            messagebox.showerror("Erreur", "Veuillez remplir tous les champs obligatoires")
-            return
+        proprietaire = Proprietaire(nom=self.prop_nom.get(), prenom=self.prop_prenom.get(),
+                                    telephone=self.prop_telephone.get(), email=self.prop_email.get(),
+                                    adresse=self.prop_adresse.get(), id_proprietaire=self.current_prop_id)
 
         # Mettre à jour la base de données
         try:
-            conn = sqlite3.connect('clinique_veterinaire.db')
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE Proprietaire
-                SET nom = ?, prenom = ?, telephone = ?, email = ?, adresse = ?
-                WHERE id_proprietaire = ?
-            """, (nom, prenom, telephone, email, adresse, self.current_prop_id))
-
-            # Utilisation d'instruction TCL pour valider la transaction
-            conn.commit()
-            conn.close()
+            self.repos.proprietaires.update(proprietaire)
 
             messagebox.showinfo("Succès", "Propriétaire modifié avec succès")
 
             # Effacer les champs
             self.clear_proprietaire_fields()
 
-            # Rafraîchir le tableau
-            self.refresh_proprietaires()
-
-            # Mettre à jour les combobox
-            self.update_proprietaires_combobox()
-
+        except ValidationError as e:
+            messagebox.showerror("Erreur", str(e))
         except sqlite3.IntegrityError:
             # Gestion des erreurs d'intégrité (téléphone ou email déjà existant)
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", "Le téléphone ou l'email existe déjà")
         except Exception as e:
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", f"Une erreur est survenue: {str(e)}")
 
     def delete_proprietaire(self):
@@ -713,40 +963,22 @@ class ClinicVeterinaireApp:
 
         # Supprimer de la base de données
         try:
-            conn = sqlite3.connect('clinique_veterinaire.db')
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM Proprietaire WHERE id_proprietaire = ?", (self.current_prop_id,))
-
-            # Utilisation d'instruction TCL pour valider la transaction
-            conn.commit()
-            conn.close()
+            self.repos.proprietaires.delete(self.current_prop_id)
 
             messagebox.showinfo("Succès", "Propriétaire supprimé avec succès")
 
             # Effacer les champs
             self.clear_proprietaire_fields()
 
-            # Rafraîchir le tableau
-            self.refresh_proprietaires()
-
-            # Mettre à jour les combobox
-            self.update_proprietaires_combobox()
-
         except Exception as e:
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", f"Une erreur est survenue: {str(e)}")
 
     def select_proprietaire(self, event):
-        # Récupérer l'item sélectionné
-        selection = self.proprietaires_table.selection()
-        if not selection:
+        # Récupérer la ligne sélectionnée (conservée côté Python, sans requête)
+        values = self.proprietaires_view.selected_row()
+        if values is None:
             return
 
-        # Récupérer les valeurs
-        item = self.proprietaires_table.item(selection[0])
-        values = item['values']
-
         # Stocker l'ID
         self.current_prop_id = values[0]
 
@@ -779,40 +1011,18 @@ class ClinicVeterinaireApp:
         self.current_prop_id = None
 
     def update_proprietaires_combobox(self):
-        # Charger les propriétaires pour les combobox
-        conn = sqlite3.connect('clinique_veterinaire.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT id_proprietaire, nom, prenom FROM Proprietaire")
-        proprietaires = cursor.fetchall()
-        conn.close()
-
-        # Format: "ID - Nom Prénom"
-        proprietaires_values = [f"{p[0]} - {p[1]} {p[2]}" for p in proprietaires]
-
-        # Mettre à jour la combobox des propriétaires dans l'onglet Animaux
-        self.ani_proprietaire['values'] = proprietaires_values
+        # Relancer la recherche de la combobox des propriétaires (onglet Animaux)
+        if not self.is_loaded(self.tab_animaux):
+            return
+        self.ani_proprietaire.reload()
 
     # Méthodes pour les animaux
     def refresh_animaux(self):
-        # Effacer le tableau
-        for i in self.animaux_table.get_children():
-            self.animaux_table.delete(i)
-
-        # Charger les données
-        conn = sqlite3.connect('clinique_veterinaire.db')
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT a.id_animal, a.nom, a.espece, a.race, a.age, a.poids,
-                   p.nom || ' ' || p.prenom as proprietaire
-            FROM Animal a
-            LEFT JOIN Proprietaire p ON a.id_proprietaire = p.id_proprietaire
-        """)
-        animaux = cursor.fetchall()
-        conn.close()
-
-        # Remplir le tableau
-        for animal in animaux:
-            self.animaux_table.insert("", "end", values=animal)
+        # Onglet jamais ouvert : ses données seront chargées à sa première ouverture
+        if not self.is_loaded(self.tab_animaux):
+            return
+        # Relire les lignes chargées (avec le filtre en cours) et n'appliquer que les différences
+        self.animaux_view.refresh()
 
     def add_animal(self):
         # Récupérer les valeurs
@@ -823,18 +1033,12 @@ class ClinicVeterinaireApp:
         poids = self.ani_poids.get()
         proprietaire = self.ani_proprietaire.get()
 
-        # Vérifier que les champs obligatoires sont remplis
-        if not nom or not espece:
-            messagebox.showerror("Erreur", "Veuillez remplir tous les champs obligatoires")
-            return
-
-        # Extraire l'ID du propriétaire (format: "ID - Nom Prénom")
+        # Récupérer l'ID du propriétaire choisi dans la liste
         id_proprietaire = None
         if proprietaire:
-            try:
-                id_proprietaire = int(proprietaire.split(' - ')[0])
-            except:
-                messagebox.showerror("Erreur", "Format de propriétaire invalide")
+            id_proprietaire = self.ani_proprietaire.get_id()
+            if id_proprietaire is None:
+                messagebox.showerror("Erreur", "Veuillez choisir un propriétaire dans la liste")
                 return
 
         # Convertir les types
@@ -852,33 +1056,19 @@ class ClinicVeterinaireApp:
             messagebox.showerror("Erreur", "Format de l'âge ou du poids invalide")
             return
 
-        # Enregistrer dans la base de données
+        # Enregistrer dans la base de données (les champs obligatoires sont vérifiés par le dépôt)
         try:
-            conn = sqlite3.connect('clinique_veterinaire.db')
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO Animal (nom, espece, race, age, poids, id_proprietaire)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (nom, espece, race, age, poids, id_proprietaire))
-
-            # Utilisation d'instruction TCL pour valider la transaction
-            conn.commit()
-            conn.close()
+            self.repos.animaux.create(Animal(nom=nom, espece=espece, race=race, age=age, poids=poids,
+                                             id_proprietaire=id_proprietaire))
 
             messagebox.showinfo("Succès", "Animal ajouté avec succès")
 
             # Effacer les champs
             self.clear_animal_fields()
 
-            # Rafraîchir le tableau
-            self.refresh_animaux()
-
-            # Mettre à jour les combobox
-            self.update_animaux_combobox()
-
+        except ValidationError as e:
+            messagebox.showerror("Erreur", str(e))
         except Exception as e:
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", f"Une erreur est survenue: {str(e)}")
 
     def update_animal(self):
@@ -895,18 +1085,12 @@ class ClinicVeterinaireApp:
         poids = self.ani_poids.get()
         proprietaire = self.ani_proprietaire.get()
 
-        # Vérifier que les champs obligatoires sont remplis
-        if not nom or not espece:
-            messagebox.showerror("Erreur", "Veuillez remplir tous les champs obligatoires")
-            return
-
-        # Extraire l'ID du propriétaire (format: "ID - Nom Prénom")
+        # Récupérer l'ID du propriétaire choisi dans la liste
         id_proprietaire = None
         if proprietaire:
-            try:
-                id_proprietaire = int(proprietaire.split(' - ')[0])
-            except:
-                messagebox.showerror("Erreur", "Format de propriétaire invalide")
+            id_proprietaire = self.ani_proprietaire.get_id()
+            if id_proprietaire is None:
+                messagebox.showerror("Erreur", "Veuillez choisir un propriétaire dans la liste")
                 return
 
         # Convertir les types
@@ -926,32 +1110,17 @@ class ClinicVeterinaireApp:
 
         # Mettre à jour la base de données
         try:
-            conn = sqlite3.connect('clinique_veterinaire.db')
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE Animal
-                SET nom = ?, espece = ?, race = ?, age = ?, poids = ?, id_proprietaire = ?
-                WHERE id_animal = ?
-            """, (nom, espece, race, age, poids, id_proprietaire, self.current_ani_id))
-
-            # Utilisation d'instruction TCL pour valider la transaction
-            conn.commit()
-            conn.close()
+            self.repos.animaux.update(Animal(nom=nom, espece=espece, race=race, age=age, poids=poids,
+                                             id_proprietaire=id_proprietaire, id_animal=self.current_ani_id))
 
             messagebox.showinfo("Succès", "Animal modifié avec succès")
 
             # Effacer les champs
             self.clear_animal_fields()
 
-            # Rafraîchir le tableau
-            self.refresh_animaux()
-
-            # Mettre à jour les combobox
-            self.update_animaux_combobox()
-
+        except ValidationError as e:
+            messagebox.showerror("Erreur", str(e))
         except Exception as e:
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", f"Une erreur est survenue: {str(e)}")
 
     def delete_animal(self):
@@ -966,40 +1135,22 @@ class ClinicVeterinaireApp:
 
         # Supprimer de la base de données
         try:
-            conn = sqlite3.connect('clinique_veterinaire.db')
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM Animal WHERE id_animal = ?", (self.current_ani_id,))
-
-            # Utilisation d'instruction TCL pour valider la transaction
-            conn.commit()
-            conn.close()
+            self.repos.animaux.delete(self.current_ani_id)
 
             messagebox.showinfo("Succès", "Animal supprimé avec succès")
 
             # Effacer les champs
             self.clear_animal_fields()
 
-            # Rafraîchir le tableau
-            self.refresh_animaux()
-
-            # Mettre à jour les combobox
-            self.update_animaux_combobox()
-
         except Exception as e:
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", f"Une erreur est survenue: {str(e)}")
 
     def select_animal(self, event):
-        # Récupérer l'item sélectionné
-        selection = self.animaux_table.selection()
-        if not selection:
+        # Récupérer la ligne sélectionnée (conservée côté Python, sans requête)
+        values = self.animaux_view.selected_row()
+        if values is None:
             return
 
-        # Récupérer les valeurs
-        item = self.animaux_table.item(selection[0])
-        values = item['values']
-
         # Stocker l'ID
         self.current_ani_id = values[0]
 
@@ -1022,20 +1173,13 @@ class ClinicVeterinaireApp:
         if values[5]:
             self.ani_poids.insert(0, values[5])
 
-        # Sélectionner le propriétaire dans la combobox
-        if values[6]:
-            # Récupérer l'ID du propriétaire
-            conn = sqlite3.connect('clinique_veterinaire.db')
-            cursor = conn.cursor()
-            cursor.execute("SELECT id_proprietaire FROM Animal WHERE id_animal = ?", (self.current_ani_id,))
-            id_proprietaire = cursor.fetchone()[0]
-            conn.close()
-
-            # Trouver l'entrée correspondante dans la combobox
-            for i, prop in enumerate(self.ani_proprietaire['values']):
-                if prop.startswith(f"{id_proprietaire} - "):
-                    self.ani_proprietaire.current(i)
-                    break
+        # Sélectionner le propriétaire dans la combobox (ID chargé avec la ligne)
+        id_proprietaire = values[7]
+        if id_proprietaire is not None:
+            # Afficher le propriétaire dans la combobox (format: "ID - Nom Prénom")
+            self.ani_proprietaire.set_selection(id_proprietaire, f"{id_proprietaire} - {values[6]}")
+        else:
+            self.ani_proprietaire.clear()
 
     def clear_animal_fields(self):
         # Effacer les champs
@@ -1044,86 +1188,45 @@ class ClinicVeterinaireApp:
         self.ani_race.delete(0, tk.END)
         self.ani_age.delete(0, tk.END)
         self.ani_poids.delete(0, tk.END)
-        self.ani_proprietaire.set('')
+        self.ani_proprietaire.clear()
 
         # Réinitialiser l'ID sélectionné
         self.current_ani_id = None
 
     def update_animaux_combobox(self):
-        # Charger les animaux pour les combobox
-        conn = sqlite3.connect('clinique_veterinaire.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT id_animal, nom, espece FROM Animal")
-        animaux = cursor.fetchall()
-        conn.close()
-
-        # Format: "ID - Nom (Espèce)"
-        animaux_values = [f"{a[0]} - {a[1]} ({a[2]})" for a in animaux]
-
-        # Mettre à jour la combobox des animaux dans l'onglet Consultations
-        self.cons_animal['values'] = animaux_values
+        # Relancer la recherche de la combobox des animaux (onglet Consultations)
+        if not self.is_loaded(self.tab_consultations):
+            return
+        self.cons_animal.reload()
 
     # Méthodes pour les vétérinaires
     def refresh_veterinaires(self):
-        # Effacer le tableau
-        for i in self.veterinaires_table.get_children():
-            self.veterinaires_table.delete(i)
-
-        # Charger les données
-        conn = sqlite3.connect('clinique_veterinaire.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM Veterinaire")
-        veterinaires = cursor.fetchall()
-        conn.close()
-
-        # Remplir le tableau
-        for veterinaire in veterinaires:
-            self.veterinaires_table.insert("", "end", values=veterinaire)
+        # Onglet jamais ouvert : ses données seront chargées à sa première ouverture
+        if not self.is_loaded(self.tab_veterinaires):
+            return
+        # Relire les lignes chargées (avec le filtre en cours) et n'appliquer que les différences
+        self.veterinaires_view.refresh()
 
     def add_veterinaire(self):
         # Récupérer les valeurs
-        nom = self.vet_nom.get()
-        specialisation = self.vet_specialisation.get()
-        telephone = self.vet_telephone.get()
-        email = self.vet_email.get()
-
-        # Vérifier que les champs obligatoires sont remplis
-        if not nom or not telephone or not email:
-            messagebox.showerror("Erreur", "Veuillez remplir tous les champs obligatoires")
-            return
+        veterinaire = Veterinaire(nom=self.vet_nom.get(), specialisation=self.vet_specialisation.get(),
+                                  telephone=self.vet_telephone.get(), email=self.vet_email.get())
 
-        # Enregistrer dans la base de données
+        # Enregistrer dans la base de données (les champs obligatoires sont vérifiés par le dépôt)
         try:
-            conn = sqlite3.connect('clinique_veterinaire.db')
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO Veterinaire (nom, specialisation, telephone, email)
-                VALUES (?, ?, ?, ?)
-            """, (nom, specialisation, telephone, email))
-
-            # Utilisation d'instruction TCL pour valider la transaction
-            conn.commit()
-            conn.close()
+            self.repos.veterinaires.create(veterinaire)
 
             messagebox.showinfo("Succès", "Vétérinaire ajouté avec succès")
 
             # Effacer les champs
             self.clear_veterinaire_fields()
 
-            # Rafraîchir le tableau
-            self.refresh_veterinaires()
-
-            # Mettre à jour les combobox
-            self.update_veterinaires_combobox()
-
+        except ValidationError as e:
+            messagebox.showerror("Erreur", str(e))
         except sqlite3.IntegrityError:
             # Gestion des erreurs d'intégrité (téléphone ou email déjà existant)
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", "Le téléphone ou l'email existe déjà")
         except Exception as e:
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", f"Une erreur est survenue: {str(e)}")
 
     def update_veterinaire(self):
@@ -1133,49 +1236,25 @@ class ClinicVeterinaireApp:
             return
 
         # Récupérer les valeurs
-        nom = self.vet_nom.get()
-        specialisation = self.vet_specialisation.get()
-        telephone = self.vet_telephone.get()
-        email = self.vet_email.get()
-
-        # Vérifier que les champs obligatoires sont remplis
-        if not nom or not telephone or not email:
-            messagebox.showerror("Erreur", "Veuillez remplir tous les champs obligatoires")
-            return
+        veterinaire = Veterinaire(nom=self.vet_nom.get(), specialisation=self.vet_specialisation.get(),
+                                  telephone=self.vet_telephone.get(), email=self.vet_email.get(),
+                                  id_veterinaire=self.current_vet_id)
 
         # Mettre à jour la base de données
         try:
-            conn = sqlite3.connect('clinique_veterinaire.db')
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE Veterinaire
-                SET nom = ?, specialisation = ?, telephone = ?, email = ?
-                WHERE id_veterinaire = ?
-            """, (nom, specialisation, telephone, email, self.current_vet_id))
-
-            # Utilisation d'instruction TCL pour valider la transaction
-            conn.commit()
-            conn.close()
+            self.repos.veterinaires.update(veterinaire)
 
             messagebox.showinfo("Succès", "Vétérinaire modifié avec succès")
 
             # Effacer les champs
             self.clear_veterinaire_fields()
 
-            # Rafraîchir le tableau
-            self.refresh_veterinaires()
-
-            # Mettre à jour les combobox
-            self.update_veterinaires_combobox()
-
+        except ValidationError as e:
+            messagebox.showerror("Erreur", str(e))
         except sqlite3.IntegrityError:
             # Gestion des erreurs d'intégrité (téléphone ou email déjà existant)
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", "Le téléphone ou l'email existe déjà")
         except Exception as e:
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", f"Une erreur est survenue: {str(e)}")
 
     def delete_veterinaire(self):
@@ -1190,55 +1269,103 @@ class ClinicVeterinaireApp:
 
         # Supprimer de la base de données
         try:
-            conn = sqlite3.connect('clinique_veterinaire.db')
-            cursor = conn.cursor()
             # Vérifier s'il y a des consultations associées
-            cursor.execute("SELECT COUNT(*) FROM Consultation WHERE id_veterinaire = ?", (self.current_vet_id,))
-            count = cursor.fetchone()[0]
+            count = self.repos.veterinaires.count_consultations(self.current_vet_id)
 
             if count > 0:
                 # Il y a des consultations, demander confirmation
                 if not messagebox.askyesno("Confirmation", f"Ce vétérinaire a {count} consultation(s) associée(s). Voulez-vous vraiment le supprimer?"):
-                    conn.close()
                     return
 
-                # Supprimer les consultations associées
-                cursor.execute("DELETE FROM Consultation WHERE id_veterinaire = ?", (self.current_vet_id,))
-
-            # Supprimer le vétérinaire
-            cursor.execute("DELETE FROM Veterinaire WHERE id_veterinaire = ?", (self.current_vet_id,))
-
-            # Utilisation d'instruction TCL pour valider la transaction
-            conn.commit()
-            conn.close()
+            # Supprimer le vétérinaire et ses consultations
+            self.repos.veterinaires.delete_with_consultations(self.current_vet_id)
 
             messagebox.showinfo("Succès", "Vétérinaire supprimé avec succès")
 
             # Effacer les champs
             self.clear_veterinaire_fields()
 
-            # Rafraîchir les tableaux
-            self.refresh_veterinaires()
-            self.refresh_consultations()
+        except Exception as e:
+            messagebox.showerror("Erreur", f"Une erreur est survenue: {str(e)}")
 
-            # Mettre à jour les combobox
-            self.update_veterinaires_combobox()
-            self.update_consultations_combobox()
+    def retire_veterinaire(self):
+        # Départ d'un vétérinaire : réaffecter ses consultations au remplaçant choisi
+        # (historique médical conservé) puis le supprimer. La réaffectation se fait
+        # par tranches dans le thread de travail, avec une fenêtre de progression.
+        if self.current_vet_id is None:
+            messagebox.showerror("Erreur", "Veuillez sélectionner le vétérinaire qui part")
+            return
+        id_remplacant = self.vet_remplacant.get_id()
+        if id_remplacant is None:
+            messagebox.showerror("Erreur", "Veuillez choisir le remplaçant dans la liste")
+            return
+        if id_remplacant == self.current_vet_id:
+            messagebox.showerror("Erreur", "Le remplaçant doit être un autre vétérinaire")
+            return
+        if self.reassign_dialog is not None:
+            messagebox.showerror("Erreur", "Une réaffectation est déjà en cours")
+            return
 
+        try:
+            count = self.repos.veterinaires.count_consultations(self.current_vet_id)
         except Exception as e:
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", f"Une erreur est survenue: {str(e)}")
+            return
+        if not messagebox.askyesno("Confirmation", f"Réaffecter {count} consultation(s) à "
+                                                   f"{self.vet_remplacant.get()} puis supprimer ce vétérinaire?"):
+            return
 
-    def select_veterinaire(self, event):
-        # Récupérer l'item sélectionné
-        selection = self.veterinaires_table.selection()
-        if not selection:
+        self.reassign_dialog = ProgressDialog(self.root, "Réaffectation des consultations", count)
+        self.reassign_step(self.current_vet_id, id_remplacant, 0)
+
+    def _run_write(self, func):
+        # Écriture exécutée dans le thread de travail : toute erreur est retournée
+        # au lieu d'être levée, pour fermer la fenêtre de progression
+        def job():
+            try:
+                return func()
+            except Exception as e:
+                return e
+        return job
+
+    def reassign_step(self, id_veterinaire, id_remplacant, faites):
+        # Réaffecter la tranche suivante de consultations
+        self.executor.submit("reassign_consultations", self._run_write(
+            lambda: self.repos.veterinaires.reassign_consultations(id_veterinaire, id_remplacant)),
+            lambda count: self.on_reassigned(id_veterinaire, id_remplacant, faites, count))
+
+    def on_reassigned(self, id_veterinaire, id_remplacant, faites, count):
+        # Afficher l'avancement; passer à la tranche suivante, ou retirer le
+        # vétérinaire quand il ne lui reste plus de consultations
+        if isinstance(count, Exception):
+            self.on_retired(count)
+            return
+        faites += count
+        self.reassign_dialog.update(faites)
+        if count:
+            self.reassign_step(id_veterinaire, id_remplacant, faites)
+            return
+        self.reassign_dialog.update(faites, "Suppression du vétérinaire...")
+        self.executor.submit("retire_veterinaire", self._run_write(
+            lambda: self.repos.veterinaires.retire(id_veterinaire, id_remplacant)),
+            lambda resultat: self.on_retired(resultat, faites))
+
+    def on_retired(self, resultat, faites=0):
+        # Fermer la fenêtre de progression et afficher le résultat
+        self.reassign_dialog.close()
+        self.reassign_dialog = None
+        if isinstance(resultat, Exception):
+            messagebox.showerror("Erreur", f"Une erreur est survenue: {str(resultat)}")
             return
+        messagebox.showinfo("Succès", f"{faites} consultation(s) réaffectée(s), vétérinaire supprimé")
+        self.clear_veterinaire_fields()
+        self.vet_remplacant.clear()
 
-        # Récupérer les valeurs
-        item = self.veterinaires_table.item(selection[0])
-        values = item['values']
+    def select_veterinaire(self, event):
+        # Récupérer la ligne sélectionnée (conservée côté Python, sans requête)
+        values = self.veterinaires_view.selected_row()
+        if values is None:
+            return
 
         # Stocker l'ID
         self.current_vet_id = values[0]
@@ -1268,101 +1395,77 @@ class ClinicVeterinaireApp:
         self.current_vet_id = None
 
     def update_veterinaires_combobox(self):
-        # Charger les vétérinaires pour les combobox
-        conn = sqlite3.connect('clinique_veterinaire.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT id_veterinaire, nom, specialisation FROM Veterinaire")
-        veterinaires = cursor.fetchall()
-        conn.close()
-
-        # Format: "ID - Nom (Spécialisation)"
-        veterinaires_values = []
-        for v in veterinaires:
-            if v[2]:
-                veterinaires_values.append(f"{v[0]} - {v[1]} ({v[2]})")
-            else:
-                veterinaires_values.append(f"{v[0]} - {v[1]}")
+        # Relancer la recherche de la combobox des vétérinaires (onglet Consultations)
+        if not self.is_loaded(self.tab_consultations):
+            return
+        self.cons_veterinaire.reload()
 
-        # Mettre à jour la combobox des vétérinaires dans l'onglet Consultations
-        self.cons_veterinaire['values'] = veterinaires_values
+    def update_remplacant_combobox(self):
+        # Relancer la recherche de la combobox du remplaçant (onglet Vétérinaires)
+        if not self.is_loaded(self.tab_veterinaires):
+            return
+        self.vet_remplacant.reload()
 
     # Méthodes pour les consultations
     def refresh_consultations(self):
-        # Effacer le tableau
-        for i in self.consultations_table.get_children():
-            self.consultations_table.delete(i)
-
-        # Charger les données
-        conn = sqlite3.connect('clinique_veterinaire.db')
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT c.id_consultation, c.date,
-                   a.nom || ' (' || a.espece || ')' as animal,
-                   v.nom as veterinaire,
-                   c.diagnostic, c.traitement
-            FROM Consultation c
-            JOIN Animal a ON c.id_animal = a.id_animal
-            JOIN Veterinaire v ON c.id_veterinaire = v.id_veterinaire
-            ORDER BY c.date DESC
-        """)
-        consultations = cursor.fetchall()
-        conn.close()
-
-        # Remplir le tableau
-        for consultation in consultations:
-            self.consultations_table.insert("", "end", values=consultation)
-
-    def add_consultation(self):
-        # Récupérer les valeurs
-        date = self.cons_date.get()
-        animal = self.cons_animal.get()
-        veterinaire = self.cons_veterinaire.get()
-        diagnostic = self.cons_diagnostic.get("1.0", tk.END).strip()
-        traitement = self.cons_traitement.get("1.0", tk.END).strip()
-
-        # Vérifier que les champs obligatoires sont remplis
-        if not date or not animal or not veterinaire or not diagnostic:
-            messagebox.showerror("Erreur", "Veuillez remplir tous les champs obligatoires")
+        # Onglet jamais ouvert : ses données seront chargées à sa première ouverture
+        if not self.is_loaded(self.tab_consultations):
             return
-
-        # Extraire les IDs
-        try:
-            id_animal = int(animal.split(' - ')[0])
-            id_veterinaire = int(veterinaire.split(' - ')[0])
-        except:
-            messagebox.showerror("Erreur", "Format d'animal ou de vétérinaire invalide")
+        # Relire les lignes chargées et n'appliquer que les différences
+        self.consultations_view.refresh()
+        if self.cons_search_active:
+            self.search_consultations()
+
+    def search_consultations(self):
+        # Recherche plein texte (exécutée hors du thread de Tk)
+        texte = self.cons_search.get().strip()
+        if not texte:
+            self.clear_consultation_search()
             return
+        self.executor.submit("search_consultations",
+                             lambda: self.repos.consultations.search_text(texte, SEARCH_RESULTS),
+                             self.show_consultation_results)
+
+    def show_consultation_results(self, rows):
+        # Afficher les résultats à la place de la liste des consultations
+        if not self.cons_search_active:
+            self.cons_search_active = True
+            self.cons_list_frame.pack_forget()
+            self.cons_results_frame.pack(fill="both", expand=True)
+        self.cons_results_view.sync(rows)
+        self.cons_search_status.config(text=f"{len(rows)} résultat(s)" if len(rows) < SEARCH_RESULTS
+                                       else f"{SEARCH_RESULTS} premiers résultats")
+
+    def clear_consultation_search(self):
+        # Revenir à la liste des consultations
+        self.cons_search.delete(0, tk.END)
+        self.cons_search_status.config(text="")
+        if self.cons_search_active:
+            self.cons_search_active = False
+            self.cons_results_frame.pack_forget()
+            self.cons_list_frame.pack(fill="both", expand=True)
+            self.cons_results_view.clear()
 
-        # Enregistrer dans la base de données
+    def add_consultation(self):
+        # Récupérer les valeurs (IDs choisis dans les listes)
+        consultation = Consultation(date=self.cons_date.get(),
+                                    diagnostic=self.cons_diagnostic.get("1.0", tk.END).strip(),
+                                    traitement=self.cons_traitement.get("1.0", tk.END).strip(),
+                                    id_animal=self.cons_animal.get_id(),
+                                    id_veterinaire=self.cons_veterinaire.get_id())
+
+        # Enregistrer dans la base de données (les champs obligatoires sont vérifiés par le dépôt)
         try:
-            conn = sqlite3.connect('clinique_veterinaire.db')
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO Consultation (date, diagnostic, traitement, id_animal, id_veterinaire)
-                VALUES (?, ?, ?, ?, ?)
-            """, (date, diagnostic, traitement, id_animal, id_veterinaire))
-
-            # Récupérer l'ID de la consultation ajoutée
-            id_consultation = cursor.lastrowid
-
-            # Utilisation d'instruction TCL pour valider la transaction
-            conn.commit()
-            conn.close()
+            self.repos.consultations.create(consultation)
 
             messagebox.showinfo("Succès", "Consultation ajoutée avec succès")
 
             # Effacer les champs
             self.clear_consultation_fields()
 
-            # Rafraîchir le tableau
-            self.refresh_consultations()
-
-            # Mettre à jour les combobox
-            self.update_consultations_combobox()
-
+        except ValidationError as e:
+            messagebox.showerror("Erreur", str(e))
         except Exception as e:
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", f"Une erreur est survenue: {str(e)}")
 
     def update_consultation(self):
@@ -1371,54 +1474,26 @@ class ClinicVeterinaireApp:
             messagebox.showerror("Erreur", "Veuillez sélectionner une consultation à modifier")
             return
 
-        # Récupérer les valeurs
-        date = self.cons_date.get()
-        animal = self.cons_animal.get()
-        veterinaire = self.cons_veterinaire.get()
-        diagnostic = self.cons_diagnostic.get("1.0", tk.END).strip()
-        traitement = self.cons_traitement.get("1.0", tk.END).strip()
-
-        # Vérifier que les champs obligatoires sont remplis
-        if not date or not animal or not veterinaire or not diagnostic:
-            messagebox.showerror("Erreur", "Veuillez remplir tous les champs obligatoires")
-            return
-
-        # Extraire les IDs
-        try:
-            id_animal = int(animal.split(' - ')[0])
-            id_veterinaire = int(veterinaire.split(' - ')[0])
-        except:
-            messagebox.showerror("Erreur", "Format d'animal ou de vétérinaire invalide")
-            return
+        # Récupérer les valeurs (IDs choisis dans les listes)
+        consultation = Consultation(date=self.cons_date.get(),
+                                    diagnostic=self.cons_diagnostic.get("1.0", tk.END).strip(),
+                                    traitement=self.cons_traitement.get("1.0", tk.END).strip(),
+                                    id_animal=self.cons_animal.get_id(),
+                                    id_veterinaire=self.cons_veterinaire.get_id())
+        consultation.id_consultation = self.current_cons_id
 
         # Mettre à jour la base de données
         try:
-            conn = sqlite3.connect('clinique_veterinaire.db')
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE Consultation
-                SET date = ?, diagnostic = ?, traitement = ?, id_animal = ?, id_veterinaire = ?
-                WHERE id_consultation = ?
-            """, (date, diagnostic, traitement, id_animal, id_veterinaire, self.current_cons_id))
-
-            # Utilisation d'instruction TCL pour valider la transaction
-            conn.commit()
-            conn.close()
+            self.repos.consultations.update(consultation)
 
             messagebox.showinfo("Succès", "Consultation modifiée avec succès")
 
             # Effacer les champs
             self.clear_consultation_fields()
 
-            # Rafraîchir le tableau
-            self.refresh_consultations()
-
-            # Mettre à jour les combobox
-            self.update_consultations_combobox()
-
+        except ValidationError as e:
+            messagebox.showerror("Erreur", str(e))
         except Exception as e:
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", f"Une erreur est survenue: {str(e)}")
 
     def delete_consultation(self):
@@ -1433,41 +1508,24 @@ class ClinicVeterinaireApp:
 
         # Supprimer de la base de données
         try:
-            conn = sqlite3.connect('clinique_veterinaire.db')
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM Consultation WHERE id_consultation = ?", (self.current_cons_id,))
-
-            # Utilisation d'instruction TCL pour valider la transaction
-            conn.commit()
-            conn.close()
+            self.repos.consultations.delete(self.current_cons_id)
 
             messagebox.showinfo("Succès", "Consultation supprimée avec succès")
 
             # Effacer les champs
             self.clear_consultation_fields()
 
-            # Rafraîchir les tableaux
-            self.refresh_consultations()
-            self.refresh_ordonnances()
-
-            # Mettre à jour les combobox
-            self.update_consultations_combobox()
-
         except Exception as e:
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", f"Une erreur est survenue: {str(e)}")
 
     def select_consultation(self, event):
-        # Récupérer l'item sélectionné
-        selection = self.consultations_table.selection()
-        if not selection:
+        # Récupérer la ligne sélectionnée (conservée côté Python, sans requête)
+        # dans la liste ou dans les résultats de la recherche
+        view = self.cons_results_view if self.cons_search_active else self.consultations_view
+        values = view.selected_row()
+        if values is None:
             return
 
-        # Récupérer les valeurs
-        item = self.consultations_table.item(selection[0])
-        values = item['values']
-
         # Stocker l'ID
         self.current_cons_id = values[0]
 
@@ -1475,24 +1533,14 @@ class ClinicVeterinaireApp:
         self.cons_date.delete(0, tk.END)
         self.cons_date.insert(0, values[1])
 
-        # Récupérer les IDs pour les combobox
-        conn = sqlite3.connect('clinique_veterinaire.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT id_animal, id_veterinaire FROM Consultation WHERE id_consultation = ?", (self.current_cons_id,))
-        id_animal, id_veterinaire = cursor.fetchone()
-        conn.close()
-
-        # Sélectionner l'animal dans la combobox
-        for i, ani in enumerate(self.cons_animal['values']):
-            if ani.startswith(f"{id_animal} - "):
-                self.cons_animal.current(i)
-                break
-
-        # Sélectionner le vétérinaire dans la combobox
-        for i, vet in enumerate(self.cons_veterinaire['values']):
-            if vet.startswith(f"{id_veterinaire} - "):
-                self.cons_veterinaire.current(i)
-                break
+        # IDs de l'animal et du vétérinaire (chargés avec la ligne)
+        id_animal, id_veterinaire, specialisation = values[6], values[7], values[8]
+
+        # Afficher l'animal dans la combobox (format: "ID - Nom (Espèce)")
+        self.cons_animal.set_selection(id_animal, f"{id_animal} - {values[2]}")
+
+        # Afficher le vétérinaire dans la combobox (format: "ID - Nom (Spécialisation)")
+        self.cons_veterinaire.set_selection(id_veterinaire, veterinaire_label(id_veterinaire, values[3], specialisation))
 
         # Remplir les champs de texte
         self.cons_diagnostic.delete("1.0", tk.END)
@@ -1508,8 +1556,8 @@ class ClinicVeterinaireApp:
         self.cons_date.insert(0, datetime.now().strftime("%Y-%m-%d"))
 
         # Effacer les combobox
-        self.cons_animal.set('')
-        self.cons_veterinaire.set('')
+        self.cons_animal.clear()
+        self.cons_veterinaire.clear()
 
         # Effacer les champs de texte
         self.cons_diagnostic.delete("1.0", tk.END)
@@ -1519,79 +1567,37 @@ class ClinicVeterinaireApp:
         self.current_cons_id = None
 
     def update_consultations_combobox(self):
-        # Charger les consultations pour les combobox
-        conn = sqlite3.connect('clinique_veterinaire.db')
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT c.id_consultation, c.date, a.nom, a.espece
-            FROM Consultation c
-            JOIN Animal a ON c.id_animal = a.id_animal
-            ORDER BY c.date DESC
-        """)
-        consultations = cursor.fetchall()
-        conn.close()
-
-        # Format: "ID - Date - Animal (Espèce)"
-        consultations_values = [f"{c[0]} - {c[1]} - {c[2]} ({c[3]})" for c in consultations]
-
-        # Mettre à jour la combobox des consultations dans l'onglet Ordonnances
-        self.ord_consultation['values'] = consultations_values
+        # Relancer la recherche de la combobox des consultations (onglet Ordonnances)
+        if not self.is_loaded(self.tab_ordonnances):
+            return
+        self.ord_consultation.reload()
 
     # Méthodes pour les médicaments
     def refresh_medicaments(self):
-        # Effacer le tableau
-        for i in self.medicaments_table.get_children():
-            self.medicaments_table.delete(i)
-
-        # Charger les données
-        conn = sqlite3.connect('clinique_veterinaire.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM Medicament")
-        medicaments = cursor.fetchall()
-        conn.close()
-
-        # Remplir le tableau
-        for medicament in medicaments:
-            self.medicaments_table.insert("", "end", values=medicament)
+        # Onglet jamais ouvert : ses données seront chargées à sa première ouverture
+        if not self.is_loaded(self.tab_medicaments):
+            return
+        # Relire les lignes chargées (avec le filtre en cours) et n'appliquer que les différences
+        self.medicaments_view.refresh()
 
     def add_medicament(self):
         # Récupérer les valeurs
-        nom = self.med_nom.get()
-        description = self.med_description.get("1.0", tk.END).strip()
-        posologie = self.med_posologie.get("1.0", tk.END).strip()
+        medicament = Medicament(nom=self.med_nom.get(),
+                                description=self.med_description.get("1.0", tk.END).strip(),
+                                posologie=self.med_posologie.get("1.0", tk.END).strip())
 
-        # Vérifier que les champs obligatoires sont remplis
-        if not nom:
-            messagebox.showerror("Erreur", "Veuillez remplir le nom du médicament")
-            return
-
-        # Enregistrer dans la base de données
+        # Enregistrer dans la base de données (le nom est vérifié par le dépôt)
         try:
-            conn = sqlite3.connect('clinique_veterinaire.db')
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO Medicament (nom, description, posologie)
-                VALUES (?, ?, ?)
-            """, (nom, description, posologie))
-
-            # Utilisation d'instruction TCL pour valider la transaction
-            conn.commit()
-            conn.close()
+            self.repos.medicaments.create(medicament)
 
             messagebox.showinfo("Succès", "Médicament ajouté avec succès")
 
             # Effacer les champs
             self.clear_medicament_fields()
 
-            # Rafraîchir le tableau
-            self.refresh_medicaments()
-
-            # Mettre à jour les combobox
-            self.update_medicaments_combobox()
-
+        except ValidationError as e:
+            messagebox.showerror("Erreur", str(e))
         except Exception as e:
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", f"Une erreur est survenue: {str(e)}")
 
     def update_medicament(self):
@@ -1601,43 +1607,23 @@ class ClinicVeterinaireApp:
             return
 
         # Récupérer les valeurs
-        nom = self.med_nom.get()
-        description = self.med_description.get("1.0", tk.END).strip()
-        posologie = self.med_posologie.get("1.0", tk.END).strip()
-
-        # Vérifier que les champs obligatoires sont remplis
-        if not nom:
-            messagebox.showerror("Erreur", "Veuillez remplir le nom du médicament")
-            return
+        medicament = Medicament(nom=self.med_nom.get(),
+                                description=self.med_description.get("1.0", tk.END).strip(),
+                                posologie=self.med_posologie.get("1.0", tk.END).strip(),
+                                id_medicament=self.current_med_id)
 
         # Mettre à jour la base de données
         try:
-            conn = sqlite3.connect('clinique_veterinaire.db')
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE Medicament
-                SET nom = ?, description = ?, posologie = ?
-                WHERE id_medicament = ?
-            """, (nom, description, posologie, self.current_med_id))
-
-            # Utilisation d'instruction TCL pour valider la transaction
-            conn.commit()
-            conn.close()
+            self.repos.medicaments.update(medicament)
 
             messagebox.showinfo("Succès", "Médicament modifié avec succès")
 
             # Effacer les champs
             self.clear_medicament_fields()
 
-            # Rafraîchir le tableau
-            self.refresh_medicaments()
-
-            # Mettre à jour les combobox
-            self.update_medicaments_combobox()
-
+        except ValidationError as e:
+            messagebox.showerror("Erreur", str(e))
         except Exception as e:
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", f"Une erreur est survenue: {str(e)}")
 
     def delete_medicament(self):
@@ -1652,52 +1638,31 @@ class ClinicVeterinaireApp:
 
         # Supprimer de la base de données
         try:
-            conn = sqlite3.connect('clinique_veterinaire.db')
-            cursor = conn.cursor()
             # Vérifier s'il y a des ordonnances associées
-            cursor.execute("SELECT COUNT(*) FROM Ordonnance WHERE id_medicament = ?", (self.current_med_id,))
-            count = cursor.fetchone()[0]
+            count = self.repos.medicaments.count_ordonnances(self.current_med_id)
 
             if count > 0:
                 # Il y a des ordonnances, demander confirmation
                 if not messagebox.askyesno("Confirmation", f"Ce médicament est présent dans {count} ordonnance(s). Voulez-vous vraiment le supprimer?"):
-                    conn.close()
                     return
 
             # Supprimer le médicament
-            cursor.execute("DELETE FROM Medicament WHERE id_medicament = ?", (self.current_med_id,))
-
-            # Utilisation d'instruction TCL pour valider la transaction
-            conn.commit()
-            conn.close()
+            self.repos.medicaments.delete(self.current_med_id)
 
             messagebox.showinfo("Succès", "Médicament supprimé avec succès")
 
             # Effacer les champs
             self.clear_medicament_fields()
 
-            # Rafraîchir les tableaux
-            self.refresh_medicaments()
-            self.refresh_ordonnances()
-
-            # Mettre à jour les combobox
-            self.update_medicaments_combobox()
-
         except Exception as e:
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", f"Une erreur est survenue: {str(e)}")
 
     def select_medicament(self, event):
-        # Récupérer l'item sélectionné
-        selection = self.medicaments_table.selection()
-        if not selection:
+        # Récupérer la ligne sélectionnée (conservée côté Python, sans requête)
+        values = self.medicaments_view.selected_row()
+        if values is None:
             return
 
-        # Récupérer les valeurs
-        item = self.medicaments_table.item(selection[0])
-        values = item['values']
-
         # Stocker l'ID
         self.current_med_id = values[0]
 
@@ -1723,42 +1688,18 @@ class ClinicVeterinaireApp:
         self.current_med_id = None
 
     def update_medicaments_combobox(self):
-        # Charger les médicaments pour les combobox
-        conn = sqlite3.connect('clinique_veterinaire.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT id_medicament, nom FROM Medicament")
-        medicaments = cursor.fetchall()
-        conn.close()
-
-        # Format: "ID - Nom"
-        medicaments_values = [f"{m[0]} - {m[1]}" for m in medicaments]
-
-        # Mettre à jour la combobox des médicaments dans l'onglet Ordonnances
-        self.ord_medicament['values'] = medicaments_values
+        # Relancer la recherche de la combobox des médicaments (onglet Ordonnances)
+        if not self.is_loaded(self.tab_ordonnances):
+            return
+        self.ord_medicament.reload()
 
     # Méthodes pour les ordonnances
     def refresh_ordonnances(self):
-        # Effacer le tableau
-        for i in self.ordonnances_table.get_children():
-            self.ordonnances_table.delete(i)
-
-        # Charger les données
-        conn = sqlite3.connect('clinique_veterinaire.db')
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT o.id_consultation, c.date, a.nom, m.nom, o.quantite
-            FROM Ordonnance o
-            JOIN Consultation c ON o.id_consultation = c.id_consultation
-            JOIN Animal a ON c.id_animal = a.id_animal
-            JOIN Medicament m ON o.id_medicament = m.id_medicament
-            ORDER BY c.date DESC
-        """)
-        ordonnances = cursor.fetchall()
-        conn.close()
-
-        # Remplir le tableau
-        for ordonnance in ordonnances:
-            self.ordonnances_table.insert("", "end", values=ordonnance)
+        # Onglet jamais ouvert : ses données seront chargées à sa première ouverture
+        if not self.is_loaded(self.tab_ordonnances):
+            return
+        # Relire les lignes chargées et n'appliquer que les différences
+        self.ordonnances_view.refresh()
 
     def add_ordonnance(self):
         # Récupérer les valeurs
@@ -1771,65 +1712,113 @@ class ClinicVeterinaireApp:
             messagebox.showerror("Erreur", "Veuillez remplir tous les champs")
             return
 
-        # Extraire les IDs
+        # Convertir la quantité
         try:
-            id_consultation = int(consultation.split(' - ')[0])
-            id_medicament = int(medicament.split(' - ')[0])
             quantite = int(quantite)
-
-            if quantite <= 0:
-                messagebox.showerror("Erreur", "La quantité doit être supérieure à 0")
-                return
         except:
-            messagebox.showerror("Erreur", "Format de consultation, de médicament ou de quantité invalide")
+            messagebox.showerror("Erreur", "Format de quantité invalide")
             return
 
+        # IDs choisis dans les listes (la quantité et les IDs sont vérifiés par le dépôt)
+        ordonnance = Ordonnance(id_consultation=self.ord_consultation.get_id(),
+                                id_medicament=self.ord_medicament.get_id(),
+                                quantite=quantite)
+
         # Enregistrer dans la base de données
         try:
-            conn = sqlite3.connect('clinique_veterinaire.db')
-            cursor = conn.cursor()
+            self.repos.ordonnances.validate(ordonnance)
 
             # Vérifier si l'ordonnance existe déjà
-            cursor.execute("""
-                SELECT COUNT(*) FROM Ordonnance
-                WHERE id_consultation = ? AND id_medicament = ?
-            """, (id_consultation, id_medicament))
-            count = cursor.fetchone()[0]
-
-            if count > 0:
+            if self.repos.ordonnances.exists(ordonnance.id_consultation, ordonnance.id_medicament):
                 # L'ordonnance existe déjà, demander confirmation pour la mise à jour
                 if not messagebox.askyesno("Confirmation", "Cette ordonnance existe déjà. Voulez-vous mettre à jour la quantité?"):
-                    conn.close()
                     return
 
-                # Mettre à jour l'ordonnance
-                cursor.execute("""
-                    UPDATE Ordonnance
-                    SET quantite = ?
-                    WHERE id_consultation = ? AND id_medicament = ?
-                """, (quantite, id_consultation, id_medicament))
-            else:
-                # Ajouter une nouvelle ordonnance
-                cursor.execute("""
-                    INSERT INTO Ordonnance (id_consultation, id_medicament, quantite)
-                    VALUES (?, ?, ?)
-                """, (id_consultation, id_medicament, quantite))
-
-            # Utilisation d'instruction TCL pour valider la transaction
-            conn.commit()
-            conn.close()
+            # Ajouter l'ordonnance ou mettre à jour sa quantité (une seule requête)
+            self.repos.ordonnances.upsert_many([ordonnance])
 
             messagebox.showinfo("Succès", "Ordonnance ajoutée avec succès")
 
             # Effacer les champs
             self.clear_ordonnance_fields()
 
-            # Rafraîchir le tableau
-            self.refresh_ordonnances()
+        except ValidationError as e:
+            messagebox.showerror("Erreur", str(e))
+        except Exception as e:
+            messagebox.showerror("Erreur", f"Une erreur est survenue: {str(e)}")
+
+    def add_ordonnance_line(self):
+        # Ajouter le médicament et la quantité saisis aux lignes de l'ordonnance
+        # en préparation (un médicament déjà présent voit sa quantité remplacée)
+        id_medicament = self.ord_medicament.get_id()
+        if id_medicament is None:
+            messagebox.showerror("Erreur", "Veuillez choisir un médicament dans la liste")
+            return
+
+        # Convertir la quantité
+        try:
+            quantite = int(self.ord_quantite.get())
+        except ValueError:
+            messagebox.showerror("Erreur", "Format de quantité invalide")
+            return
+        if quantite <= 0:
+            messagebox.showerror("Erreur", "La quantité doit être supérieure à 0")
+            return
+
+        iid = str(id_medicament)
+        if id_medicament in self.ord_lignes:
+            self.ord_lignes_table.item(iid, values=(self.ord_medicament.get(), quantite))
+        else:
+            self.ord_lignes_table.insert("", tk.END, iid=iid, values=(self.ord_medicament.get(), quantite))
+        self.ord_lignes[id_medicament] = quantite
+
+        # Préparer la saisie du médicament suivant
+        self.ord_medicament.clear()
+        self.ord_quantite.delete(0, tk.END)
+
+    def remove_ordonnance_line(self):
+        # Retirer les lignes sélectionnées de l'ordonnance en préparation
+        for iid in self.ord_lignes_table.selection():
+            self.ord_lignes_table.delete(iid)
+            self.ord_lignes.pop(int(iid), None)
+
+    def clear_ordonnance_lines(self):
+        # Vider l'ordonnance en préparation
+        self.ord_lignes_table.delete(*self.ord_lignes_table.get_children())
+        self.ord_lignes.clear()
+
+    def save_ordonnance(self):
+        # Enregistrer toutes les lignes de l'ordonnance en préparation pour la
+        # consultation choisie, en une seule transaction
+        id_consultation = self.ord_consultation.get_id()
+        if id_consultation is None:
+            messagebox.showerror("Erreur", "Veuillez choisir une consultation dans la liste")
+            return
+        if not self.ord_lignes:
+            messagebox.showerror("Erreur", "Veuillez ajouter au moins un médicament à l'ordonnance")
+            return
+
+        ordonnances = [Ordonnance(id_consultation=id_consultation, id_medicament=id_medicament, quantite=quantite)
+                       for id_medicament, quantite in self.ord_lignes.items()]
+        try:
+            # Médicaments déjà prescrits pour cette consultation (une seule requête)
+            existants = self.repos.ordonnances.existing(id_consultation, self.ord_lignes)
+            if existants and not messagebox.askyesno(
+                    "Confirmation", f"{len(existants)} médicament(s) déjà prescrit(s) pour cette consultation. "
+                                    "Voulez-vous mettre à jour les quantités?"):
+                return
+
+            count = self.repos.ordonnances.upsert_many(ordonnances)
 
+            messagebox.showinfo("Succès", f"Ordonnance enregistrée ({count} médicament(s))")
+
+            # Effacer les champs et les lignes
+            self.clear_ordonnance_fields()
+            self.clear_ordonnance_lines()
+
+        except ValidationError as e:
+            messagebox.showerror("Erreur", str(e))
         except Exception as e:
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", f"Une erreur est survenue: {str(e)}")
 
     def update_ordonnance(self):
@@ -1849,39 +1838,24 @@ class ClinicVeterinaireApp:
         # Convertir la quantité
         try:
             quantite = int(quantite)
-
-            if quantite <= 0:
-                messagebox.showerror("Erreur", "La quantité doit être supérieure à 0")
-                return
         except:
             messagebox.showerror("Erreur", "Format de quantité invalide")
             return
 
-        # Mettre à jour la base de données
+        # Mettre à jour la base de données (la quantité est vérifiée par le dépôt)
         try:
-            conn = sqlite3.connect('clinique_veterinaire.db')
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE Ordonnance
-                SET quantite = ?
-                WHERE id_consultation = ? AND id_medicament = ?
-            """, (quantite, self.current_ord_cons_id, self.current_ord_med_id))
-
-            # Utilisation d'instruction TCL pour valider la transaction
-            conn.commit()
-            conn.close()
+            self.repos.ordonnances.update(Ordonnance(id_consultation=self.current_ord_cons_id,
+                                                     id_medicament=self.current_ord_med_id,
+                                                     quantite=quantite))
 
             messagebox.showinfo("Succès", "Ordonnance modifiée avec succès")
 
             # Effacer les champs
             self.clear_ordonnance_fields()
 
-            # Rafraîchir le tableau
-            self.refresh_ordonnances()
-
+        except ValidationError as e:
+            messagebox.showerror("Erreur", str(e))
         except Exception as e:
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", f"Une erreur est survenue: {str(e)}")
 
     def delete_ordonnance(self):
@@ -1896,67 +1870,32 @@ class ClinicVeterinaireApp:
 
         # Supprimer de la base de données
         try:
-            conn = sqlite3.connect('clinique_veterinaire.db')
-            cursor = conn.cursor()
-            cursor.execute("""
-                DELETE FROM Ordonnance
-                WHERE id_consultation = ? AND id_medicament = ?
-            """, (self.current_ord_cons_id, self.current_ord_med_id))
-
-            # Utilisation d'instruction TCL pour valider la transaction
-            conn.commit()
-            conn.close()
+            self.repos.ordonnances.delete(self.current_ord_cons_id, self.current_ord_med_id)
 
             messagebox.showinfo("Succès", "Ordonnance supprimée avec succès")
 
             # Effacer les champs
             self.clear_ordonnance_fields()
 
-            # Rafraîchir le tableau
-            self.refresh_ordonnances()
-
         except Exception as e:
-            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
-            conn.close()
             messagebox.showerror("Erreur", f"Une erreur est survenue: {str(e)}")
 
     def select_ordonnance(self, event):
-        # Récupérer l'item sélectionné
-        selection = self.ordonnances_table.selection()
-        if not selection:
+        # Récupérer la ligne sélectionnée (conservée côté Python, sans requête)
+        values = self.ordonnances_view.selected_row()
+        if values is None:
             return
 
-        # Récupérer les valeurs
-        item = self.ordonnances_table.item(selection[0])
-        values = item['values']
-
-        # Stocker les IDs
+        # Stocker les IDs (l'ID du médicament est chargé avec la ligne)
         self.current_ord_cons_id = values[0]
+        self.current_ord_med_id = values[5]
+
+        # Afficher la consultation dans la combobox (format: "ID - Date - Animal (Espèce)")
+        self.ord_consultation.set_selection(self.current_ord_cons_id,
+                                            f"{self.current_ord_cons_id} - {values[1]} - {values[2]} ({values[6]})")
 
-        # Récupérer l'ID du médicament
-        conn = sqlite3.connect('clinique_veterinaire.db')
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id_medicament
-            FROM Ordonnance
-            WHERE id_consultation = ? AND id_medicament IN (
-                SELECT id_medicament FROM Medicament WHERE nom = ?
-            )
-        """, (self.current_ord_cons_id, values[3]))
-        self.current_ord_med_id = cursor.fetchone()[0]
-        conn.close()
-
-        # Sélectionner la consultation dans la combobox
-        for i, cons in enumerate(self.ord_consultation['values']):
-            if cons.startswith(f"{self.current_ord_cons_id} - "):
-                self.ord_consultation.current(i)
-                break
-
-        # Sélectionner le médicament dans la combobox
-        for i, med in enumerate(self.ord_medicament['values']):
-            if med.startswith(f"{self.current_ord_med_id} - "):
-                self.ord_medicament.current(i)
-                break
+        # Afficher le médicament dans la combobox (format: "ID - Nom")
+        self.ord_medicament.set_selection(self.current_ord_med_id, f"{self.current_ord_med_id} - {values[3]}")
 
         # Remplir le champ quantité
         self.ord_quantite.delete(0, tk.END)
@@ -1964,8 +1903,8 @@ class ClinicVeterinaireApp:
 
     def clear_ordonnance_fields(self):
         # Effacer les champs
-        self.ord_consultation.set('')
-        self.ord_medicament.set('')
+        self.ord_consultation.clear()
+        self.ord_medicament.clear()
         self.ord_quantite.delete(0, tk.END)
 
         # Réinitialiser les IDs sélectionnés
@@ -1975,6 +1914,11 @@ class ClinicVeterinaireApp:
 
 # Code principal
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gestion de clinique vétérinaire")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="afficher la durée des étapes du démarrage")
+    args = parser.parse_args()
+
     root = tk.Tk()
-    app = ClinicVeterinaireApp(root)
+    app = ClinicVeterinaireApp(root, profile_startup=args.profile_startup)
     root.mainloop()
@@ -0,0 +1,315 @@
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime
+
+from database import ConnectionManager, DB_PATH
+from generer_donnees import generate
+from migrations import migrate
+from repositories import Animal, Consultation, Medicament, Ordonnance, Proprietaire, Repositories, Veterinaire
+
+# Banc d'essai des chemins de l'application (rafraîchissements, combobox,
+# sélection, ajout/modification/suppression) pour plusieurs tailles de base.
+# Sans interface, la couche de données appelée par chaque méthode est mesurée;
+# avec --gui, l'application est lancée (fenêtre masquée) et les méthodes
+# refresh_*, update_*_combobox et select_* sont mesurées de bout en bout.
+# Les résultats sont écrits en JSON pour être comparés d'un commit à l'autre.
+
+SIZES = (1000, 100000, 1000000)
+REPETITIONS = 5
+
+# Seuil de régression : rapport maximal entre la médiane mesurée et celle de
+# référence, et écart minimal (en ms) pour qu'une différence soit prise en compte
+THRESHOLD = 1.5
+FLOOR_MS = 1.0
+
+
+def build_database(path, n, seed=1):
+    # Base de test de taille n (générateur de données) : n animaux et
+    # consultations, 1,5 n ordonnances, n/2 propriétaires, des vétérinaires
+    if os.path.exists(path):
+        # Base d'une exécution précédente : appliquer les migrations ajoutées depuis
+        conn = sqlite3.connect(path)
+        migrate(conn, verbose=False)
+        conn.close()
+        return
+    generate(path, proprietaires=max(1, n // 2), animaux=n, veterinaires=max(5, n // 10000), consultations=n,
+             ordonnances=n * 3 // 2, seed=seed, verbose=False)
+
+
+def measure(func, repetitions=REPETITIONS):
+    # Durées d'exécution de func (médiane, minimum et maximum en ms)
+    durations = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - debut) * 1000)
+    return {'median_ms': round(statistics.median(durations), 3),
+            'min_ms': round(min(durations), 3),
+            'max_ms': round(max(durations), 3)}
+
+
+def measure_crud(repo, make, change, delete_key, repetitions=REPETITIONS):
+    # Durées de l'ajout, de la modification et de la suppression d'une entité.
+    # make(i) crée une entité unique, change(entité) la modifie.
+    durations = {'add': [], 'update': [], 'delete': []}
+    for i in range(repetitions):
+        entity = make(i)
+        debut = time.perf_counter()
+        repo.create(entity)
+        durations['add'].append((time.perf_counter() - debut) * 1000)
+
+        change(entity)
+        debut = time.perf_counter()
+        repo.update(entity)
+        durations['update'].append((time.perf_counter() - debut) * 1000)
+
+        debut = time.perf_counter()
+        repo.delete(*delete_key(entity))
+        durations['delete'].append((time.perf_counter() - debut) * 1000)
+    return {step: {'median_ms': round(statistics.median(d), 3), 'min_ms': round(min(d), 3),
+                   'max_ms': round(max(d), 3)}
+            for step, d in durations.items()}
+
+
+def run_data_layer(path, repetitions=REPETITIONS):
+    # Couche de données appelée par chaque méthode de l'application
+    db = ConnectionManager(path)
+    repos = Repositories(db)
+    results = {}
+    try:
+        # Rafraîchissements (première page des listes virtuelles)
+        results['refresh_proprietaires'] = measure(lambda: repos.proprietaires.page_rows(None, 100), repetitions)
+        results['refresh_animaux'] = measure(lambda: repos.animaux.page_rows(None, 100), repetitions)
+        results['refresh_veterinaires'] = measure(lambda: repos.veterinaires.page_rows(None, 100), repetitions)
+        results['refresh_medicaments'] = measure(lambda: repos.medicaments.page_rows(None, 100), repetitions)
+        results['refresh_consultations'] = measure(lambda: repos.consultations.page_rows(None, 100), repetitions)
+        results['refresh_ordonnances'] = measure(lambda: repos.ordonnances.page_rows(None, 100), repetitions)
+
+        # Combobox de recherche : liste initiale (texte vide) et recherche par préfixe
+        for name, repo, prefixe in (('proprietaires', repos.proprietaires, 'Mar'),
+                                    ('animaux', repos.animaux, 'Ma'),
+                                    ('veterinaires', repos.veterinaires, 'Dr'),
+                                    ('consultations', repos.consultations, 'Ma'),
+                                    ('medicaments', repos.medicaments, 'Amox')):
+            results[f'update_{name}_combobox'] = measure(lambda: repo.search('', 50), repetitions)
+            results[f'update_{name}_combobox:prefixe'] = measure(lambda: repo.search(prefixe, 50), repetitions)
+
+        # Filtres des tableaux : première page d'un préfixe accentué (sans accents ni casse)
+        for name, repo, champ, prefixe in (('proprietaires', repos.proprietaires, 'Nom', 'Mé'),
+                                           ('proprietaires', repos.proprietaires, 'Prénom', 'HÉL'),
+                                           ('animaux', repos.animaux, 'Espèce', 'chat'),
+                                           ('veterinaires', repos.veterinaires, 'Nom', 'dr é'),
+                                           ('medicaments', repos.medicaments, 'Nom', 'amox')):
+            results[f'filter_{name}:{champ}'] = measure(lambda: repo.filter_rows(champ, prefixe, None, 100),
+                                                        repetitions)
+
+        # Recherche plein texte des consultations (mot fréquent et mot absent)
+        results['search_consultations'] = measure(lambda: repos.consultations.search_text('otite', 200),
+                                                  repetitions)
+        results['search_consultations:absent'] = measure(lambda: repos.consultations.search_text('zzz', 200),
+                                                         repetitions)
+
+        # Ajout, modification et suppression
+        suffixe = datetime.now().strftime('%H%M%S%f')
+
+        def proprietaire(i):
+            return Proprietaire("Banc", "Essai", f"bench-{suffixe}-{i}", f"bench-{suffixe}-{i}@exemple.fr")
+
+        def veterinaire(i):
+            return Veterinaire("Banc", f"bench-{suffixe}-{i}", f"bench-{suffixe}-{i}@exemple.fr")
+
+        def rename(entity):
+            entity.nom = entity.nom + " (modifié)"
+
+        def requantify(ordonnance):
+            ordonnance.quantite += 1
+
+        # Consultation et médicament temporaires pour les ordonnances
+        id_animal = repos.animaux.create(Animal("Banc", "Chien"))
+        id_veterinaire = repos.veterinaires.create(veterinaire('ordonnance'))
+        id_consultation = repos.consultations.create(Consultation(date.today().isoformat(), "Banc d'essai",
+                                                                  id_animal, id_veterinaire))
+        medicaments = [repos.medicaments.create(Medicament(f"Banc {i}")) for i in range(repetitions)]
+
+        cases = (
+            ('proprietaire', repos.proprietaires, proprietaire, rename, lambda p: (p.id_proprietaire,)),
+            ('animal', repos.animaux, lambda i: Animal("Banc", "Chat", age=i), rename, lambda a: (a.id_animal,)),
+            ('veterinaire', repos.veterinaires, veterinaire, rename, lambda v: (v.id_veterinaire,)),
+            ('consultation', repos.consultations,
+             lambda i: Consultation(date.today().isoformat(), "Banc d'essai", id_animal, id_veterinaire),
+             lambda c: setattr(c, 'diagnostic', "Banc d'essai (modifié)"), lambda c: (c.id_consultation,)),
+            ('medicament', repos.medicaments, lambda i: Medicament(f"Banc {suffixe} {i}"), rename,
+             lambda m: (m.id_medicament,)),
+            ('ordonnance', repos.ordonnances, lambda i: Ordonnance(id_consultation, medicaments[i], 1), requantify,
+             lambda o: (o.id_consultation, o.id_medicament)),
+        )
+        for name, repo, make, change, key in cases:
+            for step, result in measure_crud(repo, make, change, key, repetitions).items():
+                results[f'{step}_{name}'] = result
+
+        # Supprimer les données temporaires
+        for id_medicament in medicaments:
+            repos.medicaments.delete(id_medicament)
+        repos.veterinaires.delete_with_consultations(id_veterinaire)
+        repos.animaux.delete(id_animal)
+    finally:
+        db.close_all()
+    return results
+
+
+def run_gui(directory, repetitions=REPETITIONS):
+    # Application lancée avec la fenêtre masquée, sur la base du dossier "directory"
+    import tkinter as tk
+    from tkinter import messagebox
+
+    import app
+
+    # Les boîtes de dialogue ne doivent pas bloquer le banc d'essai
+    messagebox.showinfo = messagebox.showerror = lambda *args, **kwargs: None
+    messagebox.askyesno = lambda *args, **kwargs: True
+
+    cwd = os.getcwd()
+    os.chdir(directory)
+    root = tk.Tk()
+    root.withdraw()
+    results = {}
+    application = None
+    try:
+        application = app.ClinicVeterinaireApp(root)
+        application.executor.poll_interval = 1
+
+        # Charger tous les onglets (chargés sinon à leur première ouverture)
+        for tab in application.notebook.tabs():
+            application.load_tab(tab)
+
+        def wait():
+            # Attendre que les requêtes soumises soient terminées et affichées
+            while not application.executor.is_idle():
+                root.update()
+                time.sleep(0.0005)
+            root.update()
+
+        wait()
+
+        def refresh(method):
+            def run():
+                method()
+                wait()
+            return run
+
+        for name in ('proprietaires', 'animaux', 'veterinaires', 'consultations', 'medicaments', 'ordonnances'):
+            results[f'refresh_{name}'] = measure(refresh(getattr(application, f'refresh_{name}')), repetitions)
+        for name in ('proprietaires', 'animaux', 'veterinaires', 'consultations', 'medicaments'):
+            results[f'update_{name}_combobox'] = measure(
+                refresh(getattr(application, f'update_{name}_combobox')), repetitions)
+
+        # Sélection de la première ligne de chaque tableau
+        for table, view, handler in (
+                ('proprietaires', application.proprietaires_view, application.select_proprietaire),
+                ('animaux', application.animaux_view, application.select_animal),
+                ('veterinaires', application.veterinaires_view, application.select_veterinaire),
+                ('consultations', application.consultations_view, application.select_consultation),
+                ('medicaments', application.medicaments_view, application.select_medicament),
+                ('ordonnances', application.ordonnances_view, application.select_ordonnance)):
+            if view.order:
+                view.tree.selection_set(view.order[0])
+                results[f'select_{table}'] = measure(lambda: handler(None), repetitions)
+    finally:
+        if application is not None:
+            application.executor.stop()
+            application.db.close_all()
+        root.destroy()
+        os.chdir(cwd)
+    return results
+
+
+def compare(results, reference, threshold=THRESHOLD, floor_ms=FLOOR_MS):
+    # Régressions par rapport à une exécution de référence :
+    # [(mode, taille, cas, médiane de référence, médiane mesurée)]
+    regressions = []
+    for mode, sizes in results['results'].items():
+        for size, cases in sizes.items():
+            reference_cases = reference.get('results', {}).get(mode, {}).get(size, {})
+            for case, result in cases.items():
+                before = reference_cases.get(case)
+                if before is None:
+                    continue
+                after = result['median_ms']
+                if after > before['median_ms'] * threshold and after - before['median_ms'] > floor_ms:
+                    regressions.append((mode, size, case, before['median_ms'], after))
+    return regressions
+
+
+def git_commit():
+    # Commit mesuré (None hors d'un dépôt git)
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banc d'essai de l'application de la clinique")
+    parser.add_argument('--tailles', type=int, nargs='+', default=list(SIZES), help="tailles des bases de test")
+    parser.add_argument('--repetitions', type=int, default=REPETITIONS, help="nombre de mesures par cas")
+    parser.add_argument('--dossier', default='bases_benchmark',
+                        help="dossier des bases de test (conservées d'une exécution à l'autre)")
+    parser.add_argument('--gui', action='store_true', help="mesurer aussi l'application (fenêtre masquée)")
+    parser.add_argument('--sortie', default='benchmark.json', help="fichier JSON des résultats")
+    parser.add_argument('--reference', help="fichier JSON d'une exécution précédente à comparer")
+    parser.add_argument('--seuil', type=float, default=THRESHOLD,
+                        help="rapport maximal toléré entre la médiane mesurée et celle de référence")
+    parser.add_argument('--plancher', type=float, default=FLOOR_MS,
+                        help="écart minimal (ms) pour qu'une différence soit une régression")
+    args = parser.parse_args(argv)
+
+    results = {'commit': git_commit(), 'date': datetime.now().isoformat(timespec='seconds'),
+               'repetitions': args.repetitions, 'results': {'donnees': {}}}
+    if args.gui:
+        results['results']['gui'] = {}
+
+    for n in args.tailles:
+        directory = os.path.join(args.dossier, str(n))
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, DB_PATH)
+        debut = time.perf_counter()
+        build_database(path, n)
+        print(f"Base de {n} lignes prête en {time.perf_counter() - debut:.1f} s", file=sys.stderr)
+
+        results['results']['donnees'][str(n)] = run_data_layer(path, args.repetitions)
+        if args.gui:
+            results['results']['gui'][str(n)] = run_gui(directory, args.repetitions)
+
+    # Résumé
+    for mode, sizes in results['results'].items():
+        for size, cases in sizes.items():
+            print(f"[{mode}] {size} lignes")
+            for case, result in cases.items():
+                print(f"  {case:40} {result['median_ms']:10.3f} ms (min {result['min_ms']:.3f})")
+
+    with open(args.sortie, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"Résultats écrits dans {args.sortie}")
+
+    # Comparaison avec la référence : code de sortie 1 en cas de régression
+    if args.reference:
+        with open(args.reference, encoding='utf-8') as f:
+            reference = json.load(f)
+        regressions = compare(results, reference, args.seuil, args.plancher)
+        for mode, size, case, before, after in regressions:
+            print(f"Régression [{mode}] {size} lignes, {case}: {before:.3f} ms -> {after:.3f} ms "
+                  f"(x{after / before if before else float('inf'):.2f})")
+        if regressions:
+            sys.exit(1)
+        print(f"Aucune régression par rapport à {args.reference} (commit {reference.get('commit')})")
+
+
+if __name__ == "__main__":
+    main()
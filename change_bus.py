@@ -0,0 +1,83 @@
+import queue
+import threading
+
+# Bus des modifications : chaque écriture d'un dépôt publie « table modifiée (IDs) »
+# et les vues s'abonnent aux tables qu'elles affichent. Les publications sont
+# regroupées jusqu'au prochain passage de la boucle Tk au repos (after_idle) :
+# une rafale d'écritures ne relance qu'une fois chaque vue concernée.
+# Une écriture faite dans le thread de travail publie dans une file, relevée
+# par la boucle Tk toutes les poll_interval ms.
+
+
+class ChangeBus:
+    def __init__(self, root, cascades=None, poll_interval=50):
+        # cascades : {table parente: tables filles} (ConnectionManager.cascades),
+        # dont les lignes changent aussi quand une ligne parente est supprimée
+        self.root = root
+        self.cascades = cascades or {}
+        self.poll_interval = poll_interval
+        self._subscribers = []
+        # Publications pas encore regroupées (table, IDs, suppression), tous threads
+        self._queue = queue.SimpleQueue()
+        self._tk_thread = threading.get_ident()
+        # Modifications en attente : {table: ensemble des IDs, ou None si inconnus}
+        self._pending = {}
+        self._scheduled = False
+        self._poll_id = self.root.after(self.poll_interval, self._poll)
+
+    def subscribe(self, tables, callback):
+        # Appeler callback(modifications) une fois par rafale modifiant une des
+        # tables; modifications ne contient que ces tables
+        self._subscribers.append((frozenset(tables), callback))
+
+    def publish(self, table, ids=None, deleted=False):
+        # Signaler l'écriture de lignes d'une table (IDs, ou None si inconnus).
+        # Une suppression modifie aussi les tables filles, en cascade.
+        # Appelable depuis n'importe quel thread.
+        self._queue.put((table, ids, deleted))
+        if threading.get_ident() == self._tk_thread:
+            self._schedule()
+
+    def _schedule(self):
+        # Regrouper les publications au prochain passage de Tk au repos (thread de Tk)
+        if not self._scheduled:
+            self._scheduled = True
+            self.root.after_idle(self._flush)
+
+    def _poll(self):
+        # Relever les publications du thread de travail
+        if not self._queue.empty():
+            self._schedule()
+        self._poll_id = self.root.after(self.poll_interval, self._poll)
+
+    def stop(self):
+        # Arrêter la relève des publications (fermeture de l'application)
+        self.root.after_cancel(self._poll_id)
+
+    def _add(self, table, ids):
+        # Ajouter des IDs aux modifications en attente d'une table
+        if ids is None or (table in self._pending and self._pending[table] is None):
+            self._pending[table] = None
+        else:
+            self._pending.setdefault(table, set()).update(ids)
+
+    def _add_cascades(self, table, vues):
+        # Tables filles (et leurs propres filles) : lignes inconnues
+        for enfant in self.cascades.get(table, ()):
+            if enfant not in vues:
+                vues.add(enfant)
+                self._add(enfant, None)
+                self._add_cascades(enfant, vues)
+
+    def _flush(self):
+        # Appeler une seule fois chaque abonné concerné par les modifications regroupées
+        self._scheduled = False
+        while not self._queue.empty():
+            table, ids, deleted = self._queue.get()
+            self._add(table, ids)
+            if deleted:
+                self._add_cascades(table, {table})
+        modifications, self._pending = self._pending, {}
+        for tables, callback in self._subscribers:
+            if not tables.isdisjoint(modifications):
+                callback({table: ids for table, ids in modifications.items() if table in tables})
@@ -0,0 +1,234 @@
+import configparser
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from contextlib import contextmanager
+from functools import lru_cache
+
+# Chemin par défaut de la base de données
+DB_PATH = 'clinique_veterinaire.db'
+
+# Fichier de configuration et variable d'environnement de sélection du profil de stockage
+CONFIG_PATH = 'clinique.ini'
+PROFILE_ENV = 'CLINIQUE_PROFIL_STOCKAGE'
+
+# Profils de stockage : PRAGMA appliqués à chaque connexion, dans cet ordre
+# (busy_timeout en premier pour que le changement de journal attende un verrou)
+STORAGE_PROFILES = {
+    # Poste de travail : WAL (les lecteurs ne bloquent pas l'écrivain), 64 Mo de cache
+    'standard': {
+        'busy_timeout': 5000,
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+        'foreign_keys': 'ON',
+    },
+    # Grosse base : cache et projection mémoire plus grands
+    'performance': {
+        'busy_timeout': 5000,
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -256000,
+        'mmap_size': 1073741824,
+        'temp_store': 'MEMORY',
+        'foreign_keys': 'ON',
+    },
+    # Durabilité maximale (chaque validation est synchronisée sur le disque)
+    'prudent': {
+        'busy_timeout': 10000,
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -16000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'foreign_keys': 'ON',
+    },
+    # Base sur un partage réseau, où le mode WAL n'est pas pris en charge
+    'reseau': {
+        'busy_timeout': 10000,
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'cache_size': -16000,
+        'mmap_size': 0,
+        'temp_store': 'MEMORY',
+        'foreign_keys': 'ON',
+    },
+}
+DEFAULT_PROFILE = 'standard'
+
+
+def load_storage_profile(config_path=CONFIG_PATH):
+    # Choisir le profil de stockage : variable d'environnement CLINIQUE_PROFIL_STOCKAGE,
+    # sinon clé "profil" de la section [stockage] du fichier de configuration,
+    # sinon le profil par défaut. Les autres clés de la section remplacent les
+    # valeurs du profil (ex. cache_size = -128000). Retourne (nom, pragmas).
+    config = configparser.ConfigParser()
+    config.read(config_path, encoding='utf-8')
+    section = config['stockage'] if config.has_section('stockage') else {}
+
+    name = os.environ.get(PROFILE_ENV) or section.get('profil', DEFAULT_PROFILE)
+    if name not in STORAGE_PROFILES:
+        raise ValueError(f"Profil de stockage inconnu: {name} (profils: {', '.join(STORAGE_PROFILES)})")
+
+    pragmas = dict(STORAGE_PROFILES[name])
+    for key in pragmas:
+        if key in section:
+            value = section[key].strip()
+            if not re.fullmatch(r'-?[A-Za-z0-9_]+', value):
+                raise ValueError(f"Valeur invalide pour {key}: {value}")
+            pragmas[key] = value
+    return name, pragmas
+
+
+def fold(texte):
+    # Texte replié pour la recherche : minuscules, sans accents ni ligatures
+    # ("Hélène" -> "helene", "Œuvre" -> "oeuvre"); stocké dans les colonnes *_norm
+    if texte is None:
+        return None
+    if texte.isascii():
+        return texte.strip().lower()
+    return _fold_unicode(texte)
+
+
+# Nombre de textes accentués mémorisés (noms, prénoms et espèces se répètent,
+# la décomposition Unicode est le cas coûteux de fold)
+FOLD_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=FOLD_CACHE_SIZE)
+def _fold_unicode(texte):
+    texte = unicodedata.normalize('NFKD', texte.strip().casefold())
+    return ''.join(c for c in texte if not unicodedata.combining(c)).replace('œ', 'oe').replace('æ', 'ae')
+
+
+def prefix_range(prefixe):
+    # Bornes (incluse, exclue) des valeurs commençant par "prefixe" : comparaison
+    # directe utilisable par un index, contrairement à LIKE ou lower()
+    return prefixe, prefixe + '\uffff'
+
+
+def fts_query(texte):
+    # Requête FTS5 : chaque mot est cherché comme préfixe ("mot"*) et tous les mots
+    # doivent être présents (la ponctuation et la syntaxe FTS5 sont ignorées)
+    return ' '.join(f'"{mot}"*' for mot in re.findall(r'\w+', texte))
+
+
+def bump_versions(cursor, tables):
+    # Incrémenter une fois, dans la transaction d'une écriture, le compteur de la
+    # table Version des tables qu'elle a modifiées (quel que soit le nombre de lignes)
+    tables = tuple(tables)
+    cursor.execute(f"UPDATE Version SET version = version + 1 "
+                   f"WHERE nom_table IN ({', '.join('?' * len(tables))})", tables)
+
+
+class ConnectionManager:
+    # Gestionnaire de connexions partagé par tous les onglets de l'application.
+    # Chaque thread reçoit sa propre connexion (sqlite3 interdit de partager une
+    # connexion entre threads), ouverte une seule fois puis réutilisée.
+
+    def __init__(self, path=DB_PATH, profile=None, stats=None):
+        # profile : couple (nom, pragmas); par défaut, le profil configuré
+        # stats : statistiques des requêtes (instrumentation.QueryStats), les
+        # curseurs fournis par cursor() sont alors chronométrés
+        self.path = path
+        self.profile_name, self.pragmas = profile or load_storage_profile()
+        self.stats = stats
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        # Cascades des clés étrangères (lues à la première suppression)
+        self._cascades = None
+
+    def _connect(self):
+        # Ouvrir une nouvelle connexion et lui appliquer le profil de stockage
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        for key, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {key} = {value}")
+        return conn
+
+    def describe(self):
+        # Valeurs effectives des PRAGMA du profil (lues sur la connexion du thread courant)
+        conn = self.connection()
+        settings = ", ".join(f"{key}={conn.execute(f'PRAGMA {key}').fetchone()[0]}" for key in self.pragmas)
+        return f"Profil de stockage '{self.profile_name}': {settings}"
+
+    def connection(self):
+        # Retourner la connexion du thread courant (la créer au besoin)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def cursor(self):
+        # Fournir un curseur et valider la transaction à la sortie du bloc.
+        # En cas d'erreur, la transaction est annulée et l'exception propagée.
+        conn = self.connection()
+        cursor = conn.cursor() if self.stats is None else conn.cursor(self.stats.cursor)
+        try:
+            yield cursor
+            # Utilisation d'instruction TCL pour valider la transaction
+            conn.commit()
+        except BaseException:
+            conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
+            raise
+        finally:
+            cursor.close()
+
+    def table_versions(self, tables):
+        # Compteurs de modifications des tables (table Version, tenue à jour par
+        # bump_versions) : {table: version}
+        with self.cursor() as cursor:
+            cursor.execute(f"SELECT nom_table, version FROM Version "
+                           f"WHERE nom_table IN ({', '.join('?' * len(tables))})", tuple(tables))
+            return dict(cursor.fetchall())
+
+    def cascades(self):
+        # Tables filles modifiées par la suppression d'une ligne parente (clés
+        # étrangères ON DELETE CASCADE ou SET NULL) : {table parente: (tables filles)}
+        enfants = {}
+        with self.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND sql LIKE '%REFERENCES%'")
+            for (table,) in cursor.fetchall():
+                cursor.execute(f"SELECT \"table\", on_delete FROM pragma_foreign_key_list('{table}')")
+                for parent, on_delete in cursor.fetchall():
+                    if on_delete in ('CASCADE', 'SET NULL', 'SET DEFAULT'):
+                        enfants.setdefault(parent, []).append(table)
+        return {parent: tuple(tables) for parent, tables in enfants.items()}
+
+    def cascade_tables(self, table):
+        # Table et descendantes modifiées par la suppression d'une de ses lignes
+        if self._cascades is None:
+            self._cascades = self.cascades()
+        tables = [table]
+        for parent in tables:
+            for enfant in self._cascades.get(parent, ()):
+                if enfant not in tables:
+                    tables.append(enfant)
+        return tables
+
+    def close(self):
+        # Fermer la connexion du thread courant
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.conn = None
+            with self._lock:
+                if conn in self._connections:
+                    self._connections.remove(conn)
+            conn.close()
+
+    def close_all(self):
+        # Fermer toutes les connexions ouvertes (à la fermeture de l'application)
+        with self._lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
@@ -0,0 +1,144 @@
+import queue
+import sqlite3
+import sys
+import threading
+
+from instrumentation import tagged
+from ui_watchdog import section
+
+
+class QueryExecutor:
+    # Exécute les requêtes de lecture dans un thread de travail qui possède sa
+    # propre connexion. Les résultats sont remis à la boucle Tk via root.after,
+    # et une requête remplacée par une plus récente (même étiquette) est annulée.
+
+    def __init__(self, root, db, on_busy=None, on_error=None, poll_interval=20):
+        # on_busy(etiquettes) : appelée quand l'ensemble des requêtes en cours change
+        # on_error(etiquette, exception) : appelée quand une requête échoue
+        self.root = root
+        self.db = db
+        self.on_busy = on_busy
+        self.on_error = on_error
+        self.poll_interval = poll_interval
+
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._lock = threading.Lock()
+        self._generations = {}
+        self._pending = set()
+        self._running = None
+        self._worker_conn = None
+        self._stopped = False
+
+        self._thread = threading.Thread(target=self._run, name="QueryExecutor", daemon=True)
+        self._thread.start()
+        self._poll_id = self.root.after(self.poll_interval, self._poll)
+
+    def submit(self, tag, func, callback=None):
+        # Planifier func() dans le thread de travail; callback(resultat) sera
+        # appelée dans la boucle Tk. Une requête en attente ou en cours portant
+        # la même étiquette est remplacée.
+        with self._lock:
+            generation = self._generations.get(tag, 0) + 1
+            self._generations[tag] = generation
+
+            # Interrompre la requête remplacée si elle est en cours d'exécution
+            if self._running is not None and self._running[0] == tag and self._worker_conn is not None:
+                self._worker_conn.interrupt()
+
+        self._jobs.put((tag, generation, func, callback))
+        self._set_busy(tag, True)
+
+    def is_current(self, tag, generation):
+        # Vérifier qu'une requête n'a pas été remplacée
+        with self._lock:
+            return self._generations.get(tag) == generation
+
+    def is_idle(self):
+        # Vérifier qu'aucune requête n'est en attente ou en cours
+        return not self._pending
+
+    def _run(self):
+        # Boucle du thread de travail
+        self._worker_conn = self.db.connection()
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            tag, generation, func, callback = job
+
+            # Ignorer une requête déjà remplacée
+            if not self.is_current(tag, generation):
+                continue
+
+            with self._lock:
+                self._running = (tag, generation)
+            try:
+                # Les requêtes de func sont rattachées à l'étiquette
+                with tagged(tag):
+                    result = func()
+                error = None
+            except Exception as e:
+                result = None
+                error = e
+            finally:
+                with self._lock:
+                    self._running = None
+            self._results.put((tag, generation, callback, result, error))
+
+        # Fermer la connexion du thread de travail
+        self.db.close()
+
+    def _poll(self):
+        # Remettre les résultats disponibles à la boucle Tk (la boucle est réarmée
+        # même si un rappel échoue)
+        try:
+            while True:
+                try:
+                    tag, generation, callback, result, error = self._results.get_nowait()
+                except queue.Empty:
+                    break
+
+                # Un résultat remplacé (ou une requête interrompue) est abandonné
+                if not self.is_current(tag, generation):
+                    continue
+                self._set_busy(tag, False)
+
+                if error is not None:
+                    if isinstance(error, sqlite3.OperationalError) and str(error) == "interrupted":
+                        continue
+                    if self.on_error is not None:
+                        self._call(tag, self.on_error, tag, error)
+                    continue
+                if callback is not None:
+                    self._call(tag, callback, result)
+        finally:
+            if not self._stopped:
+                self._poll_id = self.root.after(self.poll_interval, self._poll)
+
+    def _call(self, tag, func, *args):
+        # Appeler un rappel dans la boucle Tk. Son exception est signalée comme celles
+        # des autres rappels de Tk (report_callback_exception) et n'empêche pas la
+        # remise des résultats suivants.
+        try:
+            # Un blocage de la boucle Tk pendant l'affichage est attribué à l'étiquette
+            with section(tag):
+                func(*args)
+        except Exception:
+            self.root.report_callback_exception(*sys.exc_info())
+
+    def _set_busy(self, tag, busy):
+        # Mettre à jour l'ensemble des requêtes en cours (état de chargement)
+        if busy:
+            self._pending.add(tag)
+        else:
+            self._pending.discard(tag)
+        if self.on_busy is not None:
+            self.on_busy(sorted(self._pending))
+
+    def stop(self):
+        # Arrêter le thread de travail
+        self._stopped = True
+        self.root.after_cancel(self._poll_id)
+        self._jobs.put(None)
+        self._thread.join(timeout=1)
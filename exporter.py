@@ -0,0 +1,100 @@
+import argparse
+import csv
+import json
+import sys
+import time
+
+from database import ConnectionManager, DB_PATH
+from repositories import FETCH_SIZE, Repositories
+
+# Export en continu d'une table ou d'une vue (tableaux des consultations et des
+# ordonnances de l'application) vers un fichier CSV ou JSONL. Les lignes sont
+# lues par blocs (fetchmany) et écrites au fur et à mesure : la mémoire utilisée
+# ne dépend pas du nombre de lignes exportées.
+
+FORMATS = ('csv', 'jsonl')
+SOURCES = ('proprietaires', 'animaux', 'veterinaires', 'medicaments', 'consultations', 'ordonnances',
+           'vue_consultations', 'vue_ordonnances')
+
+
+def export_sources(repos):
+    # Sources exportables : nom -> (fonction d'export, filtrable par date)
+    return {
+        'proprietaires': (repos.proprietaires.export_rows, False),
+        'animaux': (repos.animaux.export_rows, False),
+        'veterinaires': (repos.veterinaires.export_rows, False),
+        'medicaments': (repos.medicaments.export_rows, False),
+        'consultations': (repos.consultations.export_rows, True),
+        'ordonnances': (repos.ordonnances.export_rows, True),
+        'vue_consultations': (repos.consultations.export_view, True),
+        'vue_ordonnances': (repos.ordonnances.export_view, True),
+    }
+
+
+def write_csv(out, columns, rows):
+    writer = csv.writer(out)
+    writer.writerow(columns)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def write_jsonl(out, columns, rows):
+    # Un objet JSON par ligne
+    count = 0
+    for row in rows:
+        out.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+        out.write('\n')
+        count += 1
+    return count
+
+
+def export(repos, source, out, format='csv', debut=None, fin=None, size=FETCH_SIZE):
+    # Exporter une source vers le fichier ouvert "out"; retourne le nombre de lignes
+    export_rows, by_date = export_sources(repos)[source]
+    if by_date:
+        columns, rows = export_rows(debut, fin, size=size)
+    elif debut or fin:
+        raise ValueError(f"La source {source} ne peut pas être filtrée par date")
+    else:
+        columns, rows = export_rows(size=size)
+
+    if format == 'jsonl':
+        return write_jsonl(out, columns, rows)
+    return write_csv(out, columns, rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export d'une table ou d'une vue de la base de la clinique")
+    parser.add_argument('source', choices=SOURCES, help="table ou vue à exporter")
+    parser.add_argument('--base', default=DB_PATH, help="chemin de la base de données")
+    parser.add_argument('--format', choices=FORMATS, default='csv', help="format du fichier")
+    parser.add_argument('--sortie', default='-', help="fichier de sortie (sortie standard par défaut)")
+    parser.add_argument('--debut', help="date de début incluse (YYYY-MM-DD)")
+    parser.add_argument('--fin', help="date de fin incluse (YYYY-MM-DD)")
+    parser.add_argument('--bloc', type=int, default=FETCH_SIZE, help="nombre de lignes lues à la fois")
+    args = parser.parse_args(argv)
+
+    db = ConnectionManager(args.base)
+    repos = Repositories(db)
+    if (args.debut or args.fin) and not export_sources(repos)[args.source][1]:
+        parser.error(f"La source {args.source} ne peut pas être filtrée par date")
+
+    debut = time.perf_counter()
+    out = sys.stdout if args.sortie == '-' else open(args.sortie, 'w', newline='', encoding='utf-8')
+    try:
+        count = export(repos, args.source, out, args.format, args.debut, args.fin, args.bloc)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        db.close_all()
+
+    # Rapport sur la sortie d'erreur (la sortie standard peut contenir l'export)
+    duree = time.perf_counter() - debut
+    print(f"{count} lignes exportées ({args.source}) en {duree:.2f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
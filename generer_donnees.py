@@ -0,0 +1,314 @@
+import argparse
+import os
+import random
+import sqlite3
+import time
+from datetime import date
+
+from database import DB_PATH, fold, load_storage_profile
+from migrations import VERSIONED_TABLES, migrate
+
+# Génération d'une base de données réaliste pour les tests de charge.
+# La base produite ne dépend que des paramètres : même graine, mêmes nombres
+# de lignes et même date de fin donnent la même base. Les lignes sont insérées
+# par lots dans une base neuve (sans journal), et les index secondaires sont
+# construits après le chargement.
+
+BATCH_SIZE = 100000
+
+# Date de la consultation la plus récente (fixe, pour que la base soit reproductible)
+END_DATE = '2025-12-31'
+
+NOMS = ("Martin", "Bernard", "Thomas", "Petit", "Robert", "Richard", "Durand", "Dubois", "Moreau", "Laurent",
+        "Simon", "Michel", "Lefebvre", "Leroy", "Roux", "David", "Bertrand", "Morel", "Fournier", "Girard",
+        "Bonnet", "Dupont", "Lambert", "Fontaine", "Rousseau", "Vincent", "Muller", "Lefèvre", "Faure", "André",
+        "Mercier", "Blanc", "Guérin", "Boyer", "Garnier", "Chevalier", "François", "Legrand", "Gauthier", "Garcia")
+PRENOMS = ("Marie", "Jean", "Pierre", "Michel", "André", "Philippe", "Nathalie", "Isabelle", "Sophie", "Camille",
+           "Nicolas", "Julien", "Céline", "Émilie", "Antoine", "Hélène", "Louis", "Chloé", "Hugo", "Léa",
+           "Manon", "Lucas", "Théo", "Inès", "Gabriel", "Jade", "Raphaël", "Zoé", "Arthur", "Élodie")
+RUES = ("rue de la Paix", "avenue Victor Hugo", "boulevard Saint-Michel", "rue du Moulin", "place de l'Église",
+        "chemin des Vignes", "rue Pasteur", "allée des Tilleuls", "rue Jean Jaurès", "impasse des Lilas")
+VILLES = ("Paris", "Lyon", "Marseille", "Toulouse", "Nantes", "Lille", "Bordeaux", "Rennes", "Québec", "Montréal")
+
+# Espèces : (poids relatif, races, âge maximal, poids minimal et maximal en kg)
+ESPECES = {
+    'Chien': (45, ("Labrador", "Berger allemand", "Golden retriever", "Bouledogue français", "Beagle",
+                   "Caniche", "Border collie", "Chihuahua", "Croisé"), 16, 2.0, 60.0),
+    'Chat': (40, ("Européen", "Siamois", "Persan", "Maine coon", "Bengal", "Sacré de Birmanie", "Chartreux"),
+             20, 2.0, 9.0),
+    'Lapin': (6, ("Bélier", "Nain", "Angora", "Rex"), 10, 0.8, 6.0),
+    'Oiseau': (4, ("Perruche", "Canari", "Perroquet gris", "Calopsitte"), 30, 0.02, 1.0),
+    'Furet': (2, (None,), 9, 0.5, 2.0),
+    'Cheval': (2, ("Pur-sang", "Frison", "Poney Shetland", "Selle français"), 30, 150.0, 700.0),
+    'Tortue': (1, ("Tortue d'Hermann", "Tortue grecque"), 60, 0.2, 5.0),
+}
+ANIMAUX = ("Max", "Bella", "Rocky", "Luna", "Charlie", "Milo", "Nala", "Simba", "Oscar", "Lucky", "Caramel",
+           "Filou", "Praline", "Réglisse", "Moka", "Titi", "Pompon", "Noisette", "Gribouille", "Éclair")
+SPECIALISATIONS = (None, "Chirurgie", "Dermatologie", "Cardiologie", "Ophtalmologie", "Dentisterie",
+                   "Nouveaux animaux de compagnie", "Équine", "Imagerie médicale", "Comportement")
+DIAGNOSTICS = ("Examen annuel", "Vaccination", "Otite externe", "Gastro-entérite", "Dermatite allergique",
+               "Boiterie", "Plaie superficielle", "Parasites intestinaux", "Insuffisance rénale",
+               "Tartre dentaire", "Conjonctivite", "Fracture", "Obésité", "Stérilisation", "Toux de chenil")
+TRAITEMENTS = (None, "Repos et surveillance", "Antibiotiques 7 jours", "Anti-inflammatoires 5 jours",
+               "Vermifuge", "Détartrage sous anesthésie", "Pansement à refaire dans 3 jours",
+               "Régime alimentaire adapté", "Collyre 2 fois par jour", "Contrôle dans un mois")
+MEDICAMENTS = ("Amoxicilline", "Méloxicam", "Prednisolone", "Métronidazole", "Praziquantel", "Fipronil",
+               "Enrofloxacine", "Furosémide", "Gabapentine", "Oméprazole", "Tramadol", "Kétamine",
+               "Doxycycline", "Clindamycine", "Bénazépril", "Pimobendane", "Insuline", "Lévothyroxine")
+FORMES = ("comprimé", "sirop", "injectable", "pommade", "collyre", "pipette")
+
+
+def _phone(prefix, i):
+    # Numéro unique dérivé de l'index (10 chiffres)
+    return f"0{prefix + i // 100000000}{i % 100000000:08d}"
+
+
+def _schema_objects(conn, type):
+    # Index ou déclencheurs créés par les migrations (les index des contraintes
+    # UNIQUE, sans SQL, sont exclus)
+    return conn.execute("SELECT name, sql FROM sqlite_master WHERE type = ? AND sql IS NOT NULL",
+                        (type,)).fetchall()
+
+
+def _fts_tables(conn):
+    # Tables de recherche plein texte (FTS5), reconstruites après le chargement
+    return [name for name, sql in _schema_objects(conn, 'table') if 'USING fts5' in sql]
+
+
+def _insert(conn, query, rows, batch_size=BATCH_SIZE):
+    # Insérer les lignes par lots; retourne le nombre de lignes
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            conn.executemany(query, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        conn.executemany(query, batch)
+        count += len(batch)
+    return count
+
+
+def check_counts(proprietaires, animaux, veterinaires, consultations, ordonnances):
+    # Vérifier que les nombres de lignes demandés respectent les clés étrangères
+    # et la clé primaire des ordonnances
+    medicaments = len(MEDICAMENTS) * len(FORMES)
+    if min(proprietaires, animaux, veterinaires, consultations, ordonnances) < 0:
+        raise ValueError("Les nombres de lignes doivent être positifs")
+    if proprietaires < 1 and animaux:
+        raise ValueError("Des animaux sans propriétaire ne peuvent pas être générés")
+    if consultations and (animaux < 1 or veterinaires < 1):
+        raise ValueError("Les consultations nécessitent au moins un animal et un vétérinaire")
+    if ordonnances > consultations * medicaments:
+        raise ValueError(f"Au plus {medicaments} ordonnances par consultation")
+
+
+def generate(path, proprietaires=1000, animaux=1500, veterinaires=10, consultations=5000, ordonnances=7500,
+             annees=5, fin=END_DATE, seed=42, verbose=True):
+    # Créer la base "path" (qui ne doit pas exister) et la remplir.
+    # Retourne le rapport [(table, lignes, durée en secondes)].
+    if os.path.exists(path):
+        raise FileExistsError(f"La base {path} existe déjà")
+    check_counts(proprietaires, animaux, veterinaires, consultations, ordonnances)
+    medicaments = len(MEDICAMENTS) * len(FORMES)
+
+    r = random.Random(seed)
+    rnd = r.random
+    report = []
+
+    conn = sqlite3.connect(path)
+    # Chargement d'une base neuve : une interruption la rend inutilisable, elle est alors supprimée
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -256000")
+    try:
+        migrate(conn, verbose=False)
+
+        # Les index secondaires et les déclencheurs (index plein texte) sont
+        # supprimés puis reconstruits après le chargement
+        indexes = _schema_objects(conn, 'index')
+        triggers = _schema_objects(conn, 'trigger')
+        for name, _ in indexes:
+            conn.execute(f"DROP INDEX {name}")
+        for name, _ in triggers:
+            conn.execute(f"DROP TRIGGER {name}")
+
+        def step(table, query, rows):
+            debut = time.perf_counter()
+            count = _insert(conn, query, rows)
+            report.append((table, count, time.perf_counter() - debut))
+            if verbose:
+                print(f"{table}: {count} lignes en {report[-1][2]:.1f} s")
+
+        # Valeurs repliées des colonnes *_norm (les listes de noms sont repliées une seule fois)
+        plis = {}
+
+        def plie(texte):
+            valeur = plis.get(texte)
+            if valeur is None:
+                valeur = plis[texte] = fold(texte)
+            return valeur
+
+        conn.execute("BEGIN")
+
+        # Propriétaires (téléphone et email uniques)
+        def gen_proprietaires():
+            for i in range(1, proprietaires + 1):
+                nom = NOMS[int(rnd() * len(NOMS))]
+                prenom = PRENOMS[int(rnd() * len(PRENOMS))]
+                adresse = (f"{1 + int(rnd() * 200)} {RUES[int(rnd() * len(RUES))]}, "
+                           f"{VILLES[int(rnd() * len(VILLES))]}") if rnd() < 0.9 else None
+                email = f"{prenom.lower()}.{nom.lower()}.{i}@exemple.fr"
+                yield (i, nom, prenom, _phone(6, i), email, adresse, plie(nom), plie(prenom), fold(email))
+
+        step('Proprietaire', """
+            INSERT INTO Proprietaire (id_proprietaire, nom, prenom, telephone, email, adresse,
+                                      nom_norm, prenom_norm, email_norm)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, gen_proprietaires())
+
+        # Animaux (espèces et races selon la distribution, âge >= 0)
+        especes = list(ESPECES)
+        poids_especes = [ESPECES[e][0] for e in especes]
+
+        def gen_animaux():
+            for i in range(1, animaux + 1):
+                espece = r.choices(especes, poids_especes)[0]
+                _, races, age_max, poids_min, poids_max = ESPECES[espece]
+                race = races[int(rnd() * len(races))]
+                age = int(rnd() * (age_max + 1))
+                poids = round(poids_min + rnd() * (poids_max - poids_min), 1)
+                nom = ANIMAUX[int(rnd() * len(ANIMAUX))]
+                yield (i, nom, espece, race, age, poids, 1 + int(rnd() * proprietaires), plie(nom), plie(espece))
+
+        step('Animal', """
+            INSERT INTO Animal (id_animal, nom, espece, race, age, poids, id_proprietaire, nom_norm, espece_norm)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, gen_animaux())
+
+        # Vétérinaires
+        def gen_veterinaires():
+            for i in range(1, veterinaires + 1):
+                nom = f"Dr {PRENOMS[int(rnd() * len(PRENOMS))]} {NOMS[int(rnd() * len(NOMS))]}"
+                email = f"veterinaire.{i}@clinique.fr"
+                yield (i, nom, SPECIALISATIONS[int(rnd() * len(SPECIALISATIONS))], _phone(1, i), email,
+                       fold(nom), email)
+
+        step('Veterinaire', """
+            INSERT INTO Veterinaire (id_veterinaire, nom, specialisation, telephone, email, nom_norm, email_norm)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, gen_veterinaires())
+
+        # Médicaments (une ligne par molécule et par forme)
+        def gen_medicaments():
+            i = 0
+            for molecule in MEDICAMENTS:
+                for forme in FORMES:
+                    i += 1
+                    nom = f"{molecule} ({forme})"
+                    yield (i, nom, f"{molecule}, {forme}",
+                           f"{1 + int(rnd() * 3)} fois par jour pendant {1 + int(rnd() * 14)} jours", fold(nom))
+
+        step('Medicament', """
+            INSERT INTO Medicament (id_medicament, nom, description, posologie, nom_norm)
+            VALUES (?, ?, ?, ?, ?)
+        """, gen_medicaments())
+
+        # Consultations réparties sur "annees" années jusqu'à la date de fin
+        dernier = date.fromisoformat(fin).toordinal()
+        dates = [date.fromordinal(d).isoformat() for d in range(dernier - 365 * annees + 1, dernier + 1)]
+
+        def gen_consultations():
+            for i in range(1, consultations + 1):
+                yield (i, dates[int(rnd() * len(dates))], DIAGNOSTICS[int(rnd() * len(DIAGNOSTICS))],
+                       TRAITEMENTS[int(rnd() * len(TRAITEMENTS))], 1 + int(rnd() * animaux),
+                       1 + int(rnd() * veterinaires))
+
+        step('Consultation', """
+            INSERT INTO Consultation (id_consultation, date, diagnostic, traitement, id_animal, id_veterinaire)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, gen_consultations())
+
+        # Ordonnances : réparties uniformément entre les consultations, médicaments
+        # distincts pour une même consultation (clé primaire), quantité > 0
+        def gen_ordonnances():
+            emises = 0
+            for i in range(1, consultations + 1):
+                k = ordonnances * i // consultations - emises
+                if k:
+                    emises += k
+                    for id_medicament in r.sample(range(1, medicaments + 1), k):
+                        yield (i, id_medicament, 1 + int(rnd() * 5))
+
+        step('Ordonnance', "INSERT INTO Ordonnance (id_consultation, id_medicament, quantite) VALUES (?, ?, ?)",
+             gen_ordonnances())
+
+        # Compteurs de la table Version tirés du générateur : la même graine donne les
+        # mêmes versions, deux bases générées différemment ne les partagent pas
+        conn.executemany("UPDATE Version SET version = ? WHERE nom_table = ?",
+                         [(r.getrandbits(31), table) for table in VERSIONED_TABLES])
+        conn.commit()
+
+        # Construire les index secondaires et plein texte, recréer les déclencheurs
+        # puis calculer les statistiques du planificateur
+        debut = time.perf_counter()
+        for _, sql in indexes + triggers:
+            conn.execute(sql)
+        fts_tables = _fts_tables(conn)
+        for name in fts_tables:
+            conn.execute(f"INSERT INTO {name}({name}) VALUES ('rebuild')")
+        conn.execute("ANALYZE")
+        conn.commit()
+        report.append(('index', len(indexes) + len(fts_tables), time.perf_counter() - debut))
+        if verbose:
+            print(f"{report[-1][1]} index construits en {report[-1][2]:.1f} s")
+
+        # Mode de journal du profil de stockage pour l'utilisation normale
+        conn.execute(f"PRAGMA journal_mode = {load_storage_profile()[1]['journal_mode']}")
+    except BaseException:
+        conn.close()
+        os.remove(path)
+        raise
+    conn.close()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génération d'une base de données de test de la clinique")
+    parser.add_argument('--base', default=DB_PATH, help="chemin de la base à créer")
+    parser.add_argument('--ecraser', action='store_true', help="remplacer la base si elle existe")
+    parser.add_argument('--graine', type=int, default=42, help="graine du générateur aléatoire")
+    parser.add_argument('--proprietaires', type=int, default=1000)
+    parser.add_argument('--animaux', type=int, default=1500)
+    parser.add_argument('--veterinaires', type=int, default=10)
+    parser.add_argument('--consultations', type=int, default=5000)
+    parser.add_argument('--ordonnances', type=int, default=7500)
+    parser.add_argument('--annees', type=int, default=5, help="période couverte par les consultations")
+    parser.add_argument('--fin', default=END_DATE, help="date de la consultation la plus récente (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+
+    try:
+        check_counts(args.proprietaires, args.animaux, args.veterinaires, args.consultations, args.ordonnances)
+        date.fromisoformat(args.fin)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.annees < 1:
+        parser.error("La période doit couvrir au moins une année")
+    if os.path.exists(args.base):
+        if not args.ecraser:
+            parser.error(f"La base {args.base} existe déjà (utiliser --ecraser pour la remplacer)")
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(args.base + suffix):
+                os.remove(args.base + suffix)
+
+    debut = time.perf_counter()
+    report = generate(args.base, args.proprietaires, args.animaux, args.veterinaires, args.consultations,
+                      args.ordonnances, args.annees, args.fin, args.graine)
+    total = sum(count for table, count, _ in report if table != 'index')
+    print(f"Base {args.base} générée: {total} lignes en {time.perf_counter() - debut:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
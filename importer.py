@@ -0,0 +1,281 @@
+import argparse
+import csv
+import sqlite3
+import time
+from operator import itemgetter
+
+from database import ConnectionManager, DB_PATH
+from migrations import migrate
+from repositories import Animal, Medicament, Proprietaire, Repositories, ValidationError, Veterinaire
+
+# Import en masse de fichiers CSV (une ligne d'en-tête, colonnes nommées comme
+# les champs des entités). Les fichiers sont lus ligne par ligne, validés avec
+# les règles de l'application puis insérés par lots (executemany, une
+# transaction par lot). Les lignes refusées sont écrites dans un fichier d'erreurs.
+#
+# Colonnes reconnues :
+#   proprietaires : nom, prenom, telephone, email, adresse, ref
+#   animaux       : nom, espece, race, age, poids, proprietaire
+#   veterinaires  : nom, specialisation, telephone, email
+#   medicaments   : nom, description, posologie
+# "ref" est l'identifiant du propriétaire dans le fichier source (son téléphone
+# par défaut); la colonne "proprietaire" des animaux contient cette référence
+# ou le téléphone d'un propriétaire déjà présent dans la base.
+
+BATCH_SIZE = 10000
+
+
+def _optional(value):
+    # Champ facultatif : une cellule vide devient NULL
+    return value if value else None
+
+
+class CsvImporter:
+
+    def __init__(self, repos, errors_path='rejets_import.csv', batch_size=BATCH_SIZE, delimiter=','):
+        self.repos = repos
+        self.batch_size = batch_size
+        self.delimiter = delimiter
+        self.errors_path = errors_path
+        self._errors_file = None
+        self._errors = None
+
+        # Rapport : [(fichier, lignes lues, lignes importées, lignes refusées, durée)]
+        self.report = []
+
+        # Références des propriétaires importés (ref -> ID)
+        self.proprietaire_ids = {}
+
+    # Fichier d'erreurs (ouvert à la première ligne refusée)
+    def _reject(self, path, line, message, values):
+        if self._errors is None:
+            self._errors_file = open(self.errors_path, 'w', newline='', encoding='utf-8')
+            self._errors = csv.writer(self._errors_file)
+            self._errors.writerow(['fichier', 'ligne', 'erreur', 'donnees'])
+        self._errors.writerow([path, line, message, self.delimiter.join(values)])
+
+    def close(self):
+        if self._errors_file is not None:
+            self._errors_file.close()
+            self._errors_file = None
+            self._errors = None
+
+    def _existing(self, table, key, column):
+        # Valeurs déjà présentes d'une colonne unique (valeur -> ID)
+        with self.repos.db.cursor() as cursor:
+            cursor.execute(f"SELECT {column}, {key} FROM {table}")
+            return dict(cursor.fetchall())
+
+    def _run(self, path, repository, columns, parse, on_inserted=None, on_rejected=None):
+        # Lire le fichier, valider et insérer les entités par lots.
+        # parse(*valeurs) reçoit les cellules des colonnes demandées (sans espaces
+        # superflus, '' si la colonne est absente) et retourne l'entité validée
+        # ou lève ValidationError. on_rejected(entité) : entité validée mais
+        # refusée par la base.
+        debut = time.perf_counter()
+        lues = importees = refusees = 0
+        batch = []
+
+        def flush():
+            nonlocal importees, refusees
+            try:
+                repository.bulk_create((entity for _, _, entity in batch), batch_size=len(batch),
+                                       validate=False)
+                inserted = batch
+            except sqlite3.IntegrityError:
+                # Lot refusé par la base : l'insérer ligne par ligne pour isoler les fautives
+                inserted = []
+                for line, values, entity in batch:
+                    try:
+                        repository.create(entity)
+                        inserted.append((line, values, entity))
+                    except sqlite3.IntegrityError as e:
+                        self._reject(path, line, str(e), values)
+                        refusees += 1
+                        if on_rejected is not None:
+                            on_rejected(entity)
+            importees += len(inserted)
+            if on_inserted is not None:
+                on_inserted(inserted)
+            batch.clear()
+
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f, delimiter=self.delimiter)
+
+            # Position des colonnes d'après l'en-tête (les colonnes absentes
+            # pointent vers une cellule vide ajoutée en fin de ligne)
+            header = [name.strip() for name in next(reader, [])]
+            absent = len(header)
+            cells = itemgetter(*(header.index(c) if c in header else absent for c in columns))
+
+            # La ligne 1 est l'en-tête
+            for line, values in enumerate(reader, start=2):
+                if not values:
+                    continue
+                lues += 1
+                try:
+                    if len(values) > absent:
+                        raise ValidationError("Nombre de colonnes supérieur à celui de l'en-tête")
+                    row = values + [''] * (absent + 1 - len(values))
+                    entity = parse(*map(str.strip, cells(row)))
+                except ValidationError as e:
+                    self._reject(path, line, str(e), values)
+                    refusees += 1
+                    continue
+                batch.append((line, values, entity))
+                if len(batch) >= self.batch_size:
+                    flush()
+        if batch:
+            flush()
+
+        self.report.append((path, lues, importees, refusees, time.perf_counter() - debut))
+
+    def _unique_contact(self, entity, telephones, emails):
+        # Téléphone et email uniques (base et lignes déjà acceptées)
+        if entity.telephone in telephones or entity.email in emails:
+            raise ValidationError("Le téléphone ou l'email existe déjà")
+
+    def import_proprietaires(self, path):
+        telephones = self._existing('Proprietaire', 'id_proprietaire', 'telephone')
+        emails = set(self._existing('Proprietaire', 'id_proprietaire', 'email'))
+        validate = self.repos.proprietaires.validate
+        refs = {}
+        # Références déjà réservées par ce fichier
+        reservees = set()
+
+        def parse(nom, prenom, telephone, email, adresse, ref):
+            proprietaire = Proprietaire(nom, prenom, telephone, email, _optional(adresse))
+            validate(proprietaire)
+            self._unique_contact(proprietaire, telephones, emails)
+            ref = ref or telephone
+            if ref in self.proprietaire_ids or ref in reservees:
+                raise ValidationError(f"Référence de propriétaire en double: {ref}")
+
+            # Réserver le téléphone, l'email et la référence
+            telephones[telephone] = None
+            emails.add(email)
+            reservees.add(ref)
+            refs[id(proprietaire)] = ref
+            return proprietaire
+
+        def on_inserted(inserted):
+            # Associer les références aux IDs attribués
+            for _, _, proprietaire in inserted:
+                self.proprietaire_ids[refs.pop(id(proprietaire))] = proprietaire.id_proprietaire
+
+        def on_rejected(proprietaire):
+            # Ligne refusée par la base : libérer sa référence pour les lignes suivantes
+            reservees.discard(refs.pop(id(proprietaire)))
+
+        self._run(path, self.repos.proprietaires, ('nom', 'prenom', 'telephone', 'email', 'adresse', 'ref'),
+                  parse, on_inserted, on_rejected)
+
+        # Les propriétaires déjà présents sont aussi référencés par leur téléphone
+        for telephone, id_proprietaire in telephones.items():
+            if id_proprietaire is not None:
+                self.proprietaire_ids.setdefault(telephone, id_proprietaire)
+
+    def import_animaux(self, path):
+        # Propriétaires déjà présents, référencés par leur téléphone
+        if not self.proprietaire_ids:
+            self.proprietaire_ids = self._existing('Proprietaire', 'id_proprietaire', 'telephone')
+        validate = self.repos.animaux.validate
+
+        def parse(nom, espece, race, age, poids, proprietaire):
+            # Convertir les types
+            try:
+                age = int(age) if age else None
+                poids = float(poids) if poids else None
+            except ValueError:
+                raise ValidationError("Format de l'âge ou du poids invalide")
+
+            # Résoudre la référence du propriétaire
+            id_proprietaire = None
+            if proprietaire:
+                id_proprietaire = self.proprietaire_ids.get(proprietaire)
+                if id_proprietaire is None:
+                    raise ValidationError(f"Propriétaire inconnu: {proprietaire}")
+
+            animal = Animal(nom, espece, _optional(race), age, poids, id_proprietaire)
+            validate(animal)
+            return animal
+
+        self._run(path, self.repos.animaux, ('nom', 'espece', 'race', 'age', 'poids', 'proprietaire'), parse)
+
+    def import_veterinaires(self, path):
+        telephones = set(self._existing('Veterinaire', 'id_veterinaire', 'telephone'))
+        emails = set(self._existing('Veterinaire', 'id_veterinaire', 'email'))
+        validate = self.repos.veterinaires.validate
+
+        def parse(nom, specialisation, telephone, email):
+            veterinaire = Veterinaire(nom, telephone, email, _optional(specialisation))
+            validate(veterinaire)
+            self._unique_contact(veterinaire, telephones, emails)
+            telephones.add(telephone)
+            emails.add(email)
+            return veterinaire
+
+        self._run(path, self.repos.veterinaires, ('nom', 'specialisation', 'telephone', 'email'), parse)
+
+    def import_medicaments(self, path):
+        validate = self.repos.medicaments.validate
+
+        def parse(nom, description, posologie):
+            medicament = Medicament(nom, _optional(description), _optional(posologie))
+            validate(medicament)
+            return medicament
+
+        self._run(path, self.repos.medicaments, ('nom', 'description', 'posologie'), parse)
+
+    def print_report(self):
+        # Rapport de débit (lignes par seconde)
+        total_lues = total_importees = 0
+        total_duree = 0.0
+        for path, lues, importees, refusees, duree in self.report:
+            debit = lues / duree if duree else 0
+            print(f"{path}: {lues} lignes lues, {importees} importées, {refusees} refusées "
+                  f"en {duree:.2f} s ({debit:,.0f} lignes/s)")
+            total_lues += lues
+            total_importees += importees
+            total_duree += duree
+        if total_duree:
+            print(f"Total: {total_importees}/{total_lues} lignes importées en {total_duree:.2f} s "
+                  f"({total_lues / total_duree:,.0f} lignes/s)")
+        if any(r[3] for r in self.report):
+            print(f"Lignes refusées écrites dans {self.errors_path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import en masse de fichiers CSV dans la base de la clinique")
+    parser.add_argument('--base', default=DB_PATH, help="chemin de la base de données")
+    parser.add_argument('--proprietaires', help="fichier CSV des propriétaires")
+    parser.add_argument('--animaux', help="fichier CSV des animaux")
+    parser.add_argument('--veterinaires', help="fichier CSV des vétérinaires")
+    parser.add_argument('--medicaments', help="fichier CSV des médicaments")
+    parser.add_argument('--erreurs', default='rejets_import.csv', help="fichier des lignes refusées")
+    parser.add_argument('--lot', type=int, default=BATCH_SIZE, help="nombre de lignes par transaction")
+    parser.add_argument('--separateur', default=',', help="séparateur des colonnes")
+    args = parser.parse_args(argv)
+
+    db = ConnectionManager(args.base)
+    migrate(db.connection())
+    importer = CsvImporter(Repositories(db), errors_path=args.erreurs, batch_size=args.lot,
+                           delimiter=args.separateur)
+    try:
+        # Les propriétaires d'abord : les animaux y font référence
+        if args.proprietaires:
+            importer.import_proprietaires(args.proprietaires)
+        if args.animaux:
+            importer.import_animaux(args.animaux)
+        if args.veterinaires:
+            importer.import_veterinaires(args.veterinaires)
+        if args.medicaments:
+            importer.import_medicaments(args.medicaments)
+    finally:
+        importer.close()
+        db.close_all()
+    importer.print_report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+import configparser
+import contextlib
+import logging
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+
+import database
+
+# Instrumentation des requêtes : chaque instruction exécutée par un curseur du
+# gestionnaire de connexions est chronométrée (exécution et lecture des lignes)
+# et rattachée à l'action qui l'a déclenchée (refresh_animaux, add_ordonnance...).
+# Les durées sont agrégées par action et par requête dans des histogrammes, et
+# les requêtes lentes sont écrites avec leur plan d'exécution dans un journal
+# à rotation.
+
+# Seuil des requêtes lentes (ms) et journal à rotation (taille maximale en Ko, nombre d'archives)
+SLOW_QUERY_MS = 100.0
+SLOW_LOG_PATH = 'requetes_lentes.log'
+SLOW_LOG_KB = 1024
+SLOW_LOG_BACKUPS = 3
+
+# Histogrammes : chaque classe de durée est 10 % plus large que la précédente
+# (les percentiles sont exacts à 10 % près), en partant de 1 µs
+BUCKET_GROWTH = 1.1
+_LOG_GROWTH = math.log(BUCKET_GROWTH)
+
+# Étiquette de l'action en cours (posée par l'exécuteur de requêtes ou avec tagged())
+current_tag = ContextVar('current_tag', default=None)
+
+# Fichiers de la couche de données, ignorés pour retrouver la méthode appelante
+_DATA_LAYER = (os.path.join(os.path.dirname(os.path.abspath(__file__)), 'repositories') + os.sep,)
+_DATA_FILES = {os.path.abspath(path) for path in (__file__, database.__file__, contextlib.__file__)}
+_data_layer_codes = {}
+
+
+def load_query_settings(config_path=database.CONFIG_PATH):
+    # Paramètres de la section [requetes] du fichier de configuration :
+    # seuil_lent_ms, journal, taille_journal_ko, archives
+    config = configparser.ConfigParser()
+    config.read(config_path, encoding='utf-8')
+    section = config['requetes'] if config.has_section('requetes') else {}
+    try:
+        return {
+            'slow_ms': float(section.get('seuil_lent_ms', SLOW_QUERY_MS)),
+            'log_path': section.get('journal', SLOW_LOG_PATH),
+            'max_kb': int(section.get('taille_journal_ko', SLOW_LOG_KB)),
+            'backups': int(section.get('archives', SLOW_LOG_BACKUPS)),
+        }
+    except ValueError as e:
+        raise ValueError(f"Valeur invalide dans la section [requetes]: {e}")
+
+
+@contextlib.contextmanager
+def tagged(tag):
+    # Rattacher les requêtes exécutées dans le bloc à l'action "tag"
+    token = current_tag.set(tag)
+    try:
+        yield
+    finally:
+        current_tag.reset(token)
+
+
+def caller_tag():
+    # Nom de la première fonction appelante hors de la couche de données
+    # (utilisé quand aucune étiquette n'est posée)
+    frame = sys._getframe(1)
+    while frame is not None:
+        code = frame.f_code
+        in_layer = _data_layer_codes.get(code)
+        if in_layer is None:
+            filename = os.path.abspath(code.co_filename)
+            in_layer = filename in _DATA_FILES or filename.startswith(_DATA_LAYER)
+            _data_layer_codes[code] = in_layer
+        if not in_layer:
+            return code.co_name
+        frame = frame.f_back
+    return None
+
+
+class Histogram:
+    # Histogramme des durées d'une requête (ms)
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = {}
+
+    def add(self, ms):
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+        bucket = int(math.log(ms * 1000) / _LOG_GROWTH) if ms > 0.001 else 0
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, q):
+        # Borne supérieure de la classe contenant le q-ième quantile (0 < q <= 1)
+        rang = q * self.count
+        cumul = 0
+        for bucket in sorted(self.buckets):
+            cumul += self.buckets[bucket]
+            if cumul >= rang:
+                return min(BUCKET_GROWTH ** (bucket + 1) / 1000, self.max)
+        return self.max
+
+
+class TimedCursor(sqlite3.Cursor):
+    # Curseur chronométré : la durée d'une instruction comprend son exécution et
+    # la lecture de ses lignes. Elle est enregistrée à l'instruction suivante ou
+    # à la fermeture du curseur.
+
+    def __init__(self, conn, stats):
+        super().__init__(conn)
+        self._stats = stats
+        self._sql = None
+        self._params = None
+        self._elapsed = 0.0
+
+    def _start(self, sql, params, elapsed):
+        self._sql = sql
+        self._params = params
+        self._elapsed = elapsed
+
+    def _finish(self):
+        if self._sql is not None:
+            sql, self._sql = self._sql, None
+            self._stats.record(self.connection, sql, self._params, self._elapsed)
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        debut = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._start(sql, parameters, time.perf_counter() - debut)
+
+    def executemany(self, sql, seq_of_parameters):
+        # Le premier jeu de paramètres sert au plan d'exécution
+        self._finish()
+        rows = iter(seq_of_parameters)
+        first = next(rows, None)
+
+        def all_rows():
+            if first is not None:
+                yield first
+                yield from rows
+
+        debut = time.perf_counter()
+        try:
+            return super().executemany(sql, all_rows())
+        finally:
+            self._start(sql, first or (), time.perf_counter() - debut)
+
+    def fetchone(self):
+        debut = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self._elapsed += time.perf_counter() - debut
+
+    def fetchmany(self, size=None):
+        debut = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            self._elapsed += time.perf_counter() - debut
+
+    def fetchall(self):
+        debut = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._elapsed += time.perf_counter() - debut
+            self._finish()
+
+    def __next__(self):
+        debut = time.perf_counter()
+        try:
+            return super().__next__()
+        finally:
+            self._elapsed += time.perf_counter() - debut
+
+    def close(self):
+        self._finish()
+        super().close()
+
+
+class QueryStats:
+    # Statistiques des requêtes par (action, requête) et journal des requêtes lentes.
+    # Partagé par tous les threads (les enregistrements sont protégés par un verrou).
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS, log_path=SLOW_LOG_PATH, max_kb=SLOW_LOG_KB,
+                 backups=SLOW_LOG_BACKUPS):
+        self.slow_ms = slow_ms
+        self.log_path = log_path
+        self.max_kb = max_kb
+        self.backups = backups
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._logger = None
+
+    def cursor(self, conn):
+        # Fabrique de curseurs pour Connection.cursor()
+        return TimedCursor(conn, self)
+
+    def _log(self):
+        # Journal à rotation (ouvert à la première écriture)
+        if self._logger is None:
+            handler = RotatingFileHandler(self.log_path, maxBytes=self.max_kb * 1024,
+                                          backupCount=self.backups, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            self._logger = logging.getLogger(f'clinique.requetes.{id(self)}')
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+            self._logger.addHandler(handler)
+        return self._logger
+
+    def record(self, conn, sql, params, elapsed):
+        # Enregistrer une instruction exécutée en "elapsed" secondes
+        tag = current_tag.get() or caller_tag() or '?'
+        ms = elapsed * 1000
+        key = (tag, ' '.join(sql.split()))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.add(ms)
+
+        if ms >= self.slow_ms:
+            self._log_slow(conn, tag, key[1], params, ms)
+
+    def _log_slow(self, conn, tag, sql, params, ms):
+        # Écrire la requête lente et son plan d'exécution
+        try:
+            plan = "\n".join(f"    {row[3]}" for row in
+                             conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall())
+        except (sqlite3.Error, ValueError) as e:
+            plan = f"    (plan indisponible: {e})"
+        self._log().info(f"{ms:.1f} ms [{tag}] {sql}\n    paramètres: {params!r:.200}\n{plan}")
+
+    def summary(self):
+        # [(action, requête, nombre, p50, p95, max, total)], par durée totale décroissante
+        with self._lock:
+            items = list(self._histograms.items())
+        rows = [(tag, sql, h.count, h.percentile(0.5), h.percentile(0.95), h.max, h.total)
+                for (tag, sql), h in items]
+        rows.sort(key=lambda row: row[6], reverse=True)
+        return rows
+
+    def format_summary(self, limit=None):
+        # Tableau des statistiques (durées en ms)
+        lines = [f"{'nombre':>8} {'p50':>9} {'p95':>9} {'max':>9} {'total':>10}  action: requête"]
+        for tag, sql, count, p50, p95, maximum, total in self.summary()[:limit]:
+            lines.append(f"{count:>8} {p50:>9.2f} {p95:>9.2f} {maximum:>9.2f} {total:>10.1f}  "
+                         f"{tag}: {sql[:120]}")
+        return "\n".join(lines)
+
+    def log_summary(self):
+        # Écrire les statistiques dans le journal (à la fermeture de l'application)
+        if self._histograms:
+            self._log().info("Statistiques des requêtes (ms)\n" + self.format_summary())
+
+    def close(self):
+        # Fermer le journal
+        if self._logger is not None:
+            for handler in list(self._logger.handlers):
+                self._logger.removeHandler(handler)
+                handler.close()
+            self._logger = None
+
+
+class StartupTimer:
+    # Durée des étapes du démarrage de l'application (option --profile-startup)
+
+    def __init__(self):
+        self.debut = self._last = time.perf_counter()
+        self.steps = []
+
+    def mark(self, etape):
+        # Terminer l'étape en cours (durée depuis l'étape précédente)
+        now = time.perf_counter()
+        self.steps.append((etape, (now - self._last) * 1000))
+        self._last = now
+
+    def format(self):
+        # Tableau des étapes et durée totale (ms)
+        width = max((len(etape) for etape, _ in self.steps), default=0)
+        lines = ["Démarrage (ms)"]
+        lines += [f"  {etape:<{width}} {ms:>9.1f}" for etape, ms in self.steps]
+        lines.append(f"  {'total':<{width}} {(self._last - self.debut) * 1000:>9.1f}")
+        return "\n".join(lines)
@@ -0,0 +1,287 @@
+import time
+
+from database import fold
+
+# Colonnes repliées (minuscules, sans accents) ajoutées par la migration 5 :
+# table -> {colonne repliée: colonne source}
+FOLDED_COLUMNS = {
+    'Proprietaire': {'nom_norm': 'nom', 'prenom_norm': 'prenom', 'email_norm': 'email'},
+    'Animal': {'nom_norm': 'nom', 'espece_norm': 'espece'},
+    'Veterinaire': {'nom_norm': 'nom', 'email_norm': 'email'},
+    'Medicament': {'nom_norm': 'nom'},
+}
+
+
+def add_folded_columns(conn):
+    # Ajouter les colonnes repliées et les remplir avec la fonction Python fold
+    # (les écritures suivantes passent par les repositories, qui les tiennent à jour)
+    conn.create_function('fold', 1, fold, deterministic=True)
+    for table, columns in FOLDED_COLUMNS.items():
+        for column in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+        conn.execute(f"UPDATE {table} SET {', '.join(f'{c} = fold({s})' for c, s in columns.items())}")
+
+
+# Déclencheurs synchronisant l'index plein texte consultation_fts avec la table
+# Consultation (migration 4, recréés par la migration 7)
+CONSULTATION_FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS consultation_fts_insert AFTER INSERT ON Consultation BEGIN
+        INSERT INTO consultation_fts(rowid, diagnostic, traitement)
+        VALUES (new.id_consultation, new.diagnostic, new.traitement);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS consultation_fts_delete AFTER DELETE ON Consultation BEGIN
+        INSERT INTO consultation_fts(consultation_fts, rowid, diagnostic, traitement)
+        VALUES ('delete', old.id_consultation, old.diagnostic, old.traitement);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS consultation_fts_update
+    AFTER UPDATE OF diagnostic, traitement ON Consultation BEGIN
+        INSERT INTO consultation_fts(consultation_fts, rowid, diagnostic, traitement)
+        VALUES ('delete', old.id_consultation, old.diagnostic, old.traitement);
+        INSERT INTO consultation_fts(rowid, diagnostic, traitement)
+        VALUES (new.id_consultation, new.diagnostic, new.traitement);
+    END
+    """,
+]
+
+# Tables dont les modifications sont comptées dans la table Version (migration 6)
+VERSIONED_TABLES = ('Proprietaire', 'Animal', 'Veterinaire', 'Consultation', 'Medicament', 'Ordonnance')
+
+
+def add_version_counters(conn):
+    # Compteur de modifications par table, incrémenté une fois par instruction ou
+    # transaction d'écriture (database.bump_versions). La valeur initiale est
+    # aléatoire : deux bases différentes n'ont pas les mêmes versions.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS Version (
+            nom_table TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+    for table in VERSIONED_TABLES:
+        conn.execute("INSERT OR IGNORE INTO Version (nom_table, version) VALUES (?, abs(random() >> 16))",
+                     (table,))
+
+
+def cascade_consultation_animal(conn):
+    # Reconstruire Consultation pour ajouter ON DELETE CASCADE à sa clé étrangère
+    # vers Animal (SQLite ne modifie pas une contrainte existante) : supprimer un
+    # animal, ou son propriétaire, supprime ses consultations et leurs ordonnances.
+    # migrate désactive foreign_keys : DROP TABLE ne supprime donc pas les
+    # ordonnances en cascade. Les IDs (rowid de l'index plein texte) et le compteur
+    # AUTOINCREMENT sont conservés; les index et déclencheurs plein texte, supprimés
+    # avec l'ancienne table, sont recréés.
+    sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'Consultation'").fetchone()
+    conn.execute('''
+        CREATE TABLE Consultation_nouvelle (
+            id_consultation INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            diagnostic TEXT NOT NULL,
+            traitement TEXT,
+            id_animal INTEGER NOT NULL,
+            id_veterinaire INTEGER NOT NULL,
+            FOREIGN KEY (id_animal) REFERENCES Animal (id_animal) ON DELETE CASCADE,
+            FOREIGN KEY (id_veterinaire) REFERENCES Veterinaire (id_veterinaire)
+        )
+    ''')
+    columns = 'id_consultation, date, diagnostic, traitement, id_animal, id_veterinaire'
+    conn.execute(f"INSERT INTO Consultation_nouvelle ({columns}) SELECT {columns} FROM Consultation")
+    conn.execute("DROP TABLE Consultation")
+    conn.execute("ALTER TABLE Consultation_nouvelle RENAME TO Consultation")
+    if sequence is not None:
+        conn.execute("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = 'Consultation'", sequence)
+
+    for statement in ('CREATE INDEX idx_consultation_veterinaire ON Consultation(id_veterinaire)',
+                      'CREATE INDEX idx_consultation_animal ON Consultation(id_animal)',
+                      'CREATE INDEX idx_consultation_date ON Consultation(date)',
+                      *CONSULTATION_FTS_TRIGGERS):
+        conn.execute(statement)
+
+    # Consultations existantes dont l'animal ou le vétérinaire n'existe plus
+    # (écrites sans contrôle des clés étrangères) : signalées, pas supprimées
+    orphelines = len(conn.execute("PRAGMA foreign_key_check(Consultation)").fetchall())
+    if orphelines:
+        print(f"Attention: {orphelines} consultation(s) orpheline(s), "
+              f"à supprimer avec python orphans.py")
+
+
+# Migrations du schéma, identifiées par PRAGMA user_version.
+# Chaque migration est un triplet (version, description, étapes); une étape est
+# une instruction SQL ou une fonction recevant la connexion. Une base existante
+# est mise à niveau sur place : seules les migrations de version supérieure à
+# son user_version sont appliquées.
+MIGRATIONS = [
+    (1, "Schéma initial", [
+        '''
+        CREATE TABLE IF NOT EXISTS Proprietaire (
+            id_proprietaire INTEGER PRIMARY KEY AUTOINCREMENT,
+            nom TEXT NOT NULL,
+            prenom TEXT NOT NULL,
+            telephone TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            adresse TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS Animal (
+            id_animal INTEGER PRIMARY KEY AUTOINCREMENT,
+            nom TEXT NOT NULL,
+            espece TEXT NOT NULL,
+            race TEXT,
+            age INTEGER CHECK (age >= 0),
+            poids REAL,
+            id_proprietaire INTEGER,
+            FOREIGN KEY (id_proprietaire) REFERENCES Proprietaire (id_proprietaire) ON DELETE CASCADE
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS Veterinaire (
+            id_veterinaire INTEGER PRIMARY KEY AUTOINCREMENT,
+            nom TEXT NOT NULL,
+            specialisation TEXT,
+            telephone TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS Consultation (
+            id_consultation INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            diagnostic TEXT NOT NULL,
+            traitement TEXT,
+            id_animal INTEGER NOT NULL,
+            id_veterinaire INTEGER NOT NULL,
+            FOREIGN KEY (id_animal) REFERENCES Animal (id_animal),
+            FOREIGN KEY (id_veterinaire) REFERENCES Veterinaire (id_veterinaire)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS Medicament (
+            id_medicament INTEGER PRIMARY KEY AUTOINCREMENT,
+            nom TEXT NOT NULL,
+            description TEXT,
+            posologie TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS Ordonnance (
+            id_consultation INTEGER,
+            id_medicament INTEGER,
+            quantite INTEGER CHECK (quantite > 0),
+            PRIMARY KEY (id_consultation, id_medicament),
+            FOREIGN KEY (id_consultation) REFERENCES Consultation (id_consultation) ON DELETE CASCADE,
+            FOREIGN KEY (id_medicament) REFERENCES Medicament (id_medicament) ON DELETE CASCADE
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_consultation_veterinaire ON Consultation(id_veterinaire)',
+    ]),
+    (2, "Index de recherche par préfixe du nom", [
+        # Insensibles à la casse : utilisés par les combobox de recherche (LIKE 'préfixe%')
+        'CREATE INDEX IF NOT EXISTS idx_proprietaire_nom ON Proprietaire(nom COLLATE NOCASE)',
+        'CREATE INDEX IF NOT EXISTS idx_animal_nom ON Animal(nom COLLATE NOCASE)',
+        'CREATE INDEX IF NOT EXISTS idx_veterinaire_nom ON Veterinaire(nom COLLATE NOCASE)',
+        'CREATE INDEX IF NOT EXISTS idx_medicament_nom ON Medicament(nom COLLATE NOCASE)',
+    ]),
+    (3, "Index des clés étrangères et des dates de consultation", [
+        # Jointures Animal -> Proprietaire, Consultation -> Animal et Ordonnance -> Medicament
+        'CREATE INDEX IF NOT EXISTS idx_animal_proprietaire ON Animal(id_proprietaire)',
+        'CREATE INDEX IF NOT EXISTS idx_consultation_animal ON Consultation(id_animal)',
+        'CREATE INDEX IF NOT EXISTS idx_ordonnance_medicament ON Ordonnance(id_medicament)',
+        # Tri ORDER BY c.date DESC et pagination des listes de consultations et d'ordonnances
+        'CREATE INDEX IF NOT EXISTS idx_consultation_date ON Consultation(date)',
+    ]),
+    (4, "Recherche plein texte des diagnostics et traitements", [
+        # Index FTS5 à contenu externe (le texte reste dans Consultation), insensible
+        # à la casse et aux accents
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS consultation_fts USING fts5(
+            diagnostic, traitement,
+            content='Consultation', content_rowid='id_consultation',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        # Synchronisation de l'index avec la table
+        *CONSULTATION_FTS_TRIGGERS,
+        # Indexer les consultations existantes
+        "INSERT INTO consultation_fts(consultation_fts) VALUES ('rebuild')",
+    ]),
+    (5, "Colonnes repliées pour la recherche sans accents", [
+        add_folded_columns,
+        # Recherche par préfixe et filtres des tableaux (remplacent les index NOCASE de la migration 2)
+        'CREATE INDEX IF NOT EXISTS idx_proprietaire_nom_norm ON Proprietaire(nom_norm)',
+        'CREATE INDEX IF NOT EXISTS idx_proprietaire_prenom_norm ON Proprietaire(prenom_norm)',
+        'CREATE INDEX IF NOT EXISTS idx_proprietaire_email_norm ON Proprietaire(email_norm)',
+        'CREATE INDEX IF NOT EXISTS idx_animal_nom_norm ON Animal(nom_norm)',
+        'CREATE INDEX IF NOT EXISTS idx_animal_espece_norm ON Animal(espece_norm)',
+        'CREATE INDEX IF NOT EXISTS idx_veterinaire_nom_norm ON Veterinaire(nom_norm)',
+        'CREATE INDEX IF NOT EXISTS idx_veterinaire_email_norm ON Veterinaire(email_norm)',
+        'CREATE INDEX IF NOT EXISTS idx_medicament_nom_norm ON Medicament(nom_norm)',
+        'DROP INDEX IF EXISTS idx_proprietaire_nom',
+        'DROP INDEX IF EXISTS idx_animal_nom',
+        'DROP INDEX IF EXISTS idx_veterinaire_nom',
+        'DROP INDEX IF EXISTS idx_medicament_nom',
+    ]),
+    (6, "Compteurs de modifications des tables", [
+        add_version_counters,
+    ]),
+    (7, "Suppression en cascade des consultations d'un animal", [
+        cascade_consultation_animal,
+    ]),
+]
+
+# Version du schéma attendue par l'application
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    # Version actuelle du schéma de la base
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, verbose=True):
+    # Appliquer les migrations en attente dans une seule transaction.
+    # Les clés étrangères ne sont pas contrôlées pendant les migrations (une table
+    # reconstruite est supprimée puis remplacée) : ce réglage ne peut changer
+    # qu'en dehors d'une transaction.
+    # Retourne le rapport [(version, description, durée en secondes)].
+    version = schema_version(conn)
+    pending = [m for m in MIGRATIONS if m[0] > version]
+    if not pending:
+        return []
+
+    report = []
+    if conn.in_transaction:
+        conn.commit()
+    foreign_keys = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+    conn.execute("PRAGMA foreign_keys = OFF")
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for version, description, steps in pending:
+            debut = time.perf_counter()
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {version}")
+            report.append((version, description, time.perf_counter() - debut))
+
+        # Utilisation d'instruction TCL pour valider la transaction
+        conn.commit()
+    except BaseException:
+        conn.rollback()  # Utilisation d'instruction TCL pour annuler la transaction
+        raise
+    finally:
+        conn.execute(f"PRAGMA foreign_keys = {foreign_keys}")
+
+    # Rapport des durées
+    if verbose:
+        for version, description, duree in report:
+            print(f"Migration {version} ({description}) appliquée en {duree * 1000:.1f} ms")
+        print(f"Schéma de la base à la version {report[-1][0]} "
+              f"({sum(r[2] for r in report) * 1000:.1f} ms au total)")
+    return report
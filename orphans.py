@@ -0,0 +1,184 @@
+import argparse
+import configparser
+import time
+from datetime import datetime
+
+from database import CONFIG_PATH, ConnectionManager, DB_PATH, bump_versions
+from migrations import migrate
+
+# Suppression des lignes orphelines : clé étrangère renseignée vers une ligne
+# parente qui n'existe plus (données écrites sans PRAGMA foreign_keys, par un
+# autre outil ou avant la migration 7). Chaque table est parcourue par tranches
+# de sa clé primaire; une tranche est lue sans verrou d'écriture, puis supprimée
+# dans une transaction courte si elle contient des orphelins. Chaque ligne est
+# vérifiée par la clé primaire de la table parente.
+
+# (table, colonne des tranches (début de la clé primaire), [(colonne, table parente, clé parente)]),
+# des feuilles vers les racines : les orphelins d'une table sont supprimés avant
+# ceux de sa table parente, dont la suppression n'emporte plus en cascade que des
+# lignes valides
+ORPHAN_CHECKS = [
+    ('Ordonnance', 'id_consultation', [('id_consultation', 'Consultation', 'id_consultation'),
+                                       ('id_medicament', 'Medicament', 'id_medicament')]),
+    ('Consultation', 'id_consultation', [('id_animal', 'Animal', 'id_animal'),
+                                         ('id_veterinaire', 'Veterinaire', 'id_veterinaire')]),
+    ('Animal', 'id_animal', [('id_proprietaire', 'Proprietaire', 'id_proprietaire')]),
+]
+
+# Lignes filles supprimées en cascade (ON DELETE CASCADE, migration 7) :
+# table parente -> [(table fille, colonne, clé parente)]
+CASCADES = {
+    'Animal': [('Consultation', 'id_animal', 'id_animal')],
+    'Consultation': [('Ordonnance', 'id_consultation', 'id_consultation')],
+}
+
+# Lignes examinées par tranche
+BATCH_SIZE = 5000
+
+# Parcours automatique de l'application (désactivé par défaut) : intervalle entre
+# deux passages (heures) et journal des rapports
+SWEEP_INTERVAL_H = 6
+SWEEP_LOG_PATH = 'orphelins_supprimes.log'
+
+
+def _orphelin(table):
+    # Condition vraie pour une ligne orpheline de la table (colonnes qualifiées par son nom)
+    references = next(r for t, _, r in ORPHAN_CHECKS if t == table)
+    return " OR ".join(f"({table}.{c} IS NOT NULL AND NOT EXISTS "
+                       f"(SELECT 1 FROM {parent} p WHERE p.{key} = {table}.{c}))"
+                       for c, parent, key in references)
+
+
+def load_sweep_settings(config_path=CONFIG_PATH):
+    # Paramètres de la section [orphelins] du fichier de configuration
+    # (nettoyage_auto, intervalle_h, journal); None si le parcours automatique est désactivé
+    config = configparser.ConfigParser()
+    config.read(config_path, encoding='utf-8')
+    try:
+        active = config.get('orphelins', 'nettoyage_auto', fallback='non')
+        if active.strip().lower() not in ('1', 'oui', 'vrai', 'true', 'yes', 'on'):
+            return None
+        return {
+            'interval_ms': int(config.getfloat('orphelins', 'intervalle_h', fallback=SWEEP_INTERVAL_H) * 3600000),
+            'log_path': config.get('orphelins', 'journal', fallback=SWEEP_LOG_PATH),
+        }
+    except ValueError as e:
+        raise ValueError(f"Valeur invalide dans la section [orphelins]: {e}")
+
+
+class OrphanSweeper:
+    # Parcours incrémental : step() traite une tranche, ce qui permet à
+    # l'application de l'exécuter tranche par tranche dans le thread de travail
+    # sans bloquer les autres requêtes. Avec dry_run, les orphelins sont
+    # seulement comptés.
+
+    def __init__(self, db, dry_run=False, batch_size=BATCH_SIZE):
+        self.db = db
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        # Lignes supprimées (ou à supprimer) par table : orphelins et lignes
+        # emportées en cascade par la suppression d'un orphelin
+        self.report = {table: 0 for table, *_ in reversed(ORPHAN_CHECKS)}
+        self._table = 0
+        self._apres = None
+
+    def finished(self):
+        return self._table >= len(ORPHAN_CHECKS)
+
+    def step(self):
+        # Traiter la tranche suivante; retourne False quand toutes les tables ont été parcourues
+        if self.finished():
+            return False
+        table, column, references = ORPHAN_CHECKS[self._table]
+        where, params = (f"WHERE {column} > ?", (self._apres,)) if self._apres is not None else ("", ())
+
+        # Fin de la tranche (lecture seule, hors de la transaction d'écriture)
+        with self.db.cursor() as cursor:
+            cursor.execute(f"SELECT MAX({column}) FROM (SELECT {column} FROM {table} {where} "
+                           f"ORDER BY {column} LIMIT ?)", (*params, self.batch_size))
+            fin = cursor.fetchone()[0]
+        if fin is None:
+            self._table += 1
+            self._apres = None
+            return not self.finished()
+
+        tranche = f"{where} {'AND' if where else 'WHERE'} {column} <= ? AND ({_orphelin(table)})"
+        selection = f"SELECT {{key}} FROM {table} {tranche}"
+        # Recherche des orphelins en lecture seule : le verrou d'écriture n'est pris
+        # que pour une tranche qui en contient
+        with self.db.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {table} {tranche}", (*params, fin))
+            orphelins = cursor.fetchone()[0]
+            if orphelins and self.dry_run:
+                # Lignes qui seraient emportées en cascade
+                self._count_cascades(cursor, table, selection, (*params, fin))
+                self.report[table] += orphelins
+        if orphelins and not self.dry_run:
+            with self.db.cursor() as cursor:
+                # Recomptage, comptage des cascades et suppression dans une même transaction
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute(f"SELECT COUNT(*) FROM {table} {tranche}", (*params, fin))
+                orphelins = cursor.fetchone()[0]
+                if orphelins:
+                    self._count_cascades(cursor, table, selection, (*params, fin))
+                    self.report[table] += orphelins
+                    cursor.execute(f"DELETE FROM {table} {tranche}", (*params, fin))
+                    bump_versions(cursor, self.db.cascade_tables(table))
+        self._apres = fin
+        return True
+
+    def _count_cascades(self, cursor, table, selection, params):
+        # Ajouter au rapport les lignes filles (et leurs descendantes) des lignes de
+        # "table" choisies par "selection" ({key} : colonne à retourner). Les filles
+        # elles-mêmes orphelines sont exclues : leur table a déjà été parcourue (en
+        # simulation, elles y ont été comptées; sinon elles ont été supprimées).
+        for enfant, column, key in CASCADES.get(table, ()):
+            filles = f"FROM {enfant} WHERE {column} IN ({selection.format(key=key)}) AND NOT ({_orphelin(enfant)})"
+            cursor.execute(f"SELECT COUNT(*) {filles}", params)
+            count = cursor.fetchone()[0]
+            if count:
+                self.report[enfant] += count
+                self._count_cascades(cursor, enfant, f"SELECT {{key}} {filles}", params)
+
+    def run(self):
+        # Parcourir toutes les tables; retourne le rapport {table: lignes supprimées}
+        while self.step():
+            pass
+        return self.report
+
+
+def format_report(report, dry_run=False):
+    # Rapport lisible : "Animal: 3, Consultation: 0, Ordonnance: 12"
+    action = "trouvés" if dry_run else "supprimés"
+    return f"Orphelins {action}: " + ", ".join(f"{table}: {count}" for table, count in report.items())
+
+
+def log_report(path, report, erreur=None):
+    # Ajouter le rapport d'un passage (et l'erreur qui l'a interrompu) au journal
+    ligne = format_report(report)
+    if erreur is not None:
+        ligne += f" (parcours interrompu: {erreur})"
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(f"{datetime.now():%Y-%m-%d %H:%M:%S} {ligne}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suppression des lignes orphelines de la base de la clinique")
+    parser.add_argument('--base', default=DB_PATH, help="chemin de la base de données")
+    parser.add_argument('--simulation', action='store_true', help="compter les orphelins sans les supprimer")
+    parser.add_argument('--lot', type=int, default=BATCH_SIZE, help="nombre de lignes examinées par transaction")
+    args = parser.parse_args(argv)
+
+    db = ConnectionManager(args.base)
+    # Les suppressions en cascade des consultations supposent la migration 7
+    migrate(db.connection())
+    debut = time.perf_counter()
+    try:
+        report = OrphanSweeper(db, dry_run=args.simulation, batch_size=args.lot).run()
+    finally:
+        db.close_all()
+    print(f"{format_report(report, args.simulation)} ({time.perf_counter() - debut:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
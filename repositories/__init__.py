@@ -0,0 +1,44 @@
+# Couche d'accès aux données, indépendante de l'interface graphique :
+# un dépôt par entité, utilisable par l'application, les traitements par lots,
+# les tests de charge ou une API.
+from repositories.base import FETCH_SIZE, Repository, ValidationError, date_range
+from repositories.cache import EntityCache
+from repositories.proprietaire import Proprietaire, ProprietaireRepository
+from repositories.animal import Animal, AnimalRepository
+from repositories.veterinaire import Veterinaire, VeterinaireRepository, veterinaire_label
+from repositories.consultation import Consultation, ConsultationRepository
+from repositories.medicament import Medicament, MedicamentRepository
+from repositories.ordonnance import Ordonnance, OrdonnanceRepository
+
+
+class Repositories:
+    # Ensemble des dépôts partageant un même gestionnaire de connexions.
+    # Avec cache=True, les dépôts des entités gardent leurs entités en mémoire
+    # (EntityCache) : tableaux, listes de recherche et lectures par ID.
+    # on_change(table, IDs, suppression) est appelée après chaque écriture.
+    def __init__(self, db, cache=False, on_change=None):
+        self.db = db
+        self.proprietaires = ProprietaireRepository(db)
+        self.animaux = AnimalRepository(db)
+        self.veterinaires = VeterinaireRepository(db)
+        self.consultations = ConsultationRepository(db)
+        self.medicaments = MedicamentRepository(db)
+        self.ordonnances = OrdonnanceRepository(db)
+        for repository in (self.proprietaires, self.animaux, self.veterinaires,
+                           self.consultations, self.medicaments, self.ordonnances):
+            repository.on_change = on_change
+        if cache:
+            for repository in (self.proprietaires, self.animaux, self.veterinaires,
+                               self.consultations, self.medicaments):
+                repository.cache = EntityCache(repository)
+
+
+__all__ = [
+    'FETCH_SIZE', 'Repository', 'ValidationError', 'Repositories', 'date_range', 'EntityCache',
+    'Proprietaire', 'ProprietaireRepository',
+    'Animal', 'AnimalRepository',
+    'Veterinaire', 'VeterinaireRepository', 'veterinaire_label',
+    'Consultation', 'ConsultationRepository',
+    'Medicament', 'MedicamentRepository',
+    'Ordonnance', 'OrdonnanceRepository',
+]
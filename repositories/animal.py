@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+
+from database import fold
+from repositories.base import Repository, ValidationError
+
+
+@dataclass
+class Animal:
+    nom: str
+    espece: str
+    race: str | None = None
+    age: int | None = None
+    poids: float | None = None
+    id_proprietaire: int | None = None
+    id_animal: int | None = None
+
+
+class AnimalRepository(Repository):
+    table = 'Animal'
+    key = 'id_animal'
+    entity = Animal
+    columns = ('nom', 'espece', 'race', 'age', 'poids', 'id_proprietaire')
+    folded = {'nom_norm': 'nom', 'espece_norm': 'espece'}
+    # Lignes du tableau des animaux, avec le nom du propriétaire
+    # (l'ID du propriétaire est chargé après les colonnes affichées, pour la sélection)
+    row_columns = '''t.id_animal, t.nom, t.espece, t.race, t.age, t.poids,
+                     p.nom || ' ' || p.prenom as proprietaire, t.id_proprietaire'''
+    row_from = 'Animal t LEFT JOIN Proprietaire p ON t.id_proprietaire = p.id_proprietaire'
+    row_tables = ('Animal', 'Proprietaire')
+    search_fields = ('nom', 'espece')
+    filters = {
+        'Nom': ('nom_norm', fold),
+        'Espèce': ('espece_norm', fold),
+    }
+
+    def validate(self, animal):
+        # Champs obligatoires
+        if not animal.nom or not animal.espece:
+            raise ValidationError("Veuillez remplir tous les champs obligatoires")
+
+        # Contrainte CHECK (age >= 0)
+        if animal.age is not None and animal.age < 0:
+            raise ValidationError("L'âge doit être supérieur ou égal à 0")
+
+    def label(self, row):
+        # Libellé dans les listes: "ID - Nom (Espèce)"
+        return f"{row[0]} - {row[1]} ({row[2]})"
@@ -0,0 +1,305 @@
+from operator import attrgetter
+
+from database import bump_versions, fold, prefix_range
+
+# Nombre de lignes lues à la fois lors d'un parcours complet (fetchmany)
+FETCH_SIZE = 1000
+
+
+def date_range(column, debut=None, fin=None):
+    # Clause WHERE d'un intervalle de dates au format YYYY-MM-DD, bornes incluses
+    # (une date de fin "2024-05" inclut tout le mois). Retourne (clause, paramètres).
+    conditions = []
+    params = []
+    if debut:
+        conditions.append(f"{column} >= ?")
+        params.append(debut)
+    if fin:
+        conditions.append(f"{column} < ?")
+        params.append(fin + '\uffff')
+    return ("WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+class ValidationError(ValueError):
+    # Donnée refusée par les règles de validation (message destiné à l'utilisateur)
+    pass
+
+
+class Repository:
+    # Accès aux données d'une table, sans dépendance à l'interface graphique.
+    # Les sous-classes définissent la table, sa clé primaire, l'entité (dataclass
+    # dont les champs sont les colonnes, clé primaire en dernier) et les colonnes.
+    table = None
+    key = None
+    entity = None
+    columns = ()
+    # Colonnes repliées (minuscules, sans accents) tenues à jour à chaque écriture :
+    # colonne repliée -> colonne source
+    folded = {}
+    # Lignes du tableau : colonnes (la clé primaire en premier) et clause FROM,
+    # la table ayant l'alias "t"
+    row_columns = None
+    row_from = None
+    # Filtres du tableau : libellé -> (colonne indexée, normalisation du texte saisi)
+    filters = {}
+    # Tables lues par les lignes du tableau (validation de l'instantané de démarrage)
+    row_tables = ()
+    # Champs de l'entité formant une ligne du tableau après la clé primaire, si ces
+    # lignes sont les colonnes de la table (sinon None : jointure, non servie par le cache)
+    row_fields = None
+    # Champs d'une ligne de recherche après la clé primaire (voir label)
+    search_fields = ('nom',)
+
+    def __init__(self, db):
+        self.db = db
+        # Cache des entités (repositories.cache.EntityCache), attaché par Repositories
+        self.cache = None
+        # Fonction appelée après chaque écriture : on_change(table, IDs, suppression)
+        # (bus des modifications de l'application, attaché par Repositories)
+        self.on_change = None
+        # Valeurs des colonnes d'une entité, sans la clé primaire (plus rapide que dataclasses.astuple)
+        self._values = attrgetter(*self.columns)
+        # Colonnes écrites par create, update et bulk_create (colonnes repliées comprises)
+        self._write_columns = (*self.columns, *self.folded)
+        self._sources = attrgetter(*self.folded.values()) if self.folded else None
+        # Colonnes puis sources des colonnes repliées, lues en un appel (insertion par lots)
+        self._batch_values = attrgetter(*self.columns, *self.folded.values())
+
+    def _row(self, entity):
+        # Valeurs écrites d'une entité : colonnes, puis colonnes repliées
+        values = self._values(entity)
+        if self._sources is None:
+            return values
+        sources = self._sources(entity)
+        if len(self.folded) == 1:
+            sources = (sources,)
+        return (*values, *map(fold, sources))
+
+    def table_row(self, entity):
+        # Ligne du tableau d'une entité en cache
+        return (getattr(entity, self.key), *(getattr(entity, f) for f in self.row_fields))
+
+    def search_row(self, entity):
+        # Ligne de recherche d'une entité en cache
+        return (getattr(entity, self.key), *(getattr(entity, f) for f in self.search_fields))
+
+    def label(self, row):
+        # Libellé d'une ligne de recherche dans les listes: "ID - Nom"
+        return f"{row[0]} - {row[1]}"
+
+    def _notify(self, ids, deleted=False, table=None):
+        # Signaler les lignes écrites (IDs, ou None si inconnus) une fois la transaction validée
+        if self.on_change is not None:
+            self.on_change(table or self.table, ids, deleted)
+
+    def _bump(self, cursor, count, deleted=False):
+        # Compter une écriture de "count" lignes dans la table Version : la table, et
+        # pour une suppression ses tables filles (cascades), sont incrémentées une fois.
+        # Retourne la version de la table lue dans la transaction (cache seulement).
+        if count:
+            bump_versions(cursor, self.db.cascade_tables(self.table) if deleted else (self.table,))
+        if self.cache is None:
+            return None
+        cursor.execute("SELECT version FROM Version WHERE nom_table = ?", (self.table,))
+        return cursor.fetchone()[0]
+
+    def validate(self, entity):
+        # Vérifier les règles de l'entité (lève ValidationError)
+        pass
+
+    def list(self):
+        # Toutes les entités de la table
+        with self.db.cursor() as cursor:
+            cursor.execute(f"SELECT {', '.join(self.columns)}, {self.key} FROM {self.table} ORDER BY {self.key}")
+            return [self.entity(*row) for row in cursor.fetchall()]
+
+    def read_all(self, limite):
+        # Au plus "limite" entités dans l'ordre de la clé primaire, avec le nom replié
+        # enregistré (nom_norm, celui de la recherche SQL) : couples (entité, nom replié).
+        # Chargement du cache.
+        with self.db.cursor() as cursor:
+            cursor.execute(f"SELECT {', '.join(self.columns)}, {self.key}, nom_norm FROM {self.table} "
+                           f"ORDER BY {self.key} LIMIT ?", (limite,))
+            return [(self.entity(*row[:-1]), row[-1]) for row in cursor.fetchall()]
+
+    def page_rows(self, apres, limite):
+        # Page de lignes du tableau dans l'ordre de la clé primaire.
+        # "apres" est la clé de la dernière ligne déjà lue (None pour la première page).
+        if self.cache is not None:
+            rows = self.cache.page(apres, limite)
+            if rows is not None:
+                return rows
+        query = f"SELECT {self.row_columns} FROM {self.row_from} {{where}} ORDER BY t.{self.key} LIMIT ?"
+        with self.db.cursor() as cursor:
+            if apres is None:
+                cursor.execute(query.format(where=""), (limite,))
+            else:
+                cursor.execute(query.format(where=f"WHERE t.{self.key} > ?"), (apres, limite))
+            return cursor.fetchall()
+
+    def filter_rows(self, champ, texte, apres, limite):
+        # Page de lignes du tableau dont la colonne du filtre "champ" commence par
+        # "texte", dans l'ordre de cette colonne (intervalle sur son index, sans tri).
+        # La valeur de la colonne est ajoutée en fin de ligne; "apres" est la clé
+        # (valeur, ID) de la dernière ligne déjà lue (None pour la première page).
+        column, normalize = self.filters[champ]
+        debut, fin = prefix_range(normalize(texte))
+        query = f"""
+            SELECT {self.row_columns}, t.{column} FROM {self.row_from}
+            WHERE t.{column} >= ? AND t.{column} < ? {{keyset}}
+            ORDER BY t.{column}, t.{self.key}
+            LIMIT ?
+        """
+        with self.db.cursor() as cursor:
+            if apres is None:
+                cursor.execute(query.format(keyset=""), (debut, fin, limite))
+            else:
+                cursor.execute(query.format(keyset=f"AND (t.{column}, t.{self.key}) > (?, ?)"),
+                               (debut, fin, *apres, limite))
+            return cursor.fetchall()
+
+    def _stream(self, query, params=(), size=FETCH_SIZE):
+        # Parcourir le résultat d'une requête par blocs de "size" lignes (fetchmany) :
+        # la mémoire utilisée ne dépend pas du nombre de lignes
+        with self.db.cursor() as cursor:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(size)
+                if not rows:
+                    break
+                yield from rows
+
+    def export_rows(self, size=FETCH_SIZE):
+        # Toutes les lignes de la table, dans l'ordre de la clé primaire.
+        # Retourne (noms des colonnes, itérateur des lignes).
+        columns = (self.key, *self.columns)
+        return columns, self._stream(f"SELECT {', '.join(columns)} FROM {self.table} ORDER BY {self.key}",
+                                     size=size)
+
+    def get(self, id):
+        # Entité par clé primaire (None si elle n'existe pas)
+        if self.cache is not None:
+            entity = self.cache.get(id)
+            if entity is not None:
+                return entity
+            version = self.cache.version
+        with self.db.cursor() as cursor:
+            cursor.execute(f"SELECT {', '.join(self.columns)}, {self.key} FROM {self.table} WHERE {self.key} = ?",
+                           (id,))
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        entity = self.entity(*row)
+        if self.cache is not None:
+            self.cache.store(entity, version)
+        return entity
+
+    def search(self, texte, limite):
+        # Rechercher par ID ou par préfixe du nom, sans tenir compte des accents ni de la
+        # casse (index sur nom_norm); retourne des couples (id, libellé)
+        if texte.isdigit():
+            entity = self.get(int(texte))
+            rows = [self.search_row(entity)] if entity is not None else []
+        else:
+            rows = self.cache.search(texte, limite) if self.cache is not None else None
+            if rows is None:
+                with self.db.cursor() as cursor:
+                    cursor.execute(f"""
+                        SELECT {self.key}, {', '.join(self.search_fields)} FROM {self.table}
+                        WHERE nom_norm >= ? AND nom_norm < ?
+                        ORDER BY nom_norm
+                        LIMIT ?
+                    """, (*prefix_range(fold(texte)), limite))
+                    rows = cursor.fetchall()
+        return [(row[0], self.label(row)) for row in rows]
+
+    def create(self, entity):
+        # Ajouter une entité; retourne son ID
+        self.validate(entity)
+        with self.db.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.table} ({', '.join(self._write_columns)}) "
+                           f"VALUES ({', '.join('?' * len(self._write_columns))})", self._row(entity))
+            id = cursor.lastrowid
+            version = self._bump(cursor, 1)
+        setattr(entity, self.key, id)
+        if self.cache is not None:
+            self.cache.put(entity, version)
+        self._notify([id])
+        return id
+
+    def update(self, entity):
+        # Modifier une entité existante (identifiée par sa clé primaire)
+        self.validate(entity)
+        with self.db.cursor() as cursor:
+            cursor.execute(f"UPDATE {self.table} SET {', '.join(f'{c} = ?' for c in self._write_columns)} "
+                           f"WHERE {self.key} = ?", (*self._row(entity), getattr(entity, self.key)))
+            count = cursor.rowcount
+            version = self._bump(cursor, count)
+        if self.cache is not None:
+            self.cache.put(entity, version, count)
+        if count:
+            self._notify([getattr(entity, self.key)])
+        return count
+
+    def delete(self, id):
+        # Supprimer une entité par clé primaire
+        with self.db.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE {self.key} = ?", (id,))
+            count = cursor.rowcount
+            version = self._bump(cursor, count, deleted=True)
+        if self.cache is not None:
+            self.cache.remove(id, version, count)
+        if count:
+            self._notify([id], deleted=True)
+        return count
+
+    def bulk_create(self, entities, batch_size=10000, validate=True):
+        # Ajouter des entités par lots (executemany, une transaction par lot);
+        # chaque entité reçoit son ID comme avec create. validate=False : entités
+        # déjà validées par l'appelant (import). Retourne le nombre d'entités ajoutées.
+        total = 0
+        batch = []
+        for entity in entities:
+            if validate:
+                self.validate(entity)
+            batch.append(entity)
+            if len(batch) >= batch_size:
+                total += self._insert_batch(batch)
+                batch = []
+        if batch:
+            total += self._insert_batch(batch)
+        return total
+
+    def _insert_batch(self, batch):
+        # Insérer un lot dans une transaction. Les IDs sont attribués explicitement
+        # à partir du plus grand ID (ou de sqlite_sequence) lu sous verrou d'écriture,
+        # ce qui évite une requête par ligne pour les connaître.
+        columns = (self.key, *self._write_columns)
+        query = f"INSERT INTO {self.table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        with self.db.cursor() as cursor:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(f"SELECT MAX({self.key}) FROM {self.table}")
+            last_id = cursor.fetchone()[0] or 0
+            cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (self.table,))
+            row = cursor.fetchone()
+            if row and row[0] > last_id:
+                last_id = row[0]
+
+            # Paramètres construits directement (colonnes, puis sources repliées) au fil
+            # de l'insertion, sans liste intermédiaire
+            ids = range(last_id + 1, last_id + 1 + len(batch))
+            n = len(self.columns)
+            if self.folded:
+                rows = ((id, *v[:n], *map(fold, v[n:])) for id, v in zip(ids, map(self._batch_values, batch)))
+            else:
+                rows = ((id, *v) for id, v in zip(ids, map(self._batch_values, batch)))
+            cursor.executemany(query, rows)
+            version = self._bump(cursor, len(batch))
+
+        # Le lot est validé : transmettre les IDs aux entités
+        for id, entity in zip(ids, batch):
+            setattr(entity, self.key, id)
+        if self.cache is not None:
+            self.cache.put_many(batch, version)
+        self._notify(list(ids))
+        return len(batch)
@@ -0,0 +1,191 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from dataclasses import replace
+
+from database import fold
+
+# Une table d'au plus COMPLETE_LIMIT lignes est chargée en entier : ses pages et
+# ses recherches par préfixe sont servies par le cache. Au-delà (ou pour les
+# tables dont les lignes sont des jointures), seules les LRU_SIZE entités lues
+# le plus récemment sont conservées.
+COMPLETE_LIMIT = 10000
+LRU_SIZE = 5000
+
+
+class EntityCache:
+    # Cache des entités d'un dépôt, partagé par le thread de Tk et le thread de
+    # travail (protégé par un verrou). Les écritures du dépôt le mettent à jour
+    # directement; les autres écritures sont détectées par PRAGMA data_version
+    # (autre connexion ou autre programme) et par total_changes suivi du compteur
+    # de la table Version (requêtes écrites à la main comme reassign_consultations,
+    # qui appellent database.bump_versions).
+
+    def __init__(self, repository, complete_limit=COMPLETE_LIMIT, lru_size=LRU_SIZE):
+        self.repository = repository
+        self.db = repository.db
+        # Chargement complet seulement si les lignes du tableau sont les colonnes de la table
+        self.complete_limit = complete_limit if repository.row_fields else 0
+        self.lru_size = lru_size
+
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self.version = None
+        # Table trop grande pour être chargée en entier (elle le reste)
+        self.too_large = False
+        self._clear()
+
+    def _clear(self):
+        self.entities = OrderedDict()
+        self.complete = False
+        # Table complète : clés triées, couples (nom replié, clé) triés et nom
+        # replié de chaque clé (nom_norm lu dans la base, ou fold(nom) pour une
+        # entité écrite par le dépôt, qui enregistre cette valeur)
+        self._keys = []
+        self._names = []
+        self._folded = {}
+
+    def invalidate(self):
+        # Oublier toutes les entités (écriture faite sans passer par le cache)
+        with self._lock:
+            self._clear()
+            self.version = None
+
+    def _check(self):
+        # Vider le cache si la table a pu être modifiée par une autre connexion.
+        # data_version change après une validation par une autre connexion : le
+        # cache est alors vidé, même si le compteur de la table Version n'a pas
+        # bougé (écriture d'un autre programme sans database.bump_versions). Après
+        # une écriture de cette connexion (total_changes), seul le compteur de la
+        # table est comparé. Tant que les deux sont inchangés, rien n'est relu.
+        conn = self.db.connection()
+        state = (conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes)
+        previous = getattr(self._local, 'state', None)
+        if previous == state:
+            return
+        self._local.state = state
+        version = self.db.table_versions((self.repository.table,)).get(self.repository.table)
+        with self._lock:
+            if previous is None or previous[0] != state[0] or version != self.version:
+                self._clear()
+                self.version = version
+
+    def _load(self):
+        # Charger toute la table si elle est assez petite (appelé sous verrou)
+        if self.complete or self.too_large or not self.complete_limit:
+            return self.complete
+        rows = self.repository.read_all(self.complete_limit + 1)
+        if len(rows) > self.complete_limit:
+            self.too_large = True
+            return False
+        key = self.repository.key
+        self.entities = OrderedDict((getattr(entity, key), entity) for entity, _ in rows)
+        self._keys = list(self.entities)
+        self._folded = {getattr(entity, key): nom for entity, nom in rows}
+        self._names = sorted((nom, k) for k, nom in self._folded.items())
+        self.complete = True
+        return True
+
+    def _add(self, entity):
+        # Ajouter ou remplacer une entité (appelé sous verrou). Une table complète
+        # tient aussi à jour ses listes triées; sinon la moins récente est oubliée.
+        key = getattr(entity, self.repository.key)
+        old = self.entities.pop(key, None)
+        self.entities[key] = entity
+        if self.complete:
+            if old is None:
+                insort(self._keys, key)
+            else:
+                self._names.remove((self._folded[key], key))
+            self._folded[key] = fold(entity.nom)
+            insort(self._names, (self._folded[key], key))
+        elif len(self.entities) > self.lru_size:
+            self.entities.popitem(last=False)
+
+    def _remove(self, key):
+        # Retirer une entité (appelé sous verrou)
+        old = self.entities.pop(key, None)
+        if old is not None and self.complete:
+            del self._keys[bisect_left(self._keys, key)]
+            self._names.remove((self._folded.pop(key), key))
+
+    def _written(self, version, changes):
+        # Une écriture du dépôt a amené la table à "version" en modifiant "changes"
+        # lignes (comptée une fois dans la table Version si changes > 0) : le cache
+        # reste valable seulement s'il était à jour juste avant (sinon une autre
+        # connexion a écrit entre-temps). Appelé sous verrou.
+        valid = self.version is not None and version == self.version + (1 if changes else 0)
+        if not valid:
+            self._clear()
+        self.version = version
+        return valid
+
+    def get(self, key):
+        # Copie de l'entité (None si elle n'est pas en cache)
+        self._check()
+        with self._lock:
+            entity = self.entities.get(key)
+            if entity is None:
+                return None
+            if not self.complete:
+                self.entities.move_to_end(key)
+            return replace(entity)
+
+    def store(self, entity, version):
+        # Entité lue dans la base après un défaut de cache, alors que le cache était
+        # à "version" (ignorée si une écriture l'a modifié entre-temps)
+        with self._lock:
+            if version is not None and version == self.version:
+                self._add(replace(entity))
+
+    def has_all(self):
+        # Vérifier que la table entière est en cache (la charger si elle est assez petite)
+        self._check()
+        with self._lock:
+            return self._load()
+
+    def put(self, entity, version, changes=1):
+        # Entité ajoutée ou modifiée par le dépôt
+        with self._lock:
+            if self._written(version, changes) and changes:
+                self._add(replace(entity))
+
+    def put_many(self, entities, version):
+        # Entités ajoutées par lot
+        with self._lock:
+            if self._written(version, len(entities)):
+                for entity in entities:
+                    self._add(replace(entity))
+
+    def remove(self, key, version, changes=1):
+        # Entité supprimée par le dépôt
+        with self._lock:
+            if self._written(version, changes):
+                self._remove(key)
+
+    def page(self, apres, limite):
+        # Lignes du tableau après la clé "apres", dans l'ordre de la clé
+        # (None si la table n'est pas entièrement en cache)
+        if not self.has_all():
+            return None
+        with self._lock:
+            debut = 0 if apres is None else bisect_right(self._keys, apres)
+            return [self.repository.table_row(self.entities[key]) for key in self._keys[debut:debut + limite]]
+
+    def search(self, texte, limite):
+        # Lignes de recherche par préfixe du nom replié enregistré (nom_norm, comme la
+        # recherche SQL), dans l'ordre de ce nom
+        # (None si la table n'est pas entièrement en cache)
+        if not self.has_all():
+            return None
+        with self._lock:
+            prefixe = fold(texte)
+            rows = []
+            index = bisect_left(self._names, (prefixe,))
+            while index < len(self._names) and len(rows) < limite:
+                nom, key = self._names[index]
+                if not nom.startswith(prefixe):
+                    break
+                rows.append(self.repository.search_row(self.entities[key]))
+                index += 1
+            return rows
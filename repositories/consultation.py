@@ -0,0 +1,149 @@
+from dataclasses import dataclass
+
+from database import fold, fts_query, prefix_range
+from repositories.base import FETCH_SIZE, Repository, ValidationError, date_range
+
+# Lignes du tableau des consultations : colonnes affichées, puis les IDs de
+# l'animal et du vétérinaire et la spécialisation (pour la sélection)
+VIEW_COLUMNS = ('id_consultation', 'date', 'animal', 'veterinaire', 'diagnostic', 'traitement',
+                'id_animal', 'id_veterinaire', 'specialisation')
+VIEW_QUERY = """
+    SELECT c.id_consultation, c.date,
+           a.nom || ' (' || a.espece || ')' as animal,
+           v.nom as veterinaire,
+           c.diagnostic, c.traitement,
+           c.id_animal, c.id_veterinaire, v.specialisation
+    FROM Consultation c
+    JOIN Animal a ON c.id_animal = a.id_animal
+    JOIN Veterinaire v ON c.id_veterinaire = v.id_veterinaire
+"""
+
+# Nombre maximal de correspondances classées par la recherche plein texte
+SEARCH_WINDOW = 5000
+
+
+@dataclass
+class Consultation:
+    date: str
+    diagnostic: str
+    id_animal: int
+    id_veterinaire: int
+    traitement: str | None = None
+    id_consultation: int | None = None
+
+
+class ConsultationRepository(Repository):
+    table = 'Consultation'
+    key = 'id_consultation'
+    entity = Consultation
+    columns = ('date', 'diagnostic', 'id_animal', 'id_veterinaire', 'traitement')
+    row_tables = ('Consultation', 'Animal', 'Veterinaire')
+
+    def validate(self, consultation):
+        # Champs obligatoires
+        if not consultation.date or not consultation.diagnostic:
+            raise ValidationError("Veuillez remplir tous les champs obligatoires")
+
+        # L'animal et le vétérinaire sont obligatoires
+        if consultation.id_animal is None or consultation.id_veterinaire is None:
+            raise ValidationError("Veuillez choisir un animal et un vétérinaire dans les listes")
+
+    def page_rows(self, apres, limite):
+        # Page de lignes du tableau des consultations, de la plus récente à la plus ancienne.
+        # "apres" est la clé (date, ID) de la dernière ligne déjà lue (None pour la première page).
+        query = VIEW_QUERY + """
+            {where}
+            ORDER BY c.date DESC, c.id_consultation DESC
+            LIMIT ?
+        """
+        with self.db.cursor() as cursor:
+            if apres is None:
+                cursor.execute(query.format(where=""), (limite,))
+            else:
+                cursor.execute(query.format(where="WHERE (c.date, c.id_consultation) < (?, ?)"),
+                               (*apres, limite))
+            return cursor.fetchall()
+
+    def export_rows(self, debut=None, fin=None, size=FETCH_SIZE):
+        # Consultations dans l'ordre chronologique (index idx_consultation_date, sans tri),
+        # éventuellement limitées à un intervalle de dates
+        columns = ('id_consultation', *self.columns)
+        where, params = date_range('date', debut, fin)
+        return columns, self._stream(f"""
+            SELECT {', '.join(columns)} FROM Consultation
+            {where}
+            ORDER BY date, id_consultation
+        """, params, size)
+
+    def export_view(self, debut=None, fin=None, size=FETCH_SIZE):
+        # Lignes du tableau des consultations dans l'ordre chronologique
+        where, params = date_range('c.date', debut, fin)
+        return VIEW_COLUMNS, self._stream(VIEW_QUERY + f"""
+            {where}
+            ORDER BY c.date, c.id_consultation
+        """, params, size)
+
+    def search_text(self, texte, limite, fenetre=SEARCH_WINDOW):
+        # Recherche plein texte dans les diagnostics et traitements (index consultation_fts).
+        # Les "fenetre" correspondances les plus récentes (ordre de l'index, sans tri) sont
+        # classées par pertinence (bm25, le diagnostic pèse double) : la durée reste bornée
+        # pour un mot présent dans des centaines de milliers de consultations.
+        # Retourne les lignes du tableau suivies du diagnostic et du traitement où les
+        # mots trouvés sont encadrés par « ».
+        query = fts_query(texte)
+        if not query:
+            return []
+        with self.db.cursor() as cursor:
+            cursor.execute("""
+                SELECT c.id_consultation, c.date,
+                       a.nom || ' (' || a.espece || ')' as animal,
+                       v.nom as veterinaire,
+                       c.diagnostic, c.traitement,
+                       c.id_animal, c.id_veterinaire, v.specialisation,
+                       m.diagnostic, m.traitement
+                FROM (
+                    SELECT * FROM (
+                        SELECT rowid AS id, bm25(consultation_fts, 2.0, 1.0) AS score,
+                               highlight(consultation_fts, 0, '«', '»') AS diagnostic,
+                               highlight(consultation_fts, 1, '«', '»') AS traitement
+                        FROM consultation_fts
+                        WHERE consultation_fts MATCH ?
+                        ORDER BY rowid DESC
+                        LIMIT ?
+                    )
+                    ORDER BY score, id DESC
+                    LIMIT ?
+                ) m
+                JOIN Consultation c ON c.id_consultation = m.id
+                JOIN Animal a ON c.id_animal = a.id_animal
+                JOIN Veterinaire v ON c.id_veterinaire = v.id_veterinaire
+                ORDER BY m.score, m.id DESC
+            """, (query, fenetre, limite))
+            return cursor.fetchall()
+
+    def search(self, texte, limite):
+        # Rechercher par ID, par préfixe de date ("2024-05") ou par préfixe du nom
+        # de l'animal (sans accents ni casse), les plus récentes d'abord; retourne des couples (id, libellé)
+        query = """
+            SELECT c.id_consultation, c.date, a.nom, a.espece
+            FROM Consultation c
+            JOIN Animal a ON c.id_animal = a.id_animal
+            {where}
+            ORDER BY c.date DESC
+            LIMIT ?
+        """
+        with self.db.cursor() as cursor:
+            if texte.isdigit():
+                cursor.execute(query.format(where="WHERE c.id_consultation = ?"), (int(texte), limite))
+            elif texte[:1].isdigit():
+                cursor.execute(query.format(where="WHERE c.date >= ? AND c.date < ?"),
+                               (texte, texte + '\uffff', limite))
+            elif texte:
+                cursor.execute(query.format(where="WHERE a.nom_norm >= ? AND a.nom_norm < ?"),
+                               (*prefix_range(fold(texte)), limite))
+            else:
+                cursor.execute(query.format(where=""), (limite,))
+            consultations = cursor.fetchall()
+
+        # Format: "ID - Date - Animal (Espèce)"
+        return [(c[0], f"{c[0]} - {c[1]} - {c[2]} ({c[3]})") for c in consultations]
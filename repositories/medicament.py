@@ -0,0 +1,38 @@
+from dataclasses import dataclass
+
+from database import fold
+from repositories.base import Repository, ValidationError
+
+
+@dataclass
+class Medicament:
+    nom: str
+    description: str | None = None
+    posologie: str | None = None
+    id_medicament: int | None = None
+
+
+class MedicamentRepository(Repository):
+    table = 'Medicament'
+    key = 'id_medicament'
+    entity = Medicament
+    columns = ('nom', 'description', 'posologie')
+    folded = {'nom_norm': 'nom'}
+    row_columns = 't.id_medicament, t.nom, t.description, t.posologie'
+    row_from = 'Medicament t'
+    row_tables = ('Medicament',)
+    row_fields = ('nom', 'description', 'posologie')
+    filters = {
+        'Nom': ('nom_norm', fold),
+    }
+
+    def validate(self, medicament):
+        # Champ obligatoire
+        if not medicament.nom:
+            raise ValidationError("Veuillez remplir le nom du médicament")
+
+    def count_ordonnances(self, id_medicament):
+        # Nombre d'ordonnances contenant le médicament (index idx_ordonnance_medicament)
+        with self.db.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM Ordonnance WHERE id_medicament = ?", (id_medicament,))
+            return cursor.fetchone()[0]
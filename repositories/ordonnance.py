@@ -0,0 +1,172 @@
+from dataclasses import dataclass
+
+from repositories.base import FETCH_SIZE, Repository, ValidationError, date_range
+
+# Lignes du tableau des ordonnances : colonnes affichées, puis l'ID du
+# médicament et l'espèce (pour la sélection).
+# CROSS JOIN force le parcours des consultations par l'index idx_consultation_date,
+# ce qui évite de trier toutes les ordonnances.
+VIEW_COLUMNS = ('id_consultation', 'date', 'animal', 'medicament', 'quantite', 'id_medicament', 'espece')
+VIEW_QUERY = """
+    SELECT o.id_consultation, c.date, a.nom, m.nom, o.quantite, o.id_medicament, a.espece
+    FROM Consultation c
+    CROSS JOIN Ordonnance o ON o.id_consultation = c.id_consultation
+    JOIN Animal a ON c.id_animal = a.id_animal
+    JOIN Medicament m ON o.id_medicament = m.id_medicament
+"""
+
+
+@dataclass
+class Ordonnance:
+    id_consultation: int
+    id_medicament: int
+    quantite: int
+
+
+class OrdonnanceRepository(Repository):
+    # Clé primaire composée (consultation, médicament) : les méthodes par clé
+    # reçoivent les deux IDs
+    table = 'Ordonnance'
+    entity = Ordonnance
+    columns = ('id_consultation', 'id_medicament', 'quantite')
+    row_tables = ('Ordonnance', 'Consultation', 'Animal', 'Medicament')
+
+    def validate(self, ordonnance):
+        # La consultation et le médicament sont obligatoires
+        if ordonnance.id_consultation is None or ordonnance.id_medicament is None:
+            raise ValidationError("Veuillez choisir une consultation et un médicament dans les listes")
+
+        # Contrainte CHECK (quantite > 0)
+        if ordonnance.quantite is None or ordonnance.quantite <= 0:
+            raise ValidationError("La quantité doit être supérieure à 0")
+
+    def list(self):
+        with self.db.cursor() as cursor:
+            cursor.execute("SELECT id_consultation, id_medicament, quantite FROM Ordonnance "
+                           "ORDER BY id_consultation, id_medicament")
+            return [Ordonnance(*row) for row in cursor.fetchall()]
+
+    def get(self, id_consultation, id_medicament):
+        with self.db.cursor() as cursor:
+            cursor.execute("""
+                SELECT id_consultation, id_medicament, quantite FROM Ordonnance
+                WHERE id_consultation = ? AND id_medicament = ?
+            """, (id_consultation, id_medicament))
+            row = cursor.fetchone()
+        return Ordonnance(*row) if row else None
+
+    def exists(self, id_consultation, id_medicament):
+        # Vérifier si l'ordonnance existe déjà (recherche par clé primaire)
+        return self.get(id_consultation, id_medicament) is not None
+
+    def create(self, ordonnance):
+        self.validate(ordonnance)
+        with self.db.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO Ordonnance (id_consultation, id_medicament, quantite)
+                VALUES (?, ?, ?)
+            """, self._values(ordonnance))
+            self._bump(cursor, 1)
+        self._notify([(ordonnance.id_consultation, ordonnance.id_medicament)])
+        return (ordonnance.id_consultation, ordonnance.id_medicament)
+
+    def _insert_batch(self, batch):
+        # Pas d'ID à attribuer (clé composée)
+        with self.db.cursor() as cursor:
+            cursor.executemany("""
+                INSERT INTO Ordonnance (id_consultation, id_medicament, quantite)
+                VALUES (?, ?, ?)
+            """, [self._values(ordonnance) for ordonnance in batch])
+            self._bump(cursor, len(batch))
+        self._notify([(ordonnance.id_consultation, ordonnance.id_medicament) for ordonnance in batch])
+        return len(batch)
+
+    def update(self, ordonnance):
+        # Modifier la quantité d'une ordonnance existante
+        self.validate(ordonnance)
+        with self.db.cursor() as cursor:
+            cursor.execute("""
+                UPDATE Ordonnance
+                SET quantite = ?
+                WHERE id_consultation = ? AND id_medicament = ?
+            """, (ordonnance.quantite, ordonnance.id_consultation, ordonnance.id_medicament))
+            count = cursor.rowcount
+            self._bump(cursor, count)
+        if count:
+            self._notify([(ordonnance.id_consultation, ordonnance.id_medicament)])
+        return count
+
+    def existing(self, id_consultation, ids_medicament):
+        # Médicaments déjà prescrits parmi "ids_medicament" pour la consultation (clé primaire)
+        ids_medicament = list(ids_medicament)
+        with self.db.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT id_medicament FROM Ordonnance
+                WHERE id_consultation = ? AND id_medicament IN ({', '.join('?' * len(ids_medicament))})
+            """, (id_consultation, *ids_medicament))
+            return {row[0] for row in cursor.fetchall()}
+
+    def upsert_many(self, ordonnances):
+        # Ajouter des ordonnances ou remplacer leur quantité si elles existent déjà,
+        # en une seule transaction (INSERT ... ON CONFLICT DO UPDATE) : une ordonnance
+        # de plusieurs médicaments est enregistrée en un aller-retour.
+        # Retourne le nombre de lignes écrites.
+        for ordonnance in ordonnances:
+            self.validate(ordonnance)
+        with self.db.cursor() as cursor:
+            cursor.executemany("""
+                INSERT INTO Ordonnance (id_consultation, id_medicament, quantite)
+                VALUES (?, ?, ?)
+                ON CONFLICT (id_consultation, id_medicament) DO UPDATE SET quantite = excluded.quantite
+            """, [self._values(ordonnance) for ordonnance in ordonnances])
+            self._bump(cursor, len(ordonnances))
+        self._notify([(ordonnance.id_consultation, ordonnance.id_medicament) for ordonnance in ordonnances])
+        return len(ordonnances)
+
+    def delete(self, id_consultation, id_medicament):
+        with self.db.cursor() as cursor:
+            cursor.execute("""
+                DELETE FROM Ordonnance
+                WHERE id_consultation = ? AND id_medicament = ?
+            """, (id_consultation, id_medicament))
+            count = cursor.rowcount
+            self._bump(cursor, count, deleted=True)
+        if count:
+            self._notify([(id_consultation, id_medicament)], deleted=True)
+        return count
+
+    def page_rows(self, apres, limite):
+        # Page de lignes du tableau des ordonnances, de la plus récente à la plus ancienne.
+        # "apres" est la clé (date, ID consultation, ID médicament) de la dernière ligne lue.
+        query = VIEW_QUERY + """
+            {where}
+            ORDER BY c.date DESC, o.id_consultation DESC, o.id_medicament DESC
+            LIMIT ?
+        """
+        with self.db.cursor() as cursor:
+            if apres is None:
+                cursor.execute(query.format(where=""), (limite,))
+            else:
+                cursor.execute(query.format(where="WHERE (c.date, o.id_consultation, o.id_medicament) < (?, ?, ?)"),
+                               (*apres, limite))
+            return cursor.fetchall()
+
+    def export_rows(self, debut=None, fin=None, size=FETCH_SIZE):
+        # Ordonnances dans l'ordre chronologique des consultations,
+        # éventuellement limitées à un intervalle de dates
+        where, params = date_range('c.date', debut, fin)
+        return self.columns, self._stream(f"""
+            SELECT o.id_consultation, o.id_medicament, o.quantite
+            FROM Consultation c
+            CROSS JOIN Ordonnance o ON o.id_consultation = c.id_consultation
+            {where}
+            ORDER BY c.date, o.id_consultation, o.id_medicament
+        """, params, size)
+
+    def export_view(self, debut=None, fin=None, size=FETCH_SIZE):
+        # Lignes du tableau des ordonnances dans l'ordre chronologique
+        where, params = date_range('c.date', debut, fin)
+        return VIEW_COLUMNS, self._stream(VIEW_QUERY + f"""
+            {where}
+            ORDER BY c.date, o.id_consultation, o.id_medicament
+        """, params, size)
@@ -0,0 +1,42 @@
+from dataclasses import dataclass
+
+from database import fold
+from repositories.base import Repository, ValidationError
+
+
+@dataclass
+class Proprietaire:
+    nom: str
+    prenom: str
+    telephone: str
+    email: str
+    adresse: str | None = None
+    id_proprietaire: int | None = None
+
+
+class ProprietaireRepository(Repository):
+    table = 'Proprietaire'
+    key = 'id_proprietaire'
+    entity = Proprietaire
+    columns = ('nom', 'prenom', 'telephone', 'email', 'adresse')
+    folded = {'nom_norm': 'nom', 'prenom_norm': 'prenom', 'email_norm': 'email'}
+    row_columns = 't.id_proprietaire, t.nom, t.prenom, t.telephone, t.email, t.adresse'
+    row_from = 'Proprietaire t'
+    row_tables = ('Proprietaire',)
+    row_fields = ('nom', 'prenom', 'telephone', 'email', 'adresse')
+    search_fields = ('nom', 'prenom')
+    filters = {
+        'Nom': ('nom_norm', fold),
+        'Prénom': ('prenom_norm', fold),
+        'Téléphone': ('telephone', str.strip),
+        'Email': ('email_norm', fold),
+    }
+
+    def validate(self, proprietaire):
+        # Champs obligatoires (le téléphone et l'email sont uniques : contrainte de la base)
+        if not proprietaire.nom or not proprietaire.prenom or not proprietaire.telephone or not proprietaire.email:
+            raise ValidationError("Veuillez remplir tous les champs obligatoires")
+
+    def label(self, row):
+        # Libellé dans les listes: "ID - Nom Prénom"
+        return f"{row[0]} - {row[1]} {row[2]}"
@@ -0,0 +1,107 @@
+from dataclasses import dataclass
+
+from database import bump_versions, fold
+from repositories.base import Repository, ValidationError
+
+# Consultations réaffectées par transaction (durée de verrouillage en écriture courte)
+REASSIGN_BATCH = 2000
+
+
+@dataclass
+class Veterinaire:
+    nom: str
+    telephone: str
+    email: str
+    specialisation: str | None = None
+    id_veterinaire: int | None = None
+
+
+class VeterinaireRepository(Repository):
+    table = 'Veterinaire'
+    key = 'id_veterinaire'
+    entity = Veterinaire
+    columns = ('nom', 'telephone', 'email', 'specialisation')
+    folded = {'nom_norm': 'nom', 'email_norm': 'email'}
+    row_columns = 't.id_veterinaire, t.nom, t.specialisation, t.telephone, t.email'
+    row_from = 'Veterinaire t'
+    row_tables = ('Veterinaire',)
+    row_fields = ('nom', 'specialisation', 'telephone', 'email')
+    search_fields = ('nom', 'specialisation')
+    filters = {
+        'Nom': ('nom_norm', fold),
+        'Téléphone': ('telephone', str.strip),
+        'Email': ('email_norm', fold),
+    }
+
+    def validate(self, veterinaire):
+        # Champs obligatoires (le téléphone et l'email sont uniques : contrainte de la base)
+        if not veterinaire.nom or not veterinaire.telephone or not veterinaire.email:
+            raise ValidationError("Veuillez remplir tous les champs obligatoires")
+
+    def count_consultations(self, id_veterinaire):
+        # Nombre de consultations du vétérinaire (index idx_consultation_veterinaire)
+        with self.db.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM Consultation WHERE id_veterinaire = ?", (id_veterinaire,))
+            return cursor.fetchone()[0]
+
+    def delete_with_consultations(self, id_veterinaire):
+        # Supprimer le vétérinaire et ses consultations dans une même transaction
+        with self.db.cursor() as cursor:
+            cursor.execute("DELETE FROM Consultation WHERE id_veterinaire = ?", (id_veterinaire,))
+            if cursor.rowcount:
+                bump_versions(cursor, self.db.cascade_tables('Consultation'))
+            cursor.execute("DELETE FROM Veterinaire WHERE id_veterinaire = ?", (id_veterinaire,))
+            count = cursor.rowcount
+            version = self._bump(cursor, count, deleted=True)
+        if self.cache is not None:
+            self.cache.remove(id_veterinaire, version, count)
+        self._notify(None, deleted=True, table='Consultation')
+        self._notify([id_veterinaire], deleted=True)
+        return count
+
+    def reassign_consultations(self, id_veterinaire, id_remplacant, limite=REASSIGN_BATCH):
+        # Réaffecter au plus "limite" consultations du vétérinaire au remplaçant dans
+        # une transaction courte (consultations trouvées par idx_consultation_veterinaire).
+        # Retourne le nombre de consultations réaffectées : 0 quand il n'en reste plus.
+        with self.db.cursor() as cursor:
+            cursor.execute("""
+                UPDATE Consultation SET id_veterinaire = ?
+                WHERE id_consultation IN (
+                    SELECT id_consultation FROM Consultation WHERE id_veterinaire = ? LIMIT ?
+                )
+            """, (id_remplacant, id_veterinaire, limite))
+            count = cursor.rowcount
+            if count:
+                bump_versions(cursor, ('Consultation',))
+        if count:
+            self._notify(None, table='Consultation')
+        return count
+
+    def retire(self, id_veterinaire, id_remplacant):
+        # Supprimer le vétérinaire après reassign_consultations, dans une même transaction
+        # que la réaffectation des consultations ajoutées entre-temps
+        with self.db.cursor() as cursor:
+            cursor.execute("UPDATE Consultation SET id_veterinaire = ? WHERE id_veterinaire = ?",
+                           (id_remplacant, id_veterinaire))
+            reste = cursor.rowcount
+            if reste:
+                bump_versions(cursor, ('Consultation',))
+            cursor.execute("DELETE FROM Veterinaire WHERE id_veterinaire = ?", (id_veterinaire,))
+            count = cursor.rowcount
+            version = self._bump(cursor, count, deleted=True)
+        if self.cache is not None:
+            self.cache.remove(id_veterinaire, version, count)
+        if reste:
+            self._notify(None, table='Consultation')
+        self._notify([id_veterinaire], deleted=True)
+        return count
+
+    def label(self, row):
+        # Libellé dans les listes: "ID - Nom (Spécialisation)"
+        return veterinaire_label(*row)
+
+def veterinaire_label(id_veterinaire, nom, specialisation):
+    # Libellé d'un vétérinaire dans les listes: "ID - Nom (Spécialisation)"
+    if specialisation:
+        return f"{id_veterinaire} - {nom} ({specialisation})"
+    return f"{id_veterinaire} - {nom}"
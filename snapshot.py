@@ -0,0 +1,62 @@
+import json
+import os
+
+from migrations import SCHEMA_VERSION
+
+# Instantané de démarrage : première page de chaque onglet, enregistrée à la
+# fermeture de l'application avec les versions des tables qu'elle lit (table
+# Version). Au démarrage suivant, l'instantané est affiché immédiatement puis
+# revalidé en arrière-plan : l'onglet n'est relu que si une de ses tables a changé.
+# L'empreinte du fichier de la base, prise après la fermeture des connexions,
+# écarte l'instantané si la base a été remplacée ou modifiée depuis par un autre
+# programme (qui n'incrémente pas forcément les compteurs de la table Version).
+
+SNAPSHOT_PATH = 'instantane_vues.json'
+
+# Format des lignes enregistrées (à incrémenter si les colonnes des tableaux changent)
+SNAPSHOT_FORMAT = 1
+
+
+def database_fingerprint(db_path):
+    # Empreinte du fichier de la base et de son journal WAL non vide :
+    # [[inode, taille, date de modification en ns], ...]
+    empreinte = []
+    for chemin in (db_path, db_path + '-wal'):
+        try:
+            stat = os.stat(chemin)
+        except OSError:
+            continue
+        if stat.st_size:
+            empreinte.append([stat.st_ino, stat.st_size, stat.st_mtime_ns])
+    return empreinte
+
+
+def load_snapshot(db_path, path=SNAPSHOT_PATH):
+    # Onglets de l'instantané {nom: {'versions': {table: version}, 'lignes': [...]}}.
+    # Un fichier absent, illisible, d'un autre format ou d'une autre base, ou une base
+    # modifiée depuis l'enregistrement, est ignoré.
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or \
+            (data.get('format'), data.get('schema'), data.get('base'), data.get('empreinte')) != \
+            (SNAPSHOT_FORMAT, SCHEMA_VERSION, os.path.abspath(db_path), database_fingerprint(db_path)):
+        return {}
+
+    # JSON ne connaît que les listes : les lignes redeviennent des tuples
+    return {name: {'versions': entry['versions'], 'lignes': [tuple(row) for row in entry['lignes']]}
+            for name, entry in data.get('onglets', {}).items()}
+
+
+def save_snapshot(db_path, onglets, path=SNAPSHOT_PATH):
+    # Enregistrer l'instantané, une fois les connexions à la base fermées (fichier
+    # temporaire puis remplacement : un arrêt pendant l'écriture ne laisse pas de
+    # fichier tronqué)
+    data = {'format': SNAPSHOT_FORMAT, 'schema': SCHEMA_VERSION, 'base': os.path.abspath(db_path),
+            'empreinte': database_fingerprint(db_path), 'onglets': onglets}
+    temporaire = path + '.tmp'
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(temporaire, path)
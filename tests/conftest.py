@@ -0,0 +1,13 @@
+import pytest
+
+from database import ConnectionManager
+from migrations import migrate
+
+
+@pytest.fixture
+def db(tmp_path):
+    # Base neuve au dernier schéma, dans un répertoire temporaire
+    db = ConnectionManager(str(tmp_path / 'clinique.db'))
+    migrate(db.connection(), verbose=False)
+    yield db
+    db.close_all()
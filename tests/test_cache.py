@@ -0,0 +1,39 @@
+import sqlite3
+
+from database import ConnectionManager
+from repositories import Medicament, Repositories
+
+
+def test_ecriture_par_une_autre_connexion(db):
+    repos = Repositories(db, cache=True)
+    id_medicament = repos.medicaments.create(Medicament('Amoxicilline'))
+    assert repos.medicaments.search('amox', 10) == [(id_medicament, f"{id_medicament} - Amoxicilline")]
+
+    # Écriture par un autre gestionnaire de connexions (autre instance de l'application)
+    autre = ConnectionManager(db.path)
+    try:
+        Repositories(autre).medicaments.update(Medicament('Méloxicam', id_medicament=id_medicament))
+    finally:
+        autre.close_all()
+
+    assert repos.medicaments.get(id_medicament).nom == 'Méloxicam'
+    assert repos.medicaments.search('amox', 10) == []
+    assert repos.medicaments.search('melox', 10) == [(id_medicament, f"{id_medicament} - Méloxicam")]
+
+
+def test_ecriture_sans_compteur_de_version(db):
+    repos = Repositories(db, cache=True)
+    id_medicament = repos.medicaments.create(Medicament('Amoxicilline'))
+    assert repos.medicaments.get(id_medicament).nom == 'Amoxicilline'
+
+    # Autre programme : la table Version n'est pas incrémentée
+    conn = sqlite3.connect(db.path)
+    try:
+        conn.execute("UPDATE Medicament SET nom = 'Othello', nom_norm = 'othello' WHERE id_medicament = ?",
+                     (id_medicament,))
+        conn.commit()
+    finally:
+        conn.close()
+
+    assert repos.medicaments.get(id_medicament).nom == 'Othello'
+    assert repos.medicaments.search('oth', 10) == [(id_medicament, f"{id_medicament} - Othello")]
@@ -0,0 +1,73 @@
+import csv
+
+from database import ConnectionManager
+from importer import CsvImporter
+from migrations import migrate
+from repositories import Repositories
+
+
+def _write(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows(rows)
+
+
+def test_reference_proprietaire_en_double(tmp_path):
+    db = ConnectionManager(str(tmp_path / 'clinique.db'))
+    migrate(db.connection())
+    importer = CsvImporter(Repositories(db), errors_path=str(tmp_path / 'rejets.csv'))
+
+    proprietaires = tmp_path / 'proprietaires.csv'
+    _write(proprietaires, [
+        ['nom', 'prenom', 'telephone', 'email', 'adresse', 'ref'],
+        ['Dupont', 'Jean', '0601020304', 'jean.dupont@example.com', '', 'P1'],
+        ['Martin', 'Paul', '0605060708', 'paul.martin@example.com', '', 'P1'],
+    ])
+    animaux = tmp_path / 'animaux.csv'
+    _write(animaux, [
+        ['nom', 'espece', 'race', 'age', 'poids', 'proprietaire'],
+        ['Rex', 'Chien', '', '3', '12.5', 'P1'],
+    ])
+    try:
+        importer.import_proprietaires(str(proprietaires))
+        importer.import_animaux(str(animaux))
+    finally:
+        importer.close()
+
+    # La deuxième ligne de référence P1 est refusée
+    assert [r[1:4] for r in importer.report] == [(2, 1, 1), (1, 1, 0)]
+    with open(tmp_path / 'rejets.csv', newline='', encoding='utf-8') as f:
+        rejets = list(csv.reader(f))[1:]
+    assert [(r[1], r[2]) for r in rejets] == [('3', "Référence de propriétaire en double: P1")]
+
+    # L'animal est rattaché au premier propriétaire
+    with db.cursor() as cursor:
+        cursor.execute("SELECT p.nom FROM Animal a JOIN Proprietaire p USING (id_proprietaire)")
+        assert cursor.fetchall() == [('Dupont',)]
+    db.close_all()
+
+
+def test_reference_liberee_si_ligne_refusee_par_la_base(tmp_path):
+    db = ConnectionManager(str(tmp_path / 'clinique.db'))
+    migrate(db.connection())
+    with db.cursor() as cursor:
+        cursor.execute("CREATE TRIGGER refus BEFORE INSERT ON Proprietaire WHEN new.nom = 'Refus' "
+                       "BEGIN SELECT RAISE(ABORT, 'refus'); END")
+    importer = CsvImporter(Repositories(db), errors_path=str(tmp_path / 'rejets.csv'), batch_size=1)
+
+    proprietaires = tmp_path / 'proprietaires.csv'
+    _write(proprietaires, [
+        ['nom', 'prenom', 'telephone', 'email', 'adresse', 'ref'],
+        ['Refus', 'Jean', '0601020304', 'jean.refus@example.com', '', 'P1'],
+        ['Martin', 'Paul', '0605060708', 'paul.martin@example.com', '', 'P1'],
+    ])
+    try:
+        importer.import_proprietaires(str(proprietaires))
+    finally:
+        importer.close()
+
+    # La ligne refusée par la base ne réserve plus la référence P1
+    assert importer.report[0][1:4] == (2, 1, 1)
+    with db.cursor() as cursor:
+        cursor.execute("SELECT id_proprietaire, nom FROM Proprietaire")
+        assert cursor.fetchall() == [(importer.proprietaire_ids['P1'], 'Martin')]
+    db.close_all()
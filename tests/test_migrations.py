@@ -0,0 +1,104 @@
+import sqlite3
+
+from database import ConnectionManager
+from migrations import SCHEMA_VERSION, VERSIONED_TABLES, migrate, schema_version
+from repositories import Repositories
+
+# Schéma créé par la première version de l'application (clinique.db, sans user_version)
+SCHEMA_INITIAL = """
+CREATE TABLE Proprietaire (
+    id_proprietaire INTEGER PRIMARY KEY AUTOINCREMENT,
+    nom TEXT NOT NULL,
+    prenom TEXT NOT NULL,
+    telephone TEXT UNIQUE NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    adresse TEXT
+);
+CREATE TABLE Animal (
+    id_animal INTEGER PRIMARY KEY AUTOINCREMENT,
+    nom TEXT NOT NULL,
+    espece TEXT NOT NULL,
+    race TEXT,
+    age INTEGER CHECK (age >= 0),
+    poids REAL,
+    id_proprietaire INTEGER,
+    FOREIGN KEY (id_proprietaire) REFERENCES Proprietaire (id_proprietaire) ON DELETE CASCADE
+);
+CREATE TABLE Veterinaire (
+    id_veterinaire INTEGER PRIMARY KEY AUTOINCREMENT,
+    nom TEXT NOT NULL,
+    specialisation TEXT,
+    telephone TEXT UNIQUE NOT NULL,
+    email TEXT UNIQUE NOT NULL
+);
+CREATE TABLE Consultation (
+    id_consultation INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    diagnostic TEXT NOT NULL,
+    traitement TEXT,
+    id_animal INTEGER NOT NULL,
+    id_veterinaire INTEGER NOT NULL,
+    FOREIGN KEY (id_animal) REFERENCES Animal (id_animal),
+    FOREIGN KEY (id_veterinaire) REFERENCES Veterinaire (id_veterinaire)
+);
+CREATE TABLE Medicament (
+    id_medicament INTEGER PRIMARY KEY AUTOINCREMENT,
+    nom TEXT NOT NULL,
+    description TEXT,
+    posologie TEXT
+);
+CREATE TABLE Ordonnance (
+    id_consultation INTEGER,
+    id_medicament INTEGER,
+    quantite INTEGER CHECK (quantite > 0),
+    PRIMARY KEY (id_consultation, id_medicament),
+    FOREIGN KEY (id_consultation) REFERENCES Consultation (id_consultation) ON DELETE CASCADE,
+    FOREIGN KEY (id_medicament) REFERENCES Medicament (id_medicament) ON DELETE CASCADE
+);
+CREATE INDEX idx_consultation_veterinaire ON Consultation(id_veterinaire);
+
+INSERT INTO Proprietaire VALUES (1, 'Lefèvre', 'Hélène', '0601020304', 'Helene@Example.com', NULL);
+INSERT INTO Animal VALUES (1, 'Médor', 'Chien', NULL, 4, 12.5, 1);
+INSERT INTO Veterinaire VALUES (1, 'Dr Noël', NULL, '0701020304', 'noel@example.com');
+INSERT INTO Consultation VALUES (7, '2024-03-01', 'Otite externe', 'Gouttes', 1, 1);
+INSERT INTO Medicament VALUES (1, 'Otomax', NULL, NULL);
+INSERT INTO Ordonnance VALUES (7, 1, 2);
+"""
+
+
+def test_mise_a_niveau_de_la_base_initiale(tmp_path):
+    path = str(tmp_path / 'clinique.db')
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA_INITIAL)
+    conn.close()
+
+    db = ConnectionManager(path)
+    try:
+        report = migrate(db.connection(), verbose=False)
+        assert [r[0] for r in report] == list(range(1, SCHEMA_VERSION + 1))
+        assert schema_version(db.connection()) == SCHEMA_VERSION
+        assert migrate(db.connection(), verbose=False) == []
+
+        with db.cursor() as cursor:
+            # Colonnes repliées remplies (migration 5)
+            cursor.execute("SELECT nom_norm, prenom_norm, email_norm FROM Proprietaire")
+            assert cursor.fetchall() == [('lefevre', 'helene', 'helene@example.com')]
+            # Compteurs de modifications (migration 6)
+            cursor.execute("SELECT nom_table FROM Version")
+            assert sorted(row[0] for row in cursor.fetchall()) == sorted(VERSIONED_TABLES)
+            # Index plein texte des consultations existantes (migration 4, conservé par la migration 7)
+            cursor.execute("SELECT rowid FROM consultation_fts WHERE consultation_fts MATCH 'otite'")
+            assert cursor.fetchall() == [(7,)]
+
+        # Recherche sans accents
+        repos = Repositories(db)
+        assert repos.proprietaires.search('lefe', 10)[0][0] == 1
+
+        # Supprimer l'animal supprime ses consultations et leurs ordonnances (migration 7)
+        assert repos.animaux.delete(1) == 1
+        with db.cursor() as cursor:
+            cursor.execute("SELECT (SELECT COUNT(*) FROM Consultation), (SELECT COUNT(*) FROM Ordonnance), "
+                           "(SELECT COUNT(*) FROM consultation_fts WHERE consultation_fts MATCH 'otite')")
+            assert cursor.fetchone() == (0, 0, 0)
+    finally:
+        db.close_all()
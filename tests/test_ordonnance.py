@@ -0,0 +1,41 @@
+import pytest
+
+from repositories import (Animal, Consultation, Medicament, Ordonnance, Proprietaire, Repositories,
+                          ValidationError, Veterinaire)
+
+
+@pytest.fixture
+def consultation(db):
+    # Consultation et deux médicaments : (dépôts, ID consultation, IDs médicaments)
+    changes = []
+    repos = Repositories(db, on_change=lambda table, ids, deleted: changes.append((table, ids, deleted)))
+    id_proprietaire = repos.proprietaires.create(Proprietaire('Dupont', 'Jean', '0601020304', 'jean@example.com'))
+    id_animal = repos.animaux.create(Animal('Rex', 'Chien', id_proprietaire=id_proprietaire))
+    id_veterinaire = repos.veterinaires.create(Veterinaire('Dr Noël', '0701020304', 'noel@example.com'))
+    id_consultation = repos.consultations.create(
+        Consultation('2024-03-01', 'Otite externe', id_animal, id_veterinaire))
+    ids_medicament = [repos.medicaments.create(Medicament(nom)) for nom in ('Otomax', 'Méloxicam')]
+    changes.clear()
+    return repos, id_consultation, ids_medicament, changes
+
+
+def test_upsert_ajoute_et_remplace(consultation):
+    repos, id_consultation, (otomax, meloxicam), changes = consultation
+    repos.ordonnances.create(Ordonnance(id_consultation, otomax, 1))
+    changes.clear()
+
+    assert repos.ordonnances.upsert_many([Ordonnance(id_consultation, otomax, 3),
+                                          Ordonnance(id_consultation, meloxicam, 2)]) == 2
+    assert repos.ordonnances.list() == [Ordonnance(id_consultation, otomax, 3),
+                                        Ordonnance(id_consultation, meloxicam, 2)]
+    assert repos.ordonnances.existing(id_consultation, [otomax, meloxicam]) == {otomax, meloxicam}
+    assert changes == [('Ordonnance', [(id_consultation, otomax), (id_consultation, meloxicam)], False)]
+
+
+def test_upsert_refuse_tout_le_lot(consultation):
+    repos, id_consultation, (otomax, meloxicam), changes = consultation
+    with pytest.raises(ValidationError):
+        repos.ordonnances.upsert_many([Ordonnance(id_consultation, otomax, 3),
+                                       Ordonnance(id_consultation, meloxicam, 0)])
+    assert repos.ordonnances.list() == []
+    assert changes == []
@@ -0,0 +1,69 @@
+import sqlite3
+
+import pytest
+
+from orphans import OrphanSweeper
+
+# Lignes écrites sans contrôle des clés étrangères : l'animal 2 (propriétaire 99),
+# la consultation 3 (animal 77) et l'ordonnance (50, 1) sont orphelins; la
+# consultation 2 et l'ordonnance (2, 1) sont emportées avec l'animal 2,
+# l'ordonnance (3, 1) avec la consultation 3
+DONNEES = """
+INSERT INTO Proprietaire (id_proprietaire, nom, prenom, telephone, email) VALUES (1, 'Dupont', 'Jean', '06', 'j@x');
+INSERT INTO Animal (id_animal, nom, espece, id_proprietaire) VALUES (1, 'Rex', 'Chien', 1), (2, 'Félix', 'Chat', 99);
+INSERT INTO Veterinaire (id_veterinaire, nom, telephone, email) VALUES (1, 'Dr Noël', '07', 'n@x');
+INSERT INTO Consultation (id_consultation, date, diagnostic, id_animal, id_veterinaire)
+VALUES (1, '2024-03-01', 'Otite', 1, 1), (2, '2024-03-02', 'Toux', 2, 1), (3, '2024-03-03', 'Gale', 77, 1);
+INSERT INTO Medicament (id_medicament, nom) VALUES (1, 'Otomax');
+INSERT INTO Ordonnance (id_consultation, id_medicament, quantite) VALUES (1, 1, 1), (2, 1, 1), (3, 1, 1), (50, 1, 1);
+"""
+
+ATTENDU = {'Ordonnance': 3, 'Consultation': 2, 'Animal': 1}
+
+
+@pytest.fixture
+def orphelins(db):
+    conn = sqlite3.connect(db.path)
+    try:
+        conn.executescript(DONNEES)
+    finally:
+        conn.close()
+    return db
+
+
+def _lignes(db):
+    with db.cursor() as cursor:
+        return [cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ('Animal', 'Consultation', 'Ordonnance')]
+
+
+@pytest.mark.parametrize('batch_size', [1, 5000])
+def test_simulation_et_suppression_comptent_les_memes_lignes(orphelins, batch_size):
+    simulation = OrphanSweeper(orphelins, dry_run=True, batch_size=batch_size).run()
+    assert simulation == ATTENDU
+    assert _lignes(orphelins) == [2, 3, 4]
+
+    assert OrphanSweeper(orphelins, batch_size=batch_size).run() == ATTENDU
+    assert _lignes(orphelins) == [1, 1, 1]
+    assert OrphanSweeper(orphelins, batch_size=batch_size).run() == dict.fromkeys(ATTENDU, 0)
+
+
+def test_suppression_incremente_les_versions(orphelins):
+    versions = orphelins.table_versions(('Animal', 'Consultation', 'Ordonnance', 'Proprietaire'))
+    OrphanSweeper(orphelins).run()
+    apres = orphelins.table_versions(('Animal', 'Consultation', 'Ordonnance', 'Proprietaire'))
+    assert {table for table in versions if apres[table] != versions[table]} == \
+        {'Animal', 'Consultation', 'Ordonnance'}
+
+
+def test_base_sans_orphelin_sans_verrou_d_ecriture(orphelins):
+    OrphanSweeper(orphelins).run()
+
+    # Parcours d'une base propre pendant qu'une autre connexion tient le verrou d'écriture
+    autre = sqlite3.connect(orphelins.path, timeout=0)
+    try:
+        autre.execute("BEGIN IMMEDIATE")
+        assert OrphanSweeper(orphelins).run() == dict.fromkeys(ATTENDU, 0)
+    finally:
+        autre.rollback()
+        autre.close()
@@ -0,0 +1,48 @@
+import json
+import sqlite3
+
+from snapshot import load_snapshot, save_snapshot
+
+ONGLETS = {'medicaments': {'versions': {'Medicament': 12}, 'lignes': [(1, 'Otomax', '', '')]}}
+
+
+def test_instantane_relu_tel_quel(db, tmp_path):
+    path = str(tmp_path / 'instantane.json')
+    db.close_all()
+    save_snapshot(db.path, ONGLETS, path)
+    assert load_snapshot(db.path, path) == ONGLETS
+
+
+def test_instantane_ecarte_si_la_base_a_change(db, tmp_path):
+    path = str(tmp_path / 'instantane.json')
+    db.close_all()
+    save_snapshot(db.path, ONGLETS, path)
+
+    # Écriture d'un autre programme après la fermeture de l'application
+    conn = sqlite3.connect(db.path)
+    try:
+        conn.execute("INSERT INTO Medicament (nom, nom_norm) VALUES ('Méloxicam', 'meloxicam')")
+        conn.commit()
+    finally:
+        conn.close()
+    assert load_snapshot(db.path, path) == {}
+
+
+def test_instantane_d_une_autre_base_ou_d_un_autre_format(db, tmp_path):
+    path = str(tmp_path / 'instantane.json')
+    db.close_all()
+    save_snapshot(db.path, ONGLETS, path)
+    assert load_snapshot(str(tmp_path / 'autre.db'), path) == {}
+
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    data['format'] += 1
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    assert load_snapshot(db.path, path) == {}
+
+    # Fichier absent ou illisible
+    assert load_snapshot(db.path, str(tmp_path / 'absent.json')) == {}
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{')
+    assert load_snapshot(db.path, path) == {}
@@ -0,0 +1,46 @@
+import pytest
+
+from repositories import Animal, Consultation, Proprietaire, Repositories, Veterinaire
+
+
+@pytest.fixture
+def repos(db):
+    return Repositories(db, cache=True)
+
+
+def _consultations(repos, id_animal, id_veterinaire, nombre):
+    return [repos.consultations.create(Consultation('2024-03-01', f'Contrôle {i}', id_animal, id_veterinaire))
+            for i in range(nombre)]
+
+
+def test_reaffectation_par_tranches_puis_retrait(repos):
+    id_proprietaire = repos.proprietaires.create(Proprietaire('Dupont', 'Jean', '0601020304', 'jean@example.com'))
+    id_animal = repos.animaux.create(Animal('Rex', 'Chien', id_proprietaire=id_proprietaire))
+    id_depart = repos.veterinaires.create(Veterinaire('Dr Noël', '0701020304', 'noel@example.com'))
+    id_remplacant = repos.veterinaires.create(Veterinaire('Dr Martin', '0705060708', 'martin@example.com'))
+    _consultations(repos, id_animal, id_depart, 5)
+    assert repos.veterinaires.get(id_depart) is not None
+
+    # Tranches de 2 consultations, 0 quand il n'en reste plus
+    tranches = []
+    while (count := repos.veterinaires.reassign_consultations(id_depart, id_remplacant, limite=2)):
+        tranches.append(count)
+    assert tranches == [2, 2, 1]
+
+    # Consultation ajoutée pendant la réaffectation : reprise par retire
+    ajoutee = _consultations(repos, id_animal, id_depart, 1)[0]
+    assert repos.veterinaires.retire(id_depart, id_remplacant) == 1
+
+    assert repos.veterinaires.get(id_depart) is None
+    assert repos.veterinaires.count_consultations(id_depart) == 0
+    assert repos.veterinaires.count_consultations(id_remplacant) == 6
+    assert repos.consultations.get(ajoutee).id_veterinaire == id_remplacant
+
+
+def test_retrait_sans_consultation(repos):
+    id_depart = repos.veterinaires.create(Veterinaire('Dr Noël', '0701020304', 'noel@example.com'))
+    id_remplacant = repos.veterinaires.create(Veterinaire('Dr Martin', '0705060708', 'martin@example.com'))
+    assert repos.veterinaires.reassign_consultations(id_depart, id_remplacant) == 0
+    assert repos.veterinaires.retire(id_depart, id_remplacant) == 1
+    assert repos.veterinaires.retire(id_depart, id_remplacant) == 0
+    assert [v.id_veterinaire for v in repos.veterinaires.list()] == [id_remplacant]
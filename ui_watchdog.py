@@ -0,0 +1,226 @@
+import configparser
+import contextlib
+import os
+import time
+import tkinter as tk
+from tkinter import ttk
+from collections import deque
+from datetime import datetime
+
+import database
+from instrumentation import Histogram
+
+# Surveillance de la réactivité de la boucle Tk (optionnelle). Un battement
+# planifié avec root.after mesure le retard de la boucle, et chaque fonction
+# appelée par Tk (commande de bouton, liaison <ButtonRelease-1>, after...) est
+# chronométrée : un blocage plus long que le seuil est attribué à la fonction
+# qui s'exécutait. Le résumé est accessible par un menu de débogage caché
+# (Ctrl+Maj+D) et écrit dans un journal à la fermeture.
+
+# Intervalle du battement et seuil de blocage (ms), nombre de blocages conservés
+HEARTBEAT_MS = 50
+STALL_MS = 200
+HISTORY = 500
+DUMP_PATH = 'blocages_interface.log'
+
+# Variable d'environnement d'activation (sinon clé "active" de la section [surveillance])
+WATCHDOG_ENV = 'CLINIQUE_SURVEILLANCE'
+
+# Surveillance en cours (une seule à la fois)
+_active = None
+
+
+def load_watchdog_settings(config_path=database.CONFIG_PATH):
+    # Paramètres de la section [surveillance] du fichier de configuration
+    # (active, intervalle_ms, seuil_ms, journal); None si la surveillance est désactivée
+    config = configparser.ConfigParser()
+    config.read(config_path, encoding='utf-8')
+    try:
+        active = os.environ.get(WATCHDOG_ENV) or config.get('surveillance', 'active', fallback='non')
+        if active.strip().lower() not in ('1', 'oui', 'vrai', 'true', 'yes', 'on'):
+            return None
+        return {
+            'interval': config.getint('surveillance', 'intervalle_ms', fallback=HEARTBEAT_MS),
+            'threshold': config.getfloat('surveillance', 'seuil_ms', fallback=STALL_MS),
+            'dump_path': config.get('surveillance', 'journal', fallback=DUMP_PATH),
+        }
+    except ValueError as e:
+        raise ValueError(f"Valeur invalide dans la section [surveillance]: {e}")
+
+
+def callback_name(func):
+    # Nom lisible d'une fonction appelée par Tk (pour after(), la fonction
+    # planifiée est retrouvée dans la fermeture de tkinter)
+    code = getattr(func, '__code__', None)
+    if code is not None and code.co_name == 'callit' and 'func' in code.co_freevars:
+        func = func.__closure__[code.co_freevars.index('func')].cell_contents
+    return getattr(func, '__qualname__', None) or type(func).__qualname__
+
+
+@contextlib.contextmanager
+def section(label):
+    # Préciser l'origine d'un blocage à l'intérieur d'une fonction appelée par Tk
+    # (ex. l'étiquette de la requête dont le résultat est affiché)
+    watchdog = _active
+    if watchdog is None or not watchdog._stack:
+        yield
+        return
+    frame = watchdog._stack[-1]
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        duree = time.perf_counter() - debut
+        if frame[3] is None or duree > frame[3][1]:
+            frame[3] = (label, duree)
+
+
+class MainloopWatchdog:
+
+    def __init__(self, root, interval=HEARTBEAT_MS, threshold=STALL_MS, history=HISTORY, dump_path=DUMP_PATH):
+        self.root = root
+        self.interval = interval
+        self.threshold = threshold
+        self.dump_path = dump_path
+
+        # Blocages récents : (horodatage, durée en ms, origine)
+        self.stalls = deque(maxlen=history)
+
+        # Retard des battements (ms)
+        self.latency = Histogram()
+
+        # Fonctions Tk en cours (imbriquées pendant une boucle modale) :
+        # [fonction, début du segment, plus long segment, section la plus lente]
+        self._stack = []
+        self._explained = False
+        self._expected = None
+        self._after_id = None
+        self._original_call = None
+
+    def start(self):
+        # Chronométrer les fonctions appelées par Tk et lancer le battement
+        global _active
+        if _active is not None:
+            _active.stop()
+        original = self._original_call = tk.CallWrapper.__call__
+        watchdog = self
+
+        def __call__(wrapper, *args):
+            watchdog._enter(wrapper.func)
+            try:
+                return original(wrapper, *args)
+            finally:
+                watchdog._leave()
+
+        tk.CallWrapper.__call__ = __call__
+        _active = self
+        self._expected = time.perf_counter() + self.interval / 1000
+        self._after_id = self.root.after(self.interval, self._beat)
+
+    def stop(self):
+        global _active
+        if self._original_call is not None:
+            tk.CallWrapper.__call__ = self._original_call
+            self._original_call = None
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        if _active is self:
+            _active = None
+
+    def _enter(self, func):
+        # Une fonction imbriquée (boucle modale, update()) interrompt le segment en cours
+        now = time.perf_counter()
+        if self._stack:
+            frame = self._stack[-1]
+            frame[2] = max(frame[2], now - frame[1])
+        self._stack.append([func, now, 0.0, None])
+
+    def _leave(self):
+        now = time.perf_counter()
+        func, debut, longest, slowest = self._stack.pop()
+        longest = max(longest, now - debut)
+        if longest * 1000 >= self.threshold:
+            origin = callback_name(func)
+            if slowest is not None:
+                origin = f"{origin} > {slowest[0]}"
+            self._record(origin, longest * 1000)
+        if self._stack:
+            self._stack[-1][1] = now
+
+    def _record(self, origin, ms):
+        self.stalls.append((datetime.now(), ms, origin))
+        self._explained = True
+
+    def _beat(self):
+        # Retard du battement : un blocage qui n'a été attribué à aucune
+        # fonction Python vient de Tcl (affichage, géométrie, événements)
+        now = time.perf_counter()
+        retard = max(0.0, now - self._expected) * 1000
+        self.latency.add(retard)
+        if retard >= self.threshold and not self._explained:
+            self._record("(Tcl : affichage et événements)", retard)
+        self._explained = False
+        self._expected = now + self.interval / 1000
+        self._after_id = self.root.after(self.interval, self._beat)
+
+    def reset(self):
+        self.stalls.clear()
+        self.latency = Histogram()
+
+    def summary(self):
+        # [(origine, nombre, durée maximale, durée totale)] des blocages récents, par durée totale décroissante
+        origins = {}
+        for _, ms, origin in self.stalls:
+            count, maximum, total = origins.get(origin, (0, 0.0, 0.0))
+            origins[origin] = (count + 1, max(maximum, ms), total + ms)
+        rows = [(origin, *values) for origin, values in origins.items()]
+        rows.sort(key=lambda row: row[3], reverse=True)
+        return rows
+
+    def format_summary(self):
+        h = self.latency
+        lines = [f"Battements: {h.count} (toutes les {self.interval} ms), retard p50 {h.percentile(0.5):.1f} ms, "
+                 f"p95 {h.percentile(0.95):.1f} ms, max {h.max:.1f} ms",
+                 f"Blocages de plus de {self.threshold:.0f} ms: {len(self.stalls)}"]
+        if self.stalls:
+            lines.append(f"{'nombre':>8} {'max':>9} {'total':>10}  origine")
+            for origin, count, maximum, total in self.summary():
+                lines.append(f"{count:>8} {maximum:>9.1f} {total:>10.1f}  {origin}")
+            lines.append("Derniers blocages:")
+            for horodatage, ms, origin in list(self.stalls)[-10:]:
+                lines.append(f"  {horodatage:%H:%M:%S} {ms:>9.1f} ms  {origin}")
+        return "\n".join(lines)
+
+    def dump(self):
+        # Ajouter le résumé au journal (à la fermeture de l'application)
+        if self.latency.count:
+            with open(self.dump_path, 'a', encoding='utf-8') as f:
+                f.write(f"{datetime.now():%Y-%m-%d %H:%M:%S} Surveillance de la boucle Tk\n")
+                f.write(self.format_summary() + "\n\n")
+
+    # Menu de débogage caché
+    def install_debug_menu(self, sequence='<Control-Shift-D>'):
+        self.root.bind_all(sequence, self.show_debug_menu)
+
+    def show_debug_menu(self, event):
+        menu = tk.Menu(self.root, tearoff=0)
+        menu.add_command(label="Résumé des blocages", command=self.show_summary)
+        menu.add_command(label="Écrire le résumé dans le journal", command=self.dump)
+        menu.add_command(label="Réinitialiser", command=self.reset)
+        menu.tk_popup(event.x_root, event.y_root)
+
+    def show_summary(self):
+        window = tk.Toplevel(self.root)
+        window.title("Surveillance de la boucle Tk")
+        text = tk.Text(window, width=110, height=30, font=("Courier", 9), wrap="none")
+        text.pack(fill="both", expand=True)
+
+        def refresh():
+            text.config(state="normal")
+            text.delete("1.0", tk.END)
+            text.insert(tk.END, self.format_summary())
+            text.config(state="disabled")
+
+        ttk.Button(window, text="Actualiser", command=refresh).pack(pady=5)
+        refresh()
@@ -0,0 +1,359 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class TreeviewSync:
+    # Synchronisation incrémentale d'un ttk.Treeview avec une liste de lignes.
+    # Chaque élément a pour iid la clé primaire de sa ligne : un rafraîchissement
+    # n'applique que les insertions, mises à jour et suppressions nécessaires, ce
+    # qui conserve la sélection et la position de défilement.
+
+    def __init__(self, tree, iid=None, values=None):
+        # iid(ligne) : clé primaire de la ligne (la première colonne par défaut)
+        # values(ligne) : valeurs affichées dans le tableau (la ligne par défaut)
+        self.tree = tree
+        self.iid = iid or (lambda row: row[0])
+        self.values = values or (lambda row: row)
+
+        # Copie côté Python du contenu affiché (évite de relire le tableau via Tcl).
+        # "rows" conserve la ligne complète, y compris les colonnes non affichées
+        # (clés étrangères), pour que la sélection d'une ligne ne coûte aucune requête.
+        self.order = []
+        self.displayed = {}
+        self.rows = {}
+
+    def clear(self):
+        # Vider complètement le tableau
+        self.tree.delete(*self.order)
+        self.order = []
+        self.displayed = {}
+        self.rows = {}
+
+    def selected_row(self):
+        # Ligne complète de l'élément sélectionné (None si aucune sélection)
+        selection = self.tree.selection()
+        if not selection:
+            return None
+        return self.rows.get(selection[0])
+
+    def sync(self, rows):
+        # Conserver la position de défilement
+        first = self.tree.yview()[0]
+
+        new_order = []
+        new_displayed = {}
+        new_rows = {}
+        for row in rows:
+            iid = str(self.iid(row))
+            if iid not in new_displayed:
+                new_order.append(iid)
+                new_displayed[iid] = tuple(self.values(row))
+                new_rows[iid] = row
+
+        # Supprimer les lignes disparues
+        removed = [iid for iid in self.order if iid not in new_displayed]
+        if removed:
+            self.tree.delete(*removed)
+            self.order = [iid for iid in self.order if iid in new_displayed]
+
+        # Mettre à jour, insérer et replacer les lignes
+        for index, iid in enumerate(new_order):
+            values = new_displayed[iid]
+            if iid not in self.displayed:
+                self.tree.insert("", index, iid=iid, values=values)
+                self.order.insert(index, iid)
+                continue
+
+            if self.displayed[iid] != values:
+                self.tree.item(iid, values=values)
+            if self.order[index] != iid:
+                self.tree.move(iid, "", index)
+                self.order.remove(iid)
+                self.order.insert(index, iid)
+
+        self.displayed = new_displayed
+        self.rows = new_rows
+
+        # Restaurer la position de défilement
+        self.tree.yview_moveto(first)
+
+    def append(self, rows):
+        # Ajouter des lignes à la fin du tableau (les lignes déjà présentes sont ignorées)
+        for row in rows:
+            iid = str(self.iid(row))
+            if iid in self.displayed:
+                continue
+            values = tuple(self.values(row))
+            self.tree.insert("", "end", iid=iid, values=values)
+            self.order.append(iid)
+            self.displayed[iid] = values
+            self.rows[iid] = row
+
+
+class VirtualTreeview(TreeviewSync):
+    # Mode "liste virtuelle" pour un ttk.Treeview : seules la fenêtre visible et
+    # une marge sont chargées. Les pages suivantes sont lues (pagination par clé)
+    # lorsque la barre de défilement approche de la fin des lignes chargées, de
+    # sorte que l'ouverture de l'onglet coûte la même chose à 1k ou à 1M lignes.
+
+    def __init__(self, tree, scrollbar, fetch_page, key, iid=None, values=None, page_size=100, margin=0.2,
+                 submit=None, tag=None):
+        # fetch_page(apres, limite) : retourne au plus "limite" lignes situées
+        # après la clé "apres" (None pour la première page)
+        # key(ligne) : clé de pagination de la ligne (ordre du tri)
+        # submit(etiquette, func, callback) : exécute func puis callback(resultat),
+        # par exemple QueryExecutor.submit (exécution immédiate par défaut)
+        super().__init__(tree, iid=iid, values=values)
+        self.scrollbar = scrollbar
+        self.fetch_page = fetch_page
+        self.key = key
+        self.page_size = page_size
+        self.margin = margin
+        self.submit = submit or (lambda tag, func, callback: callback(func()))
+        self.tag = tag or str(tree)
+
+        self.last_key = None
+        self.exhausted = False
+        self._pending = None
+        self._loading = False
+
+        # Intercepter les mises à jour de la barre de défilement
+        self.tree.configure(yscrollcommand=self._on_scroll)
+
+    def _on_scroll(self, first, last):
+        # Mettre à jour la barre de défilement
+        self.scrollbar.set(first, last)
+
+        # Charger la page suivante quand la fin des lignes chargées approche
+        if not self.exhausted and self._pending is None and float(last) >= 1.0 - self.margin:
+            self._pending = self.tree.after_idle(self._load_pending)
+
+    def _load_pending(self):
+        self._pending = None
+        self.load_more()
+
+    def _cancel_pending(self):
+        # Annuler un chargement en attente
+        if self._pending is not None:
+            self.tree.after_cancel(self._pending)
+            self._pending = None
+
+    def reset(self):
+        # Effacer le tableau et recharger la première page
+        self._cancel_pending()
+        self.clear()
+        self.last_key = None
+        self.exhausted = False
+        self._loading = False
+        self.load_more()
+
+    def preload(self, rows):
+        # Afficher des lignes déjà connues (instantané) comme première page;
+        # les pages suivantes sont lues normalement
+        self._cancel_pending()
+        self._on_refreshed(rows, self.page_size)
+
+    def set_source(self, fetch_page, key):
+        # Changer la source des lignes (filtre) et recharger la première page
+        self.fetch_page = fetch_page
+        self.key = key
+        self.reset()
+
+    def refresh(self):
+        # Relire autant de lignes que celles déjà chargées (au moins une page)
+        # et n'appliquer que les différences. Remplace un chargement en cours.
+        self._cancel_pending()
+        limite = max(len(self.order), self.page_size)
+        self._loading = True
+        self.submit(self.tag, lambda: self.fetch_page(None, limite),
+                    lambda rows: self._on_refreshed(rows, limite))
+
+    def _on_refreshed(self, rows, limite):
+        self._loading = False
+        self.sync(rows)
+        self.last_key = self.key(rows[-1]) if rows else None
+        self.exhausted = len(rows) < limite
+
+    def load_more(self):
+        # Charger la page suivante (sauf si un chargement est déjà en cours)
+        if self.exhausted or self._loading:
+            return
+        apres = self.last_key
+        self._loading = True
+        self.submit(self.tag, lambda: self.fetch_page(apres, self.page_size), self._on_page_loaded)
+
+    def _on_page_loaded(self, rows):
+        self._loading = False
+        self.append(rows)
+
+        if rows:
+            self.last_key = self.key(rows[-1])
+        self.exhausted = len(rows) < self.page_size
+
+
+class SearchCombobox(ttk.Combobox):
+    # Combobox de recherche au fil de la frappe : après un court délai, une
+    # requête indexée par préfixe (LIMIT) remplace la liste des valeurs au lieu
+    # de charger toute la table. L'ID de l'entité choisie est conservé à part.
+
+    # Touches qui ne modifient pas le texte saisi
+    NAVIGATION_KEYS = ("Up", "Down", "Left", "Right", "Return", "Escape", "Tab",
+                       "Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R")
+
+    def __init__(self, master, search, submit=None, tag=None, delay=250, limit=50, **kw):
+        # search(texte, limite) : retourne au plus "limite" couples (id, libellé)
+        # submit(etiquette, func, callback) : exécute func puis callback(resultat)
+        super().__init__(master, **kw)
+        self.search = search
+        self.submit = submit or (lambda tag, func, callback: callback(func()))
+        self.tag = tag or str(self)
+        self.delay = delay
+        self.limit = limit
+
+        self.selected_id = None
+        self._ids = []
+        self._after_id = None
+
+        # Dictionnaires côté Python (reconstruits seulement quand la liste change)
+        # pour retrouver une entrée en temps constant sans relire 'values' via Tcl
+        self._index_by_id = {}
+        self._id_by_label = {}
+
+        self.bind("<KeyRelease>", self._on_key, add="+")
+        self.bind("<<ComboboxSelected>>", self._on_selected, add="+")
+
+    def _on_key(self, event):
+        if event.keysym in self.NAVIGATION_KEYS:
+            return
+
+        # Le texte a changé : l'entité choisie n'est plus valable
+        self.selected_id = None
+
+        # Relancer la recherche après le délai (anti-rebond)
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+        self._after_id = self.after(self.delay, self.reload)
+
+    def reload(self):
+        # Relancer la recherche avec le texte saisi
+        self._after_id = None
+        texte = self.get().strip()
+        self.submit(self.tag, lambda: self.search(texte, self.limit), self._set_results)
+
+    def _set_results(self, results):
+        self._ids = [r[0] for r in results]
+        labels = [r[1] for r in results]
+        self['values'] = labels
+
+        # Reconstruire les dictionnaires ID -> index et libellé -> ID
+        self._index_by_id = {id: index for index, id in enumerate(self._ids)}
+        self._id_by_label = dict(zip(labels, self._ids))
+
+        # Reconnaître un libellé saisi en entier
+        if self.selected_id is None:
+            self.selected_id = self._id_by_label.get(self.get())
+
+    def _on_selected(self, event):
+        index = self.current()
+        if index >= 0:
+            self.selected_id = self._ids[index]
+
+    def get_id(self):
+        # ID de l'entité choisie (None si aucune entité n'a été choisie)
+        return self.selected_id
+
+    def set_selection(self, id, label):
+        # Afficher une entité choisie ailleurs (sélection d'une ligne d'un tableau).
+        # Si l'entité fait partie de la liste, son entrée est sélectionnée en temps
+        # constant; sinon le libellé fourni est affiché.
+        index = self._index_by_id.get(id)
+        if index is not None:
+            self.current(index)
+        else:
+            self.set(label)
+        self.selected_id = id
+
+    def clear(self):
+        self.set('')
+        self.selected_id = None
+
+
+class FilterBar(ttk.Frame):
+    # Barre de filtre d'un tableau : choix de la colonne et préfixe saisi.
+    # on_change(champ, texte) est appelée après un court délai de frappe (ou
+    # immédiatement avec Entrée), seulement si le filtre a changé.
+
+    def __init__(self, master, fields, on_change, delay=250, **kw):
+        super().__init__(master, **kw)
+        self.on_change = on_change
+        self.delay = delay
+        self._after_id = None
+        self._applied = (fields[0], "")
+
+        ttk.Label(self, text="Filtrer :").pack(side="left", padx=(0, 5))
+        self.field = ttk.Combobox(self, values=list(fields), state="readonly", width=12)
+        self.field.set(fields[0])
+        self.field.pack(side="left", padx=(0, 5))
+        self.entry = ttk.Entry(self, width=30)
+        self.entry.pack(side="left", padx=(0, 5))
+        ttk.Button(self, text="Effacer", command=self.clear).pack(side="left")
+
+        self.entry.bind("<KeyRelease>", self._on_key, add="+")
+        self.entry.bind("<Return>", lambda e: self.apply(), add="+")
+        self.field.bind("<<ComboboxSelected>>", lambda e: self.apply(), add="+")
+
+    def _on_key(self, event):
+        if event.keysym in SearchCombobox.NAVIGATION_KEYS:
+            return
+
+        # Appliquer le filtre après le délai (anti-rebond)
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+        self._after_id = self.after(self.delay, self.apply)
+
+    def apply(self):
+        # Appliquer le filtre saisi s'il a changé
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+        filtre = (self.field.get(), self.entry.get().strip())
+        if filtre != self._applied:
+            self._applied = filtre
+            self.on_change(*filtre)
+
+    def clear(self):
+        # Effacer le texte saisi (retour au tableau complet)
+        self.entry.delete(0, "end")
+        self.apply()
+
+    def get(self):
+        # Filtre appliqué : (champ, texte)
+        return self._applied
+
+
+class ProgressDialog:
+    # Fenêtre de progression d'un traitement exécuté par tranches dans le thread
+    # de travail : la boucle Tk reste libre et la fenêtre est mise à jour entre
+    # deux tranches. Elle ne peut pas être fermée avant la fin du traitement.
+
+    def __init__(self, master, title, total):
+        self.total = total
+        self.window = tk.Toplevel(master)
+        self.window.title(title)
+        self.window.transient(master)
+        self.window.resizable(False, False)
+        self.window.protocol("WM_DELETE_WINDOW", lambda: None)
+
+        self.label = ttk.Label(self.window, text="", width=50)
+        self.label.pack(padx=10, pady=(10, 5))
+        self.bar = ttk.Progressbar(self.window, length=350, mode="determinate", maximum=max(total, 1))
+        self.bar.pack(padx=10, pady=(0, 10))
+        self.update(0)
+
+    def update(self, done, texte=None):
+        # Afficher l'avancement ("done" sur "total" par défaut)
+        self.bar['value'] = min(done, self.total)
+        self.label.config(text=texte or f"{done} / {self.total}")
+
+    def close(self):
+        self.window.destroy()